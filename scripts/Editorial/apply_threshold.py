@@ -21,12 +21,16 @@ def save_json(path, data):
         encoding="utf-8"
     )
 
-def apply_threshold():
-    if not IN_FILE.exists():
-        print("❌ ranked.json não encontrado.")
-        return
-
-    ranked = load_json(IN_FILE)
+def apply_threshold(ranked=None):
+    """
+    Gera os rascunhos a partir do ranking. ranked: lista em memória
+    (senão lê o ranked.json). Retorna a lista de rascunhos.
+    """
+    if ranked is None:
+        if not IN_FILE.exists():
+            print("❌ ranked.json não encontrado.")
+            return []
+        ranked = load_json(IN_FILE)
     drafts = []
     seen_ids = set()
 
@@ -44,6 +48,7 @@ def apply_threshold():
 
     print(f"📝 Rascunhos: {len(drafts)}")
     print("✅ Modo 3 aplicado: nenhum item rejeitado automaticamente.")
+    return drafts
 
 if __name__ == "__main__":
     apply_threshold()
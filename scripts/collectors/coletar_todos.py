@@ -0,0 +1,137 @@
+"""
+Coleta de todas as fontes em paralelo, num único navegador
+Em Casa com Cecília
+
+Abre um Chromium, dá a cada fonte o seu contexto e roda Pelando, Promobit,
+Gatry e Gafanho ao mesmo tempo: o tempo total fica perto do da fonte mais
+lenta. Tempo, quantidade e requisições bloqueadas/bytes baixados por fonte
+vão para data/inbox/status.json.
+
+Uso (da raiz do projeto ou de qualquer pasta):
+    python scripts/collectors/coletar_todos.py
+    python scripts/collectors/coletar_todos.py --fontes pelando gatry
+    python scripts/collectors/coletar_todos.py --completa   # ignora as marcas d'água
+
+Cada fonte só coleta as ofertas novas desde a última execução (ver marcas.py):
+no status.json, "novas" é quanto entrou agora e "total" o tamanho do raw.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+from playwright.async_api import async_playwright
+
+import marcas
+import navegador
+import gafanho_playwright
+import gatry_playwright
+import pelando_playwright
+import promobit_playwright
+
+ROOT = Path(__file__).resolve().parents[2]
+STATUS_FILE = Path("data/inbox/status.json")
+
+FONTES = {
+    "pelando": pelando_playwright,
+    "promobit": promobit_playwright,
+    "gatry": gatry_playwright,
+    "gafanho": gafanho_playwright,
+}
+
+# Uma fonte travada não segura as outras além disso
+TIMEOUT_FONTE = 300
+
+
+async def coletar_fonte(nome, modulo, browser):
+    inicio = time.perf_counter()
+    try:
+        ofertas = await asyncio.wait_for(modulo.coletar(browser), TIMEOUT_FONTE)
+        total = modulo.salvar(ofertas)
+        resultado = {"total": total, "novas": len(ofertas), "erro": None}
+    except asyncio.TimeoutError:
+        print(f"⏱️ {nome}: passou de {TIMEOUT_FONTE}s, abortado.")
+        resultado = {"total": 0, "erro": f"Timeout ({TIMEOUT_FONTE}s)"}
+    except Exception as e:
+        print(f"❌ {nome}: {e}")
+        resultado = {"total": 0, "erro": (str(e) or type(e).__name__)[:50]}
+    resultado["segundos"] = round(time.perf_counter() - inicio, 1)
+    rede = navegador.ESTATISTICAS.get(nome)
+    if rede:
+        resultado["requisicoes"] = rede["requisicoes"]
+        resultado["bloqueadas"] = rede["bloqueadas"]
+        resultado["bytes"] = rede["bytes"]
+    return nome, resultado
+
+
+async def coletar_todos(fontes):
+    async with async_playwright() as p:
+        browser = await navegador.abrir_navegador(p)
+        try:
+            resultados = await asyncio.gather(
+                *(coletar_fonte(nome, FONTES[nome], browser) for nome in fontes)
+            )
+        finally:
+            await browser.close()
+    return dict(resultados)
+
+
+def salvar_status(coletores, segundos):
+    """Atualiza o status.json preservando o que outras etapas gravaram nele"""
+    status = {}
+    if STATUS_FILE.exists():
+        try:
+            status = json.loads(STATUS_FILE.read_text(encoding="utf-8"))
+        except ValueError:
+            status = {}
+
+    status["ultima_coleta"] = datetime.now().isoformat()
+    status["coleta_segundos"] = segundos
+    status["coletores"] = {**status.get("coletores", {}), **coletores}
+    status.setdefault("rascunhos_gerados", 0)
+
+    STATUS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    STATUS_FILE.write_text(json.dumps(status, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def main(fontes):
+    # Caminhos data/... são relativos à raiz do projeto
+    os.chdir(ROOT)
+
+    inicio = time.perf_counter()
+    coletores = asyncio.run(coletar_todos(fontes))
+    segundos = round(time.perf_counter() - inicio, 1)
+
+    salvar_status(coletores, segundos)
+
+    print("\n" + "=" * 50)
+    for nome, r in coletores.items():
+        icone = "✅" if not r["erro"] else "❌"
+        print(f"{icone} {nome:<9} {r.get('novas', 0):>4} novas {r['total']:>4} no raw  {r['segundos']:>6.1f}s  {r['erro'] or ''}")
+    print(f"⏱️ Coleta total: {segundos:.1f}s (soma das fontes: {sum(r['segundos'] for r in coletores.values()):.1f}s)")
+    if navegador.BLOQUEIO:
+        bloqueadas = sum(r.get("bloqueadas", 0) for r in coletores.values())
+        requisicoes = sum(r.get("requisicoes", 0) for r in coletores.values())
+        baixado = sum(r.get("bytes", 0) for r in coletores.values()) / 1024 / 1024
+        print(f"🚫 {bloqueadas}/{requisicoes} requisições bloqueadas, {baixado:.1f} MB baixados")
+
+    # Falha só se nenhuma fonte funcionou
+    return any(not r["erro"] for r in coletores.values())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Roda os coletores Playwright em paralelo")
+    parser.add_argument("--fontes", nargs="+", choices=list(FONTES), default=list(FONTES),
+                        help="Fontes a coletar (padrão: todas)")
+    parser.add_argument("--completa", action="store_true",
+                        help="Coleta completa, sem parar nas ofertas já coletadas")
+    args = parser.parse_args()
+
+    if args.completa:
+        marcas.COMPLETA = True
+
+    raise SystemExit(0 if main(args.fontes) else 1)
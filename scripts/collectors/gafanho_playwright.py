@@ -1,13 +1,80 @@
-from playwright.sync_api import sync_playwright
 from pathlib import Path
-import json
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import re
-import time
+
+import marcas
+import navegador
 
 URL = "https://gafanho.to/recentes"
 OUT = Path("data/raw/gafanho.json")
 
+# Acha uma vez o scope dono de `posts` (o do controller): parte de um card do
+# ng-repeat (ou dos elementos com controller/view) e sobe pelo $parent até o
+# scope que declara `posts`. Evita pedir o scope() de cada nó da página.
+_ESCOPO_POSTS_JS = """
+    if (typeof angular === 'undefined') return null;
+    const dono = (el) => {
+        let scope = angular.element(el).scope();
+        while (scope && !Object.prototype.hasOwnProperty.call(scope, 'posts')) scope = scope.$parent;
+        return scope && Array.isArray(scope.posts) ? scope : null;
+    };
+    let scope = null;
+    const card = document.querySelector('[ng-repeat*="posts"], [data-ng-repeat*="posts"]');
+    if (card) scope = dono(card);
+    if (!scope) {
+        for (const el of document.querySelectorAll('[ng-controller], [data-ng-controller], [ng-view], [ui-view]')) {
+            if ((scope = dono(el))) break;
+        }
+    }
+"""
+
+# Posts ainda não coletados (IDs da marca d'água ficam de fora), só com os
+# campos usados. null = scope não encontrado (cai na varredura completa).
+POSTS_ANGULAR_JS = """
+(conhecidos) => {""" + _ESCOPO_POSTS_JS + """
+    if (!scope) return null;
+    const vistos = new Set(conhecidos);
+    const novos = [];
+    for (const p of scope.posts) {
+        if (vistos.has(String(p.id))) continue;
+        novos.push({
+            id: p.id, title: p.title, links: p.links, price: p.price, storeName: p.storeName,
+            imageUrlBig: p.imageUrlBig, publicationDate: p.publicationDate
+        });
+    }
+    return novos;
+}
+"""
+
+# IDs dos posts carregados, na ordem do feed (para parar o scroll na marca d'água)
+IDS_ANGULAR_JS = """
+() => {""" + _ESCOPO_POSTS_JS + """
+    return scope ? scope.posts.map((p) => String(p.id)) : [];
+}
+"""
+
+# Abordagem antiga: scope() de todos os nós da página. Fica como último recurso.
+POSTS_ANGULAR_VARREDURA_JS = """
+() => {
+    if (typeof angular === 'undefined') return [];
+    const results = [];
+    // O Gafanho costuma ter um controller principal que segura todos os posts
+    document.querySelectorAll('*').forEach(el => {
+        try {
+            const scope = angular.element(el).scope();
+            if (scope && scope.posts && Array.isArray(scope.posts) && scope.posts.length > 0) {
+                // Evita duplicar se achar varios elementos com o mesmo scope
+                if(results.length === 0 || results[0].length < scope.posts.length) {
+                     results.push(scope.posts);
+                }
+            }
+        } catch (e) {}
+    });
+    // Retorna o array mais longo encontrado (o que contem todos os posts carregados)
+    return results.sort((a, b) => b.length - a.length)[0] || [];
+}
+"""
+
 def clean_price(price_str):
     if not price_str: return None
     # Remove R$, espaços e caracteres não numéricos exceto vírgula e ponto
@@ -18,110 +85,134 @@ def clean_price(price_str):
     except ValueError:
         return None
 
-def smart_scroll(page, max_scrolls=20):
+async def smart_scroll(page, max_scrolls=20, parar=None):
     """
-    Rola a página até parar de crescer ou atingir o limite.
+    Rola a página até parar de crescer, atingir o limite ou (com `parar`)
+    chegar nas ofertas da coleta anterior.
     No Gafanho, monitoramos a altura do scroll (scrollHeight) pois não temos um seletor fácil.
     """
-    print(f"📜 Iniciando Scroll (Max: {max_scrolls} tentativas)...")
-    last_height = 0
-    
-    for i in range(max_scrolls):
-        # Pega altura atual
-        new_height = page.evaluate("document.body.scrollHeight")
-        
-        if new_height == last_height:
-            print("   ⏹️ Fim da página alcançado (altura parou de crescer).")
-            break
-            
-        # Rola até o fim
-        page.keyboard.press("End")
-        page.wait_for_timeout(2000) # Gafanho é um pouco mais lento para renderizar
-        
-        print(f"   ↳ Scroll {i+1}/{max_scrolls} (Altura: {new_height})")
-        last_height = new_height
+    await navegador.rolar_ate(page, max_rolagens=max_scrolls, paradas=2, rotulo="Altura",
+                              parar=parar)
 
-def coletar_gafanho():
-    print(f"🔎 Coletando Gafanho.to (Angular Scope + Scroll) - {URL}")
-    
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        page.goto(URL, wait_until="networkidle", timeout=60000)
-        
-        # 1. Garante que carregou o inicial
-        page.wait_for_timeout(3000)
-
-        # 2. Scroll para carregar histórico
-        smart_scroll(page, max_scrolls=15) 
-
-        # 3. Extração via Angular (Sua lógica original, que é excelente)
-        raw_posts = page.evaluate("""
-        () => {
-            if (typeof angular === 'undefined') return [];
-            const results = [];
-            // O Gafanho costuma ter um controller principal que segura todos os posts
-            document.querySelectorAll('*').forEach(el => {
-                try {
-                    const scope = angular.element(el).scope();
-                    if (scope && scope.posts && Array.isArray(scope.posts) && scope.posts.length > 0) {
-                        // Evita duplicar se achar varios elementos com o mesmo scope
-                        if(results.length === 0 || results[0].length < scope.posts.length) {
-                             results.push(scope.posts);
-                        }
-                    }
-                } catch (e) {}
-            });
-            // Retorna o array mais longo encontrado (o que contem todos os posts carregados)
-            return results.sort((a, b) => b.length - a.length)[0] || [];
-        }
-        """)
-        
-        browser.close()
+def data_publicacao(texto, agora=None):
+    """
+    publicationDate do Gafanho -> ISO 8601 (para a marca d'água comparar).
+    Vem como "29/12 14:31", sem ano: fica o ano atual, ou o anterior se a
+    data cairia no futuro (post de dezembro lido em janeiro).
+    """
+    if not texto:
+        return None
+    texto = str(texto).strip()
+    try:
+        return datetime.fromisoformat(texto.replace("Z", "+00:00")).isoformat()
+    except ValueError:
+        pass
+    agora = agora or datetime.now()
+    try:
+        data = datetime.strptime(f"{texto}/{agora.year}", "%d/%m %H:%M/%Y")
+    except ValueError:
+        return None
+    if data > agora + timedelta(days=1):
+        data = data.replace(year=agora.year - 1)
+    return data.isoformat()
 
-    print(f"🧪 Itens brutos capturados via Angular: {len(raw_posts)}")
+def eh_post(d):
+    return "id" in d and "links" in d and "title" in d
 
-    # 4. Normalização e Limpeza (Para ficar igual ao Pelando/Promobit)
+def oferta_do_post(post):
+    """Post do Gafanho (scope do Angular ou feed JSON) -> formato raw do coletor"""
+    pid = str(post.get("id"))
+
+    # Preço: Gafanho manda "R$ 1.500,00"
+    price = clean_price(post.get("price"))
+    
+    # Link: Gafanho manda varios, pegamos o primeiro principal
+    url_oferta = post.get("links", "")
+    if " " in url_oferta: # Às vezes vem múltiplos links separados por espaço
+        url_oferta = url_oferta.split(" ")[0]
+
+    return {
+        "id": pid,
+        "source": "gafanho",
+        "title": post.get("title", "").strip(),
+        "url": url_oferta,
+        "price": price,
+        "price_text": post.get("price"),
+        "store": post.get("storeName"),
+        "published_at": data_publicacao(post.get("publicationDate")),
+        "collected_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    }
+
+def posts_capturados(respostas):
+    return [post for payload in respostas for post in navegador.percorrer_json(payload, eh_post)]
+
+def montar_ofertas(raw_posts):
     ofertas = []
     ids_vistos = set()
 
     for post in raw_posts:
         try:
             # Evita duplicatas (Angular as vezes mantém lixo)
-            pid = str(post.get("id"))
-            if pid in ids_vistos:
+            item = oferta_do_post(post)
+            if item["id"] in ids_vistos:
                 continue
-            ids_vistos.add(pid)
-
-            # Preço: Gafanho manda "R$ 1.500,00"
-            price = clean_price(post.get("price"))
-            
-            # Link: Gafanho manda varios, pegamos o primeiro principal
-            url_oferta = post.get("links", "")
-            if " " in url_oferta: # Às vezes vem múltiplos links separados por espaço
-                url_oferta = url_oferta.split(" ")[0]
-
-            item = {
-                "id": pid,
-                "source": "gafanho",
-                "title": post.get("title", "").strip(),
-                "url": url_oferta,
-                "price": price,
-                "price_text": post.get("price"),
-                "store": post.get("storeName"),
-                "collected_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
-            }
-            
+            ids_vistos.add(item["id"])
             ofertas.append(item)
         except Exception:
             continue
 
-    OUT.parent.mkdir(parents=True, exist_ok=True)
-    OUT.write_text(
-        json.dumps(ofertas, ensure_ascii=False, indent=2),
-        encoding="utf-8"
-    )
-    print(f"✅ {len(ofertas)} ofertas normalizadas salvas em {OUT}")
+    return ofertas
+
+async def posts_angular(page, conhecidos=()):
+    """Posts do scope do Angular fora de `conhecidos` (scope dono; varredura se não achar)"""
+    raw_posts = await page.evaluate(POSTS_ANGULAR_JS, list(conhecidos))
+    if raw_posts is None:
+        print("⚠️ Scope dos posts não encontrado direto, varrendo o DOM.")
+        raw_posts = await page.evaluate(POSTS_ANGULAR_VARREDURA_JS)
+    return raw_posts
+
+async def coletar(browser):
+    print(f"🔎 Coletando Gafanho.to (Feed JSON / Angular Scope + Scroll) - {URL}")
+    
+    marca = marcas.Marca.carregar("gafanho")
+    context, page = await navegador.nova_pagina(browser, "gafanho")
+    captura = navegador.CapturaJSON(page) if navegador.usar_rede() else None
+
+    async def parar():
+        ids = [p.get("id") for p in posts_capturados(captura.respostas)] if captura else []
+        if not ids:
+            ids = await page.evaluate(IDS_ANGULAR_JS)
+        return marca.alcancou(ids)
+
+    try:
+        # 1. Garante que carregou o inicial
+        await page.goto(URL, wait_until="networkidle", timeout=60000)
+
+        # 2. Scroll para carregar histórico (cada página vem por XHR)
+        await smart_scroll(page, max_scrolls=15, parar=None if marca.vazia else parar)
+
+        # 3. Posts direto das respostas JSON do $http
+        raw_posts = []
+        if captura:
+            payloads = await captura.concluir()
+            raw_posts = posts_capturados(payloads)
+            navegador.conferir_feed("gafanho", payloads, raw_posts, "lendo o scope do Angular")
+
+        # 4. Fallback: scope do Angular (só os posts que ainda não temos)
+        if not raw_posts:
+            raw_posts = await posts_angular(page, marca.ids)
+            print(f"🧪 Itens brutos capturados via Angular: {len(raw_posts)}")
+    finally:
+        await context.close()
+
+    # 5. Normalização e Limpeza (Para ficar igual ao Pelando/Promobit), só o que é novo
+    return marca.novas(montar_ofertas(raw_posts))
+
+def salvar(ofertas):
+    return marcas.salvar_novas("gafanho", OUT, ofertas)
+
+def coletar_gafanho():
+    salvar(navegador.rodar_sozinho(coletar))
 
 if __name__ == "__main__":
     coletar_gafanho()
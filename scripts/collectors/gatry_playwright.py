@@ -1,29 +1,38 @@
-from playwright.sync_api import sync_playwright
 from pathlib import Path
-import json
 from datetime import datetime, timezone
 
+import marcas
+import navegador
+
 URL = "https://gatry.com/"
 OUT = Path("data/raw/gatry.json")
 
-def coletar_gatry():
+SELETOR_PROMOS = "article a[href^='/promocoes/']"
+
+def id_da_promo(href):
+    return f"gatry-{href.split('/')[2]}"  # /promocoes/{id}/slug
+
+async def coletar(browser):
     print("🔎 Coletando Gatry via Playwright (DOM real)…")
     ofertas = []
     vistos = set()
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        page.goto(URL, timeout=60000)
-        page.wait_for_timeout(6000)
+    marca = marcas.Marca.carregar("gatry")
+    context, page = await navegador.nova_pagina(browser, "gatry")
 
-        # scroll para carregar mais artigos
-        for _ in range(5):
-            page.mouse.wheel(0, 4000)
-            page.wait_for_timeout(2000)
+    async def parar():
+        hrefs = await navegador.hrefs(page, SELETOR_PROMOS)
+        return marca.alcancou(list(dict.fromkeys(id_da_promo(h) for h in hrefs if h)))
+
+    try:
+        await page.goto(URL, timeout=60000)
+
+        # scroll para carregar mais artigos (até chegar nos já coletados)
+        await navegador.rolar_ate(page, "article", max_rolagens=5, paradas=2, rotulo="Articles",
+                                  parar=None if marca.vazia else parar)
 
         artigos = page.locator("article")
-        total = artigos.count()
+        total = await artigos.count()
         print(f"🧪 Articles encontrados: {total}")
 
         for i in range(total):
@@ -32,25 +41,23 @@ def coletar_gatry():
 
                 # título + link externo
                 title_el = art.locator("h3 a")
-                if title_el.count() == 0:
+                if await title_el.count() == 0:
                     continue
 
-                title = title_el.inner_text().strip()
-                url = title_el.get_attribute("href")
+                title = (await title_el.inner_text()).strip()
+                url = await title_el.get_attribute("href")
 
                 if not title or not url:
                     continue
 
                 # link interno Gatry (para ID)
                 promo_el = art.locator("a[href^='/promocoes/']").first
-                promo_href = promo_el.get_attribute("href") if promo_el.count() else None
+                promo_href = await promo_el.get_attribute("href") if await promo_el.count() else None
 
                 if not promo_href:
                     continue
 
-                promo_id = promo_href.split("/")[2]  # /promocoes/{id}/slug
-
-                uid = f"gatry-{promo_id}"
+                uid = id_da_promo(promo_href)
                 if uid in vistos:
                     continue
                 vistos.add(uid)
@@ -58,14 +65,14 @@ def coletar_gatry():
                 # preço
                 price_text = None
                 try:
-                    price_text = art.locator(".price").inner_text().strip()
+                    price_text = (await art.locator(".price").inner_text()).strip()
                 except:
                     pass
 
                 # loja
                 store = None
                 try:
-                    store = art.locator(".option-store a").inner_text().replace("Ir para", "").strip()
+                    store = (await art.locator(".option-store a").inner_text()).replace("Ir para", "").strip()
                 except:
                     pass
 
@@ -83,16 +90,16 @@ def coletar_gatry():
 
             except:
                 continue
+    finally:
+        await context.close()
 
-        browser.close()
+    return marca.novas(ofertas)
 
-    OUT.parent.mkdir(parents=True, exist_ok=True)
-    OUT.write_text(
-        json.dumps(ofertas, ensure_ascii=False, indent=2),
-        encoding="utf-8"
-    )
+def salvar(ofertas):
+    return marcas.salvar_novas("gatry", OUT, ofertas)
 
-    print(f"✅ {len(ofertas)} ofertas salvas em {OUT}")
+def coletar_gatry():
+    salvar(navegador.rodar_sozinho(coletar))
 
 if __name__ == "__main__":
     coletar_gatry()
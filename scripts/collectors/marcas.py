@@ -0,0 +1,152 @@
+"""
+Marca d'água por fonte (coleta incremental)
+Em Casa com Cecília
+
+Guarda, por fonte, os IDs das últimas ofertas coletadas e a data de
+publicação mais recente em data/cache/watermarks.json. Com isso os coletores:
+  - param de rolar quando o fim da lista carregada já é conhecido;
+  - devolvem só as ofertas novas;
+  - anexam essas novas no data/raw/<fonte>.json (mantendo as últimas
+    RETENCAO_RAW), em vez de regravar o feed inteiro.
+
+Sem marca (primeira execução) ou com COLETA_COMPLETA=1, a coleta é completa
+como antes (até a meta de itens).
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+import navegador
+
+WATERMARKS_FILE = Path("data/cache/watermarks.json")
+MAX_IDS = 1000          # IDs lembrados por fonte
+RETENCAO_RAW = 200      # Ofertas mantidas no raw de cada fonte (~ profundidade antiga)
+CAUDA = 3               # Quantos dos últimos itens carregados precisam ser conhecidos para parar
+
+COMPLETA = os.environ.get("COLETA_COMPLETA") == "1"
+
+
+def _data(texto):
+    if not texto:
+        return None
+    try:
+        return datetime.fromisoformat(str(texto).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def carregar_todas():
+    if not WATERMARKS_FILE.exists():
+        return {}
+    try:
+        return json.loads(WATERMARKS_FILE.read_text(encoding="utf-8"))
+    except ValueError:
+        return {}
+
+
+class Marca:
+    """Marca d'água de uma fonte"""
+
+    def __init__(self, fonte, dados=None):
+        dados = dados or {}
+        self.fonte = fonte
+        self.ids = list(dados.get("ids", []))          # Mais recentes primeiro
+        self._conhecidos = set(self.ids)
+        self.publicado_em = dados.get("publicado_em")
+
+    @classmethod
+    def carregar(cls, fonte):
+        if COMPLETA:
+            return cls(fonte)
+        return cls(fonte, carregar_todas().get(fonte))
+
+    @property
+    def vazia(self):
+        return not self._conhecidos
+
+    def conhecida(self, oferta):
+        """Oferta já coletada: ID lembrado ou publicada antes da marca"""
+        if str(oferta.get("id")) in self._conhecidos:
+            return True
+        publicado, marca = _data(oferta.get("published_at")), _data(self.publicado_em)
+        try:
+            return bool(publicado and marca and publicado < marca)
+        except TypeError:  # Uma com fuso e outra sem
+            return False
+
+    def alcancou(self, ids_em_ordem, cauda=CAUDA):
+        """
+        True quando os últimos `cauda` itens carregados (os mais antigos do
+        feed) já são conhecidos. Olhar a cauda, e não qualquer item, evita
+        parar por causa de ofertas fixadas no topo.
+        """
+        if self.vazia or len(ids_em_ordem) < cauda:
+            return False
+        return all(str(i) in self._conhecidos for i in ids_em_ordem[-cauda:])
+
+    def novas(self, ofertas):
+        novas = [o for o in ofertas if not self.conhecida(o)]
+        if not self.vazia:
+            print(f"🆕 {len(novas)} ofertas novas ({len(ofertas) - len(novas)} já coletadas)")
+        return novas
+
+    def avancar(self, ofertas):
+        """
+        Registra as ofertas coletadas e grava a marca. Junta com a marca
+        guardada mesmo na coleta completa (que começa sem ela): os IDs
+        anteriores continuam valendo, até MAX_IDS.
+        """
+        # Relê o arquivo: as outras fontes gravam as suas marcas na mesma execução
+        todas = carregar_todas()
+        guardada = todas.get(self.fonte) or {}
+
+        ids = [str(o["id"]) for o in ofertas if o.get("id") is not None]
+        vistos = set()
+        self.ids = [
+            i for i in ids + self.ids + [str(i) for i in guardada.get("ids", [])]
+            if not (i in vistos or vistos.add(i))
+        ][:MAX_IDS]
+        self._conhecidos = set(self.ids)
+
+        datas = [o.get("published_at") for o in ofertas if _data(o.get("published_at"))]
+        datas += [d for d in (self.publicado_em, guardada.get("publicado_em")) if _data(d)]
+        if datas:
+            try:
+                self.publicado_em = max(datas, key=_data)
+            except TypeError:
+                pass
+
+        todas[self.fonte] = {
+            "ids": self.ids,
+            "publicado_em": self.publicado_em,
+            "atualizado_em": datetime.now().isoformat(),
+        }
+        WATERMARKS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        WATERMARKS_FILE.write_text(json.dumps(todas, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+
+
+def juntar_raw(caminho, novas, retencao=RETENCAO_RAW):
+    """Ofertas novas na frente do raw existente, sem IDs repetidos, limitado a `retencao`"""
+    caminho = Path(caminho)
+    anteriores = []
+    if caminho.exists():
+        try:
+            anteriores = json.loads(caminho.read_text(encoding="utf-8"))
+        except ValueError:
+            anteriores = []
+        if not isinstance(anteriores, list):
+            anteriores = []
+
+    ids_novos = {str(o.get("id")) for o in novas}
+    mantidas = [o for o in anteriores if str(o.get("id")) not in ids_novos]
+    return (novas + mantidas)[:retencao]
+
+
+def salvar_novas(fonte, caminho, novas):
+    """Anexa as novas ao raw da fonte e avança a marca d'água. Retorna o total no raw."""
+    ofertas = juntar_raw(caminho, novas)
+    navegador.salvar_raw(caminho, ofertas)
+    Marca.carregar(fonte).avancar(novas)
+    return len(ofertas)
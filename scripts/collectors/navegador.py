@@ -0,0 +1,358 @@
+"""
+Navegador compartilhado dos coletores (Playwright assíncrono)
+Em Casa com Cecília
+
+Um único Chromium atende todos os coletores: cada fonte ganha o seu próprio
+contexto (cookies, cache e abas isolados) e as fontes rodam em paralelo.
+Cada coletor expõe `async def coletar(browser)` e `salvar(ofertas)`; rodando
+o arquivo do coletor direto, `rodar_sozinho` abre e fecha um navegador só
+para ele.
+
+Modo rede: `CapturaJSON` guarda os JSON que o próprio site busca (XHR/fetch)
+enquanto a página carrega e rola; `percorrer_json` acha as ofertas dentro
+deles. Se nada vier pela rede, os coletores caem para o DOM renderizado.
+COLETA_MODO=dom força o DOM. Quando chega JSON mas nenhuma oferta é
+reconhecida (o formato do feed mudou), `conferir_feed` avisa e guarda os
+payloads em data/cache/feeds/<fonte>.json; COLETA_SALVAR_FEED=1 guarda
+sempre (é assim que se atualiza tests/fixtures/feeds).
+
+Perfil leve: os coletores só leem texto, links e JSON, então cada contexto
+bloqueia imagens, fontes, mídia e domínios de anúncio/analytics (regras em
+data/config/coletores.json, opcional), desliga imagens e usa viewport
+pequeno. Requisições bloqueadas e bytes baixados por fonte ficam em
+ESTATISTICAS. COLETA_BLOQUEIO=0 desliga o bloqueio (para comparar).
+
+Scroll: `rolar_ate` segue para a próxima rolagem assim que um
+MutationObserver vê cards novos, em vez de dormir um tempo fixo, e para na
+meta, no orçamento de tempo ou quando o feed deixa de crescer.
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from playwright.async_api import async_playwright
+
+HEADLESS = True
+COLETA_MODO = os.environ.get("COLETA_MODO", "rede")  # rede | dom
+BLOQUEIO = os.environ.get("COLETA_BLOQUEIO", "1") != "0"
+CONFIG_FILE = Path("data/config/coletores.json")
+FEEDS_DIR = Path("data/cache/feeds")
+SALVAR_FEED = os.environ.get("COLETA_SALVAR_FEED") == "1"
+
+# ======================================================
+# Regras do perfil leve
+# ======================================================
+# O config pode sobrescrever qualquer chave e ajustar por fonte em "fontes",
+# ex: {"fontes": {"gafanho": {"tipos_bloqueados": ["image", "media"]}}}
+REGRAS_PADRAO = {
+    "tipos_bloqueados": ["image", "media", "font", "texttrack", "manifest"],
+    "dominios_bloqueados": [
+        "google-analytics.com", "googletagmanager.com", "googletagservices.com",
+        "googlesyndication.com", "doubleclick.net", "googleadservices.com",
+        "adservice.google.com", "facebook.net", "facebook.com", "connect.facebook.net",
+        "hotjar.com", "clarity.ms", "criteo.com", "criteo.net", "taboola.com",
+        "outbrain.com", "tiktok.com", "analytics.tiktok.com", "onesignal.com",
+        "amazon-adsystem.com", "adnxs.com", "scorecardresearch.com", "newrelic.com",
+        "nr-data.net", "sentry.io", "branch.io", "youtube.com", "ytimg.com",
+    ],
+    "viewport": {"width": 1024, "height": 768},
+    "desativar_imagens": True,
+    "fontes": {},
+}
+
+# fonte -> {"requisicoes", "bloqueadas", "bloqueadas_por_tipo", "bytes"}
+# (bytes = soma do Content-Length das respostas que chegaram)
+ESTATISTICAS = {}
+
+
+def carregar_regras(fonte=None, path=CONFIG_FILE):
+    """Regras padrão + config (se existir) + ajustes da fonte"""
+    config = {}
+    if path.exists():
+        try:
+            config = json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"⚠️ Config dos coletores inválida ({path}): {e}")
+    regras = {**REGRAS_PADRAO, **config}
+    if fonte:
+        regras = {**regras, **regras.get("fontes", {}).get(fonte, {})}
+    return regras
+
+
+def dominio_bloqueado(host, dominios):
+    """True se o host é um dos domínios ou subdomínio de algum deles"""
+    partes = host.split(".")
+    return any(".".join(partes[i:]) in dominios for i in range(len(partes) - 1))
+
+
+async def abrir_navegador(p):
+    args = []
+    if BLOQUEIO and carregar_regras().get("desativar_imagens"):
+        args.append("--blink-settings=imagesEnabled=false")
+    return await p.chromium.launch(headless=HEADLESS, args=args)
+
+
+async def nova_pagina(browser, fonte=None):
+    """
+    Contexto novo (isolado por fonte) com o perfil leve + uma aba.
+    Feche o contexto ao terminar; o resumo fica em ESTATISTICAS[fonte].
+    """
+    regras = carregar_regras(fonte)
+    context = await browser.new_context(viewport=regras["viewport"])
+
+    stats = {"requisicoes": 0, "bloqueadas": 0, "bloqueadas_por_tipo": {}, "bytes": 0}
+    if fonte:
+        ESTATISTICAS[fonte] = stats
+
+    if BLOQUEIO:
+        tipos = set(regras["tipos_bloqueados"])
+        dominios = set(regras["dominios_bloqueados"])
+
+        async def rotear(route):
+            req = route.request
+            tipo = req.resource_type
+            stats["requisicoes"] += 1
+            if tipo in tipos or dominio_bloqueado(urlsplit(req.url).hostname or "", dominios):
+                stats["bloqueadas"] += 1
+                por_tipo = stats["bloqueadas_por_tipo"]
+                por_tipo[tipo] = por_tipo.get(tipo, 0) + 1
+                await route.abort()
+            else:
+                await route.continue_()
+
+        await context.route("**/*", rotear)
+
+    def ao_receber(resposta):
+        # Só o cabeçalho: ler o corpo custaria outra ida ao navegador
+        try:
+            stats["bytes"] += int(resposta.headers.get("content-length", 0))
+        except ValueError:
+            pass
+
+    context.on("response", ao_receber)
+
+    page = await context.new_page()
+    return context, page
+
+
+def usar_rede():
+    return COLETA_MODO != "dom"
+
+
+# ======================================================
+# Captura dos feeds JSON
+# ======================================================
+
+class CapturaJSON:
+    """Guarda o corpo das respostas JSON (XHR/fetch) que a página recebe"""
+
+    def __init__(self, page, filtro_url=None):
+        self.respostas = []
+        self._tarefas = []
+        self._filtro = filtro_url
+        page.on("response", self._ao_receber)
+
+    def _ao_receber(self, resposta):
+        if resposta.request.resource_type not in ("xhr", "fetch"):
+            return
+        if "json" not in resposta.headers.get("content-type", ""):
+            return
+        if self._filtro and not re.search(self._filtro, resposta.url):
+            return
+        self._tarefas.append(asyncio.ensure_future(self._ler(resposta)))
+
+    async def _ler(self, resposta):
+        try:
+            self.respostas.append(await resposta.json())
+        except Exception:
+            pass  # Corpo indisponível (redirect, página já fechada...)
+
+    async def concluir(self):
+        """Espera os corpos pendentes. Chamar antes de fechar o contexto."""
+        if self._tarefas:
+            await asyncio.gather(*self._tarefas, return_exceptions=True)
+        return self.respostas
+
+
+async def estado_inicial(page):
+    """Dados embutidos no HTML (Next.js/Apollo): a 1ª página do feed não vem por XHR"""
+    estados = await page.evaluate(
+        "() => [window.__NEXT_DATA__ || null, window.__APOLLO_STATE__ || null]"
+    )
+    return [e for e in estados if e]
+
+
+def percorrer_json(obj, eh_item):
+    """Gera, na ordem do documento, os dicts em que eh_item(dict) é True (sem descer neles)"""
+    pilha = [obj]
+    while pilha:
+        atual = pilha.pop()
+        if isinstance(atual, dict):
+            if eh_item(atual):
+                yield atual
+                continue
+            pilha.extend(reversed(list(atual.values())))
+        elif isinstance(atual, list):
+            pilha.extend(reversed(atual))
+
+
+def conferir_feed(fonte, payloads, itens, alternativa="extraindo do DOM", pasta=FEEDS_DIR):
+    """
+    Resume o que veio da rede. JSON capturado sem nenhum item reconhecido
+    quer dizer que o formato do feed mudou: avisa e guarda os payloads para
+    ajustar o parser (senão o coletor cai no DOM em silêncio).
+    """
+    if itens:
+        print(f"📡 {len(itens)} ofertas lidas do feed JSON")
+    elif payloads:
+        print(f"⚠️ {len(payloads)} respostas JSON capturadas, nenhuma oferta reconhecida "
+              f"(formato do feed mudou?), {alternativa}.")
+    else:
+        print(f"⚠️ Nenhum feed JSON capturado, {alternativa}.")
+
+    if payloads and (SALVAR_FEED or not itens):
+        pasta = Path(pasta)
+        pasta.mkdir(parents=True, exist_ok=True)
+        caminho = pasta / f"{fonte}.json"
+        caminho.write_text(json.dumps(payloads, ensure_ascii=False, indent=1), encoding="utf-8")
+        print(f"💾 Payloads do feed salvos em {caminho}")
+
+
+def formatar_preco(valor):
+    """1234.5 -> 'R$ 1.234,50'"""
+    return "R$ " + f"{valor:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+# ======================================================
+# Scroll infinito orientado a eventos
+# ======================================================
+
+# Medida do feed: quantos elementos casam com o seletor (ou a altura da página)
+MEDIR_JS = """
+(seletor) => seletor ? document.querySelectorAll(seletor).length : document.body.scrollHeight
+"""
+
+# Rola até o fim e resolve assim que a medida passar de `antes` (ou em `ms`).
+# `cutucar` sobe um pouco antes: alguns feeds só carregam quando o gatilho
+# do fim da lista sai e volta para a tela.
+ROLAR_JS = """
+async ([seletor, antes, ms, cutucar]) => {
+    const medir = () => seletor ? document.querySelectorAll(seletor).length
+                                : document.body.scrollHeight;
+    if (cutucar) {
+        window.scrollBy(0, -500);
+        await new Promise((r) => setTimeout(r, 300));
+    }
+    return await new Promise((resolve) => {
+        let feito = false, pendente = false, obs, limite;
+        const concluir = () => {
+            if (feito) return;
+            feito = true;
+            obs.disconnect();
+            clearTimeout(limite);
+            resolve(medir());
+        };
+        // Lotes de mutações viram uma medição a cada 50 ms
+        obs = new MutationObserver(() => {
+            if (pendente) return;
+            pendente = true;
+            setTimeout(() => { pendente = false; if (medir() > antes) concluir(); }, 50);
+        });
+        obs.observe(document.body, {childList: true, subtree: true});
+        limite = setTimeout(concluir, ms);
+        window.scrollTo(0, document.scrollingElement.scrollHeight);
+        if (medir() > antes) concluir();
+    });
+}
+"""
+
+
+async def rolar_ate(page, seletor=None, meta=None, orcamento=60, espera=4, paradas=3,
+                    max_rolagens=None, rotulo="Itens", parar=None):
+    """
+    Rola o feed até `meta` (contagem de `seletor`), estourar `orcamento`
+    segundos, fazer `max_rolagens` ou ficar `paradas` rolagens seguidas sem
+    nada novo. Cada rolagem espera no máximo `espera` s pelos cards novos.
+    Sem seletor, mede a altura da página. Retorna a medida final.
+
+    parar: corrotina opcional sem argumentos; se devolver True o scroll acaba
+    (ex: o feed já chegou nas ofertas da coleta anterior).
+    """
+    limite = time.monotonic() + orcamento
+    if seletor:
+        # Primeiros cards (substitui a espera fixa depois do goto)
+        try:
+            await page.wait_for_selector(seletor, state="attached", timeout=15000)
+        except Exception:
+            pass
+
+    medida = await page.evaluate(MEDIR_JS, seletor)
+    sem_novidade = 0
+    rolagens = 0
+    print(f"📜 Scroll (meta: {meta or '-'}, orçamento: {orcamento}s) — {rotulo}: {medida}")
+
+    while True:
+        if meta and medida >= meta:
+            print("   ✅ Meta atingida!")
+            break
+        if parar and await parar():
+            print("   🧷 Chegou nas ofertas da coleta anterior.")
+            break
+        restante = limite - time.monotonic()
+        if restante <= 0:
+            print("   ⏱️ Orçamento de tempo esgotado.")
+            break
+        if max_rolagens and rolagens >= max_rolagens:
+            break
+
+        nova = await page.evaluate(
+            ROLAR_JS, [seletor, medida, int(min(espera, restante) * 1000), sem_novidade > 0]
+        )
+        rolagens += 1
+
+        if nova > medida:
+            sem_novidade = 0
+        else:
+            sem_novidade += 1
+            if sem_novidade >= paradas:
+                print("   ⏹️ O site parou de carregar novos itens.")
+                break
+        medida = nova
+        print(f"   ↳ {rotulo}: {medida}")
+
+    return medida
+
+
+async def hrefs(page, seletor):
+    """Atributo href de todos os elementos do seletor, na ordem da página"""
+    return await page.evaluate(
+        "(seletor) => Array.from(document.querySelectorAll(seletor), (a) => a.getAttribute('href'))",
+        seletor
+    )
+
+
+def rodar_sozinho(coletar):
+    """Roda um coletor isolado: abre o navegador, coleta e fecha. Retorna as ofertas."""
+    async def _main():
+        async with async_playwright() as p:
+            browser = await abrir_navegador(p)
+            try:
+                return await coletar(browser)
+            finally:
+                await browser.close()
+    return asyncio.run(_main())
+
+
+def salvar_raw(caminho, ofertas):
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    caminho.write_text(
+        json.dumps(ofertas, ensure_ascii=False, indent=2),
+        encoding="utf-8"
+    )
+    print(f"✅ {len(ofertas)} ofertas salvas em {caminho}")
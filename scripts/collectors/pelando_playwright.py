@@ -1,13 +1,42 @@
-from playwright.sync_api import sync_playwright
 from pathlib import Path
-import json
 from datetime import datetime, timezone
 import re
-import time
+from urllib.parse import urljoin
+
+import marcas
+import navegador
 
 # 1. AJUSTE CONFIRMADO: URL correta para pegar o feed cronológico
 URL = "https://www.pelando.com.br/recentes"
 OUT = Path("data/raw/pelando.json")
+SELETOR_LINKS = 'a[href^="https://www.pelando.com.br/d/"]'
+
+# Lê todos os links de oferta de uma vez. Para cada link, sobe até 6 níveis
+# no DOM atrás do texto do card (o mais próximo com "R$"; senão, o último
+# com "Vendido por"), igual à busca profunda de antes. Os vários links do
+# mesmo card sobem pelos mesmos elementos, então o innerText é lido uma vez só.
+EXTRAIR_LINKS_JS = """
+(seletor) => {
+    const textos = new Map();
+    const textoDe = (el) => {
+        if (!textos.has(el)) textos.set(el, el.innerText || "");
+        return textos.get(el);
+    };
+    return Array.from(document.querySelectorAll(seletor), (a) => {
+        let card = null;
+        let el = a;
+        for (let i = 0; i < 6 && el.parentElement; i++) {
+            el = el.parentElement;
+            const texto = textoDe(el);
+            if (texto.includes("R$") || texto.includes("Vendido por")) {
+                card = texto;
+                if (texto.includes("R$")) break;
+            }
+        }
+        return {href: a.getAttribute("href"), text: a.innerText || "", card};
+    });
+}
+"""
 
 def clean_price(price_str):
     if not price_str: return None
@@ -20,148 +49,180 @@ def clean_price(price_str):
     except ValueError:
         return None
 
-def smart_scroll(page, min_items=150, max_retries=5):
+async def smart_scroll(page, min_items=150, max_retries=3, parar=None):
     """
-    Rola a página pressionando END até atingir a meta de itens.
+    Rola a página até atingir a meta de itens (cada oferta tem ~4 links)
+    ou, com `parar`, até chegar nas ofertas da coleta anterior.
     """
-    print(f"📜 Iniciando Scroll Inteligente (Meta: ~{min_items} ofertas)...")
-    
-    last_count = 0
-    retries = 0
-    
-    while True:
-        # Pressiona END para ir ao rodapé
-        page.keyboard.press("End")
-        page.wait_for_timeout(2000) # Espera o site carregar novos itens
-        
-        links = page.locator('a[href^="https://www.pelando.com.br/d/"]')
-        current_count = links.count()
-        offers_estimate = current_count // 4
-        
-        print(f"   ↳ Links encontrados: {current_count} (~{offers_estimate} ofertas)")
-        
-        if offers_estimate >= min_items:
-            print("   ✅ Meta de ofertas atingida!")
-            break
-            
-        if current_count == last_count:
-            retries += 1
-            # Tenta desenroscar com scroll manual
-            page.mouse.wheel(0, -500)
-            page.wait_for_timeout(500)
-            page.mouse.wheel(0, 1000)
-            page.wait_for_timeout(1000)
-            
-            if retries >= max_retries:
-                print("   ⏹️ O site parou de carregar novos itens.")
-                break
-        else:
-            retries = 0
-            
-        last_count = current_count
-
-def coletar_pelando():
+    await navegador.rolar_ate(page, SELETOR_LINKS, meta=min_items * 4,
+                              paradas=max_retries, rotulo="Links encontrados",
+                              parar=parar)
+
+def url_da_oferta(d):
+    """Link da página da oferta no Pelando (/d/<slug>), como no modo DOM"""
+    for chave in ("url", "link", "permalink"):
+        valor = d.get(chave)
+        if isinstance(valor, str) and "/d/" in valor:
+            return urljoin("https://www.pelando.com.br", valor).split("#")[0].split("?")[0]
+    if isinstance(d.get("slug"), str):
+        return f"https://www.pelando.com.br/d/{d['slug']}"
+    return None
+
+def eh_oferta(d):
+    return isinstance(d.get("title"), str) and "price" in d and url_da_oferta(d) is not None
+
+def oferta_da_rede(d):
+    """Oferta do feed JSON do Pelando -> formato raw do coletor"""
+    url = url_da_oferta(d)
+    price = d.get("price")
+    price = float(price) if isinstance(price, (int, float, str)) and str(price).strip() else None
+    store = d.get("store")
+    if isinstance(store, dict):
+        store = store.get("name")
+    image = d.get("image") or d.get("imageUrl")
+    return {
+        "id": url.split("/")[-1],
+        "source": "pelando",
+        "title": d["title"].strip(),
+        "url": url,
+        "price": price,
+        "price_text": navegador.formatar_preco(price) if price is not None else None,
+        "store": store,
+        "image": image if isinstance(image, str) else None,
+        "collected_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    }
+
+def ofertas_da_rede(payloads):
+    ofertas = []
+    ids_vistos = set()
+    for payload in payloads:
+        for d in navegador.percorrer_json(payload, eh_oferta):
+            try:
+                item = oferta_da_rede(d)
+            except (TypeError, ValueError):
+                continue
+            if item["id"] in ids_vistos or not item["title"]: continue
+            ids_vistos.add(item["id"])
+            ofertas.append(item)
+    return ofertas
+
+async def extrair_dom(page):
+    # 1. Coleta Link Brutos (uma única ida ao navegador)
+    brutos = await page.evaluate(EXTRAIR_LINKS_JS, SELETOR_LINKS)
+    print(f"🧪 Total final de links para processar: {len(brutos)}")
+
+    candidates = {}
+
+    # 2. Agrupamento por URL (Lógica vencedora)
+    for link in brutos:
+        href = link['href']
+        if not href: continue
+
+        clean_url = href.split("#")[0]
+        if "#comments" in clean_url: continue
+
+        text = (link['text'] or "").strip()
+
+        if clean_url not in candidates:
+            candidates[clean_url] = []
+
+        candidates[clean_url].append({
+            'text': text,
+            'length': len(text),
+            'card': link['card']
+        })
+
+    print(f"📦 Ofertas únicas identificadas: {len(candidates)}")
+
+    ofertas = []
+
+    # 3. Extração final de dados
+    for url, items in candidates.items():
+        try:
+            # O link com maior texto é o título
+            best_link = max(items, key=lambda x: x['length'])
+            if best_link['length'] == 0: continue
+
+            title = best_link['text']
+
+            # Texto do card (preço e loja), montado no navegador
+            price, price_text, store_name = None, None, None
+            card_text = best_link['card'] or title
+
+            m_price = re.search(r"R\$\s*[\d\.,]+", card_text)
+            if m_price:
+                price_text = m_price.group(0)
+                price = clean_price(price_text)
+
+            m_store = re.search(r"Vendido por\s*(.*?)(?:\n|$|\r)", card_text, re.IGNORECASE)
+            if m_store:
+                store_name = m_store.group(1).strip().replace("*", "")
+
+            item = {
+                "id": id_da_url(url),
+                "source": "pelando",
+                "title": title,
+                "url": url,
+                "price": price,
+                "price_text": price_text,
+                "store": store_name,
+                "collected_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+            }
+            ofertas.append(item)
+
+        except Exception:
+            continue
+
+    return ofertas
+
+def id_da_url(href):
+    return href.split("#")[0].split("/")[-1].split("?")[0]
+
+async def ids_carregados(page, captura):
+    """IDs das ofertas já carregadas, na ordem do feed (pela rede, se houver; senão DOM)"""
+    if captura:
+        ids = [o["id"] for o in ofertas_da_rede(captura.respostas)]
+        if ids: return ids
+    hrefs = await navegador.hrefs(page, SELETOR_LINKS)
+    return list(dict.fromkeys(id_da_url(h) for h in hrefs if h))
+
+async def coletar(browser):
     print(f"🔎 Coletando Pelando - Aba RECENTES ({URL})...")
     
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        page.goto(URL, timeout=60000)
-        page.wait_for_timeout(5000) # Espera inicial segura
-
-        # 1. Executa o Scroll Inteligente
-        smart_scroll(page, min_items=150)
+    marca = marcas.Marca.carregar("pelando")
+    context, page = await navegador.nova_pagina(browser, "pelando")
+    captura = navegador.CapturaJSON(page) if navegador.usar_rede() else None
 
-        # 2. Coleta Link Brutos
-        links = page.locator('a[href^="https://www.pelando.com.br/d/"]')
-        count = links.count()
-        print(f"🧪 Total final de links para processar: {count}")
+    async def parar():
+        return marca.alcancou(await ids_carregados(page, captura))
 
-        candidates = {}
+    try:
+        await page.goto(URL, timeout=60000)
 
-        # 3. Agrupamento por URL (Lógica vencedora)
-        for i in range(count):
-            try:
-                el = links.nth(i)
-                href = el.get_attribute("href")
-                if not href: continue
-                
-                clean_url = href.split("#")[0]
-                if "#comments" in clean_url: continue
-
-                text = el.inner_text().strip()
-                
-                if clean_url not in candidates:
-                    candidates[clean_url] = []
-                
-                candidates[clean_url].append({
-                    'index': i,
-                    'text': text,
-                    'length': len(text)
-                })
-            except:
-                continue
+        # 1. Executa o Scroll Inteligente (também dispara as requisições do feed)
+        await smart_scroll(page, min_items=150, parar=None if marca.vazia else parar)
 
-        print(f"📦 Ofertas únicas identificadas: {len(candidates)}")
-        
+        # 2. Feed JSON do próprio site: 1ª página embutida no HTML + XHRs do scroll
         ofertas = []
+        if captura:
+            payloads = await navegador.estado_inicial(page) + await captura.concluir()
+            ofertas = ofertas_da_rede(payloads)
+            navegador.conferir_feed("pelando", payloads, ofertas)
 
-        # 4. Extração final de dados
-        for url, items in candidates.items():
-            try:
-                # O link com maior texto é o título
-                best_link = max(items, key=lambda x: x['length'])
-                if best_link['length'] == 0: continue
-
-                el = links.nth(best_link['index'])
-                title = best_link['text']
-                
-                # Busca profunda de preço e loja (subindo no DOM)
-                price, price_text, store_name = None, None, None
-                card_text = title
-                parent = el
-                
-                for _ in range(6):
-                    try:
-                        parent = parent.locator("xpath=..")
-                        full_text = parent.inner_text()
-                        if "R$" in full_text or "Vendido por" in full_text:
-                            card_text = full_text
-                            if "R$" in full_text: break
-                    except: break
-
-                m_price = re.search(r"R\$\s*[\d\.,]+", card_text)
-                if m_price:
-                    price_text = m_price.group(0)
-                    price = clean_price(price_text)
-
-                m_store = re.search(r"Vendido por\s*(.*?)(?:\n|$|\r)", card_text, re.IGNORECASE)
-                if m_store:
-                    store_name = m_store.group(1).strip().replace("*", "")
-
-                item = {
-                    "id": url.split("/")[-1].split("?")[0],
-                    "source": "pelando",
-                    "title": title,
-                    "url": url,
-                    "price": price,
-                    "price_text": price_text,
-                    "store": store_name,
-                    "collected_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
-                }
-                ofertas.append(item)
-
-            except Exception:
-                continue
+        # 3. Fallback: DOM renderizado
+        if not ofertas:
+            ofertas = await extrair_dom(page)
+    finally:
+        await context.close()
+
+    # 4. Só o que ainda não foi coletado
+    return marca.novas(ofertas)
 
-        browser.close()
+def salvar(ofertas):
+    return marcas.salvar_novas("pelando", OUT, ofertas)
 
-    OUT.parent.mkdir(parents=True, exist_ok=True)
-    OUT.write_text(
-        json.dumps(ofertas, ensure_ascii=False, indent=2),
-        encoding="utf-8"
-    )
-    print(f"✅ {len(ofertas)} ofertas salvas em {OUT}")
+def coletar_pelando():
+    salvar(navegador.rodar_sozinho(coletar))
 
 if __name__ == "__main__":
     coletar_pelando()
@@ -1,11 +1,22 @@
-from playwright.sync_api import sync_playwright
 from pathlib import Path
-import json
 from datetime import datetime, timezone
 import re
 
+import marcas
+import navegador
+
 URL = "https://www.promobit.com.br/promocoes/recentes/"
 OUT = Path("data/raw/promobit.json")
+SELETOR_LINKS = 'a[href^="/oferta/"]'
+
+# Lê href, texto e title de todos os links de oferta de uma vez
+EXTRAIR_LINKS_JS = """
+(seletor) => Array.from(document.querySelectorAll(seletor), (a) => ({
+    href: a.getAttribute("href"),
+    text: a.innerText || "",
+    title: a.getAttribute("title")
+}))
+"""
 
 def clean_price(price_str):
     if not price_str: return None
@@ -37,140 +48,173 @@ def clean_title(raw_text, store_name):
         
     return text.strip()
 
-def smart_scroll(page, min_items=100, max_retries=5):
-    print(f"📜 Iniciando Scroll Inteligente (Meta: ~{min_items} ofertas)...")
-    last_count = 0
-    retries = 0
-    
-    while True:
-        page.keyboard.press("End")
-        page.wait_for_timeout(2500)
-        
-        links = page.locator('a[href^="/oferta/"]')
-        current_count = links.count()
-        # Promobit costuma ter links duplicados por card (img + titulo), estimamos /2
-        offers_estimate = current_count 
-        
-        print(f"   ↳ Links encontrados: {current_count}")
-        
-        if offers_estimate >= min_items:
-            print("   ✅ Meta atingida!")
-            break
-            
-        if current_count == last_count:
-            retries += 1
-            page.mouse.wheel(0, -500)
-            page.wait_for_timeout(500)
-            page.mouse.wheel(0, 1000)
-            page.wait_for_timeout(1000)
-            
-            if retries >= max_retries:
-                print("   ⏹️ Site parou de carregar.")
-                break
-        else:
-            retries = 0
-        last_count = current_count
-
-def coletar_promobit():
-    print(f"🔎 Coletando Promobit (Visual/DOM) - {URL}")
+async def smart_scroll(page, min_items=100, max_retries=3, parar=None):
+    await navegador.rolar_ate(page, SELETOR_LINKS, meta=min_items,
+                              paradas=max_retries, rotulo="Links encontrados",
+                              parar=parar)
+
+def eh_oferta(d):
+    return "offerId" in d and "offerSlug" in d
+
+def oferta_da_rede(d):
+    """Item do feed JSON (offerId, offerSlug, offerPrice...) -> formato raw do coletor"""
+    price = d.get("offerPrice")
+    price = float(price) if price not in (None, "") else None
+    price_old = d.get("offerOldPrice")
+    photo = d.get("offerPhoto")
+    return {
+        "id": str(d["offerId"]),
+        "source": "promobit",
+        "title": (d.get("offerTitle") or "").strip(),
+        "url": f"https://www.promobit.com.br/oferta/{d['offerSlug']}/",
+        "price": price,
+        "price_text": navegador.formatar_preco(price) if price is not None else None,
+        "price_old": float(price_old) if price_old else None,
+        "store": d.get("storeName") or d.get("storeDomain"),
+        "image": f"https://i.promobit.com.br{photo}" if photo and photo.startswith("/") else photo,
+        "published_at": d.get("offerPublished"),
+        "collected_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    }
+
+def ofertas_da_rede(payloads):
+    ofertas = []
+    ids_vistos = set()
+    for payload in payloads:
+        for d in navegador.percorrer_json(payload, eh_oferta):
+            try:
+                item = oferta_da_rede(d)
+            except (TypeError, ValueError):
+                continue
+            if item["id"] in ids_vistos or not item["title"]: continue
+            ids_vistos.add(item["id"])
+            ofertas.append(item)
+    return ofertas
+
+async def extrair_dom(page):
+    # 1. Coleta Links (uma única ida ao navegador)
+    brutos = await page.evaluate(EXTRAIR_LINKS_JS, SELETOR_LINKS)
+    print(f"🧪 Total de links brutos: {len(brutos)}")
+
+    candidates = {}
+
+    # 2. Agrupamento
+    for link in brutos:
+        href = link['href']
+        if not href: continue
+
+        full_url = "https://www.promobit.com.br" + href.split("#")[0]
+        text = (link['text'] or "").strip()
+
+        if full_url not in candidates:
+            candidates[full_url] = []
+
+        candidates[full_url].append({
+            'text': text,
+            'length': len(text),
+            'title': link['title']
+        })
+
+    print(f"📦 Ofertas únicas identificadas: {len(candidates)}")
+
+    ofertas = []
+
+    # 3. Extração e Limpeza
+    for url, items in candidates.items():
+        try:
+            best_link = max(items, key=lambda x: x['length'])
+
+            # Texto Bruto (contém Loja + Titulo + Preço)
+            raw_text = best_link['text']
+            if not raw_text: raw_text = best_link['title'] or ""
+
+            price, price_text, store_name = None, None, None
+
+            # Busca Preço no texto bruto
+            m_price = re.search(r"R\$\s*[\d\.,]+", raw_text)
+            if m_price:
+                price_text = m_price.group(0)
+                price = clean_price(price_text)
+
+            # Busca Loja (Domínios .com .br no início)
+            m_store = re.search(r"([a-zA-Z0-9-]+\.(com|net|org)(\.br)?)", raw_text)
+            if m_store:
+                store_name = m_store.group(0)
+            else:
+                # Fallback: tenta pegar a primeira palavra se não for R$
+                parts = raw_text.split("\n")
+                if parts and "R$" not in parts[0] and len(parts[0]) < 20:
+                    store_name = parts[0]
+
+            # LIMPEZA DO TÍTULO
+            clean_title_text = clean_title(raw_text, store_name)
+
+            item = {
+                "id": id_da_url(url),
+                "source": "promobit",
+                "title": clean_title_text,
+                "url": url,
+                "price": price,
+                "price_text": price_text,
+                "store": store_name,
+                "collected_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+            }
+
+            if item["title"]:
+                ofertas.append(item)
+
+        except Exception:
+            continue
+
+    return ofertas
+
+def id_da_url(href):
+    return href.split("#")[0].strip("/").split("-")[-1]
+
+async def ids_carregados(page, captura):
+    """IDs das ofertas já carregadas, na ordem do feed (pela rede, se houver; senão DOM)"""
+    if captura:
+        ids = [o["id"] for o in ofertas_da_rede(captura.respostas)]
+        if ids: return ids
+    hrefs = await navegador.hrefs(page, SELETOR_LINKS)
+    return list(dict.fromkeys(id_da_url(h) for h in hrefs if h))
+
+async def coletar(browser):
+    print(f"🔎 Coletando Promobit - {URL}")
     
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        page.goto(URL, timeout=60000)
-        page.wait_for_timeout(5000)
+    marca = marcas.Marca.carregar("promobit")
+    context, page = await navegador.nova_pagina(browser, "promobit")
+    captura = navegador.CapturaJSON(page) if navegador.usar_rede() else None
 
-        # 1. Scroll
-        smart_scroll(page, min_items=100)
+    async def parar():
+        return marca.alcancou(await ids_carregados(page, captura))
 
-        # 2. Coleta Links
-        links = page.locator('a[href^="/oferta/"]')
-        count = links.count()
-        print(f"🧪 Total de links brutos: {count}")
+    try:
+        await page.goto(URL, timeout=60000)
 
-        candidates = {}
+        # 1. Scroll (também dispara as requisições do feed)
+        await smart_scroll(page, min_items=100, parar=None if marca.vazia else parar)
 
-        # 3. Agrupamento
-        for i in range(count):
-            try:
-                el = links.nth(i)
-                href = el.get_attribute("href")
-                if not href: continue
-                
-                full_url = "https://www.promobit.com.br" + href.split("#")[0]
-                text = el.inner_text().strip()
-                
-                if full_url not in candidates:
-                    candidates[full_url] = []
-                
-                candidates[full_url].append({
-                    'index': i,
-                    'text': text,
-                    'length': len(text)
-                })
-            except:
-                continue
-
-        print(f"📦 Ofertas únicas identificadas: {len(candidates)}")
-        
+        # 2. Feed JSON do próprio site: 1ª página embutida no HTML + XHRs do scroll
         ofertas = []
+        if captura:
+            payloads = await navegador.estado_inicial(page) + await captura.concluir()
+            ofertas = ofertas_da_rede(payloads)
+            navegador.conferir_feed("promobit", payloads, ofertas)
 
-        # 4. Extração e Limpeza
-        for url, items in candidates.items():
-            try:
-                best_link = max(items, key=lambda x: x['length'])
-                el = links.nth(best_link['index'])
-                
-                # Texto Bruto (contém Loja + Titulo + Preço)
-                raw_text = best_link['text']
-                if not raw_text: raw_text = el.get_attribute("title") or ""
-                
-                price, price_text, store_name = None, None, None
-                
-                # Busca Preço no texto bruto
-                m_price = re.search(r"R\$\s*[\d\.,]+", raw_text)
-                if m_price:
-                    price_text = m_price.group(0)
-                    price = clean_price(price_text)
-                
-                # Busca Loja (Domínios .com .br no início)
-                m_store = re.search(r"([a-zA-Z0-9-]+\.(com|net|org)(\.br)?)", raw_text)
-                if m_store:
-                    store_name = m_store.group(0)
-                else:
-                    # Fallback: tenta pegar a primeira palavra se não for R$
-                    parts = raw_text.split("\n")
-                    if parts and "R$" not in parts[0] and len(parts[0]) < 20:
-                        store_name = parts[0]
-
-                # LIMPEZA DO TÍTULO
-                clean_title_text = clean_title(raw_text, store_name)
-
-                item = {
-                    "id": url.strip("/").split("-")[-1],
-                    "source": "promobit",
-                    "title": clean_title_text,
-                    "url": url,
-                    "price": price,
-                    "price_text": price_text,
-                    "store": store_name,
-                    "collected_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
-                }
-                
-                if item["title"]:
-                    ofertas.append(item)
-
-            except Exception:
-                continue
+        # 3. Fallback: DOM renderizado
+        if not ofertas:
+            ofertas = await extrair_dom(page)
+    finally:
+        await context.close()
 
-        browser.close()
+    # 4. Só o que ainda não foi coletado
+    return marca.novas(ofertas)
 
-    OUT.parent.mkdir(parents=True, exist_ok=True)
-    OUT.write_text(
-        json.dumps(ofertas, ensure_ascii=False, indent=2),
-        encoding="utf-8"
-    )
-    print(f"✅ {len(ofertas)} ofertas salvas em {OUT}")
+def salvar(ofertas):
+    return marcas.salvar_novas("promobit", OUT, ofertas)
+
+def coletar_promobit():
+    salvar(navegador.rodar_sozinho(coletar))
 
 if __name__ == "__main__":
     coletar_promobit()
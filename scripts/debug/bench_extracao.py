@@ -0,0 +1,71 @@
+"""
+Micro-benchmark: extração rápida (streaming) vs BeautifulSoup completo
+Em Casa com Cecília
+
+Páginas salvas em scripts/debug:
+- debug_ml_produto.html: página de produto com JSON-LD Product (caminho rápido)
+- debug_ml.html: listagem sem dados estruturados (cai no BeautifulSoup)
+
+Uso:
+    python scripts/debug/bench_extracao.py                      # as duas páginas acima
+    python scripts/debug/bench_extracao.py pagina1.html pagina2.html --loja magalu -n 50
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from scripts.scrapers.extracao_rapida import extrair_dados
+from scripts.scrapers import price_scraper_v2 as scraper
+
+PARSERS = {
+    "ml": (scraper.parse_mercadolivre, scraper.parse_mercadolivre_completo),
+    "magalu": (scraper.parse_magalu, scraper.parse_magalu_completo),
+}
+
+
+def cronometrar(funcao, html, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = funcao(html)
+    return (time.perf_counter() - inicio) / repeticoes * 1000, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da extração de páginas de produto")
+    parser.add_argument("arquivos", nargs="*", default=[
+        str(ROOT / "scripts" / "debug" / "debug_ml_produto.html"),
+        str(ROOT / "scripts" / "debug" / "debug_ml.html"),
+    ])
+    parser.add_argument("--loja", choices=PARSERS, default="ml")
+    parser.add_argument("-n", type=int, default=20, help="Repetições por arquivo")
+    args = parser.parse_args()
+
+    rapido, completo = PARSERS[args.loja]
+
+    print("=" * 70)
+    print(f"⏱️  Benchmark de extração ({args.loja}, {args.n} repetições)")
+    print("=" * 70)
+
+    for arquivo in args.arquivos:
+        html = Path(arquivo).read_text(encoding="utf-8", errors="replace")
+        print(f"\n📄 {Path(arquivo).name} ({len(html) / 1024:.0f} KB)")
+
+        ms_stream, dados = cronometrar(extrair_dados, html, args.n)
+        ms_rapido, res_rapido = cronometrar(rapido, html, args.n)
+        ms_completo, res_completo = cronometrar(completo, html, args.n)
+
+        caminho = "rápido" if dados.get("preco") else "fallback BeautifulSoup"
+        print(f"   streaming (só extração): {ms_stream:8.2f} ms")
+        print(f"   parse atual ({caminho}): {ms_rapido:8.2f} ms  → {res_rapido.get('preco') or res_rapido.get('erro')}")
+        print(f"   BeautifulSoup completo:  {ms_completo:8.2f} ms  → {res_completo.get('preco') or res_completo.get('erro')}")
+        if dados.get("preco"):
+            print(f"   🚀 Ganho: {ms_completo / max(ms_rapido, 1e-6):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Micro-benchmark: scope dono dos posts vs varredura de todos os nós (Gafanho)
+Em Casa com Cecília
+
+Roda as duas extrações do gafanho_playwright na mesma página já carregada e
+mede o tempo dentro do navegador (só o trabalho no DOM) e o tempo da ida e
+volta (inclui serializar os posts para o Python).
+
+Não há página do Gafanho salva no repo: salve uma antes (precisa de rede)
+ou meça direto na URL.
+
+Uso:
+    python scripts/debug/bench_gafanho_scope.py --salvar scripts/debug/debug_gafanho.html
+    python scripts/debug/bench_gafanho_scope.py scripts/debug/debug_gafanho.html -n 50
+    python scripts/debug/bench_gafanho_scope.py https://gafanho.to/recentes --rolar 10
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from playwright.async_api import async_playwright
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "scripts" / "collectors"))
+
+import navegador
+import gafanho_playwright as gafanho
+
+# Página salva: os scripts do Angular continuam vindo do site
+BASE = '<base href="https://gafanho.to/">'
+
+
+def medir_no_navegador(js, *args):
+    """Envolve a extração para cronometrar só a parte que roda na página"""
+    chamada = ", ".join(repr(a) for a in args)
+    return f"""
+    () => {{
+        const extrair = {js};
+        const t0 = performance.now();
+        const r = extrair({chamada});
+        return [performance.now() - t0, r ? r.length : -1];
+    }}
+    """
+
+
+async def cronometrar(page, js, repeticoes, *args):
+    no_navegador = medir_no_navegador(js, *args)
+    ms_pagina = 0.0
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        await page.evaluate(js, *args)
+    ms_ida_volta = (time.perf_counter() - inicio) / repeticoes * 1000
+    for _ in range(repeticoes):
+        ms, total = await page.evaluate(no_navegador)
+        ms_pagina += ms
+    return ms_pagina / repeticoes, ms_ida_volta, total
+
+
+async def abrir(page, alvo, rolar):
+    if alvo.startswith("http"):
+        await page.goto(alvo, wait_until="networkidle", timeout=60000)
+    else:
+        await page.goto(Path(alvo).resolve().as_uri(), wait_until="networkidle", timeout=60000)
+    if rolar:
+        await gafanho.smart_scroll(page, max_scrolls=rolar)
+
+
+async def rodar(args):
+    async with async_playwright() as p:
+        browser = await navegador.abrir_navegador(p)
+        context, page = await navegador.nova_pagina(browser)
+        try:
+            if args.salvar:
+                await abrir(page, gafanho.URL, args.rolar or 5)
+                html = (await page.content()).replace("<head>", "<head>" + BASE, 1)
+                Path(args.salvar).write_text(html, encoding="utf-8")
+                print(f"💾 Página salva em {args.salvar} ({len(html) / 1024:.0f} KB)")
+                return
+
+            await abrir(page, args.alvo, args.rolar)
+            nos = await page.evaluate("document.querySelectorAll('*').length")
+
+            print("=" * 70)
+            print(f"⏱️  Extração de posts do Gafanho ({args.n} repetições, {nos} nós no DOM)")
+            print("=" * 70)
+
+            resultados = {
+                "varredura (todos os nós)": await cronometrar(page, gafanho.POSTS_ANGULAR_VARREDURA_JS, args.n),
+                "scope dono dos posts":     await cronometrar(page, gafanho.POSTS_ANGULAR_JS, args.n, []),
+            }
+            for nome, (ms_pagina, ms_ida_volta, total) in resultados.items():
+                print(f"   {nome:<26} {ms_pagina:8.2f} ms na página  {ms_ida_volta:8.2f} ms ida e volta  → {total} posts")
+
+            (antigo, _, n_antigo), (novo, _, n_novo) = resultados.values()
+            if n_novo < 0:
+                print("   ⚠️ Scope dono não encontrado: o coletor cairia na varredura.")
+            else:
+                if n_novo != n_antigo:
+                    print(f"   ⚠️ Contagens diferentes ({n_antigo} vs {n_novo})")
+                print(f"   🚀 Ganho na página: {antigo / max(novo, 1e-6):.1f}x")
+        finally:
+            await context.close()
+            await browser.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da extração de posts do Gafanho")
+    parser.add_argument("alvo", nargs="?", help="Página salva (.html) ou URL")
+    parser.add_argument("-n", type=int, default=20, help="Repetições")
+    parser.add_argument("--rolar", type=int, default=0, help="Rolagens antes de medir")
+    parser.add_argument("--salvar", metavar="ARQUIVO", help="Salva a página ao vivo (já rolada) e sai")
+    args = parser.parse_args()
+    if not args.salvar:
+        if not args.alvo:
+            parser.error("informe uma página salva (.html) ou a URL do Gafanho; "
+                         "para salvar uma página: --salvar ARQUIVO")
+        if not args.alvo.startswith("http") and not Path(args.alvo).is_file():
+            parser.error(f"página não encontrada: {args.alvo} (salve uma com --salvar {args.alvo})")
+    asyncio.run(rodar(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,11 @@
 import json
+import re
+import sqlite3
+import sys
 import statistics
+import time
+from array import array
+from bisect import bisect_left, bisect_right
 from pathlib import Path
 from datetime import datetime, timezone
 
@@ -7,11 +13,25 @@ from datetime import datetime, timezone
 # Configuração
 # ======================================================
 HISTORY_FILE = Path("data/history/prices.json")
+HISTORY_DB = Path("data/history/prices.sqlite")
 INBOX_FILE = Path("data/inbox/unified.json")
 
+BACKEND_PADRAO = "sqlite"
+
+# Janelas (em dias) das estatísticas recentes usadas no ranking
+JANELAS = (30, 90, 180)
+DIA = 86400
+
 def now_utc():
     return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
+def epoch(iso):
+    """ISO 8601 (com ou sem Z) -> segundos desde 1970; 0 se inválido"""
+    try:
+        return int(datetime.fromisoformat(str(iso).replace("Z", "+00:00")).timestamp())
+    except ValueError:
+        return 0
+
 def load_json(path):
     if not path.exists(): return {}
     try:
@@ -23,70 +43,597 @@ def save_json(path, data):
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
 
-def update_price_history():
+# ======================================================
+# Armazenamento do histórico
+# ======================================================
+# Interface comum aos backends:
+#   ultimo_preco(pid)               -> float | None
+#   registrar(pid, title, val, at)  -> anexa uma observação e atualiza os agregados (O(1))
+#   estatisticas(pid)               -> agregados do produto (ver agregar) | None
+#   janela(pid)                     -> array('d') da janela recente (ver janela_adicionar)
+#   serie(pid)                      -> lista de preços (ordem cronológica)
+#   reconstruir_estatisticas()      -> recalcula os agregados a partir das séries
+#   produtos()                      -> (pid, título, último registro) de cada produto
+#   mesclar(destino, origens, title)-> junta as séries de origens em destino
+#   total_produtos()
+#   salvar()                        -> persiste / fecha a transação
+
+def agregar(stats, val, at):
+    """Atualiza os agregados de um produto com uma observação nova"""
+    if not stats or not stats.get("qtd"):
+        return {"qtd": 1, "soma": val, "minimo": val, "maximo": val,
+                "ultimo": val, "primeiro_em": at, "ultimo_em": at}
+    stats["qtd"] += 1
+    stats["soma"] += val
+    stats["minimo"] = min(stats["minimo"], val)
+    stats["maximo"] = max(stats["maximo"], val)
+    stats["ultimo"] = val
+    stats["ultimo_em"] = at
+    return stats
+
+def agregar_serie(observacoes):
+    """Agregados de uma série inteira de (val, at)"""
+    stats = None
+    for val, at in observacoes:
+        stats = agregar(stats, val, at)
+    return stats
+
+# ------------------------------------------------------
+# Janela recente
+# ------------------------------------------------------
+# Por produto, só as observações dos últimos max(JANELAS) dias, num
+# array('d') intercalado [at, val, at, val, ...] (16 bytes por preço).
+# A última observação anterior ao corte fica: é o preço que valia no
+# começo da janela (o histórico só grava quando o preço muda).
+
+def janela_adicionar(buffer, val, at):
+    """Anexa (at em epoch, val) e descarta o que saiu da maior janela"""
+    buffer.extend((at, val))
+    corte = at - max(JANELAS) * DIA
+    i = 0
+    while i + 2 < len(buffer) and buffer[i + 2] <= corte:
+        i += 2
+    if i:
+        del buffer[:i]
+    return buffer
+
+def janela_serie(observacoes):
+    """Janela a partir de uma série inteira de (val, at em epoch)"""
+    buffer = array("d")
+    for val, at in observacoes:
+        janela_adicionar(buffer, val, at)
+    return buffer
+
+def estatisticas_janelas(buffer, preco, agora=None):
+    """
+    Para cada janela: menor preço, mediana e percentil do preço atual
+    (0 = mais barato que tudo na janela, 100 = mais caro).
+    """
+    agora = agora or time.time()
+    ats, vals = buffer[0::2], buffer[1::2]
+    resultado = {}
+    for dias in JANELAS:
+        corte = agora - dias * DIA
+        inicio = bisect_right(ats, corte)
+        # inclui o preço vigente no começo da janela
+        janela = sorted(vals[max(inicio - 1, 0):])
+        if not janela:
+            continue
+        abaixo = bisect_left(janela, preco)
+        iguais = bisect_right(janela, preco) - abaixo
+        resultado[dias] = {
+            "minimo": janela[0],
+            "mediana": statistics.median(janela),
+            "percentil": round(100 * (abaixo + iguais / 2) / len(janela), 1),
+        }
+    return resultado
+
+class HistoricoJSON:
+    """Formato antigo: o arquivo inteiro em memória, reescrito a cada execução"""
+
+    def __init__(self, caminho=HISTORY_FILE):
+        self.caminho = Path(caminho)
+        self.dados = load_json(self.caminho)
+
+    def _precos(self, pid):
+        entrada = self.dados.get(pid)
+        return entrada["prices"] if isinstance(entrada, dict) else []
+
+    def ultimo_preco(self, pid):
+        stats = self.estatisticas(pid)
+        return stats["ultimo"] if stats else None
+
+    def registrar(self, pid, title, val, at):
+        if not isinstance(self.dados.get(pid), dict):
+            self.dados[pid] = {
+                "title": title, # Guarda título para referência
+                "prices": []
+            }
+        entrada = self.dados[pid]
+        entrada["prices"].append({"val": val, "at": at})
+        if "stats" not in entrada and len(entrada["prices"]) > 1:
+            # Entrada anterior aos agregados: calcula uma vez
+            self._recalcular(entrada)
+        else:
+            entrada["stats"] = agregar(entrada.get("stats"), val, at)
+            entrada["janela"] = janela_adicionar(array("d", entrada.get("janela", [])), val, epoch(at)).tolist()
+
+    def _recalcular(self, entrada):
+        entrada["stats"] = agregar_serie((p["val"], p["at"]) for p in entrada["prices"])
+        entrada["janela"] = janela_serie((p["val"], epoch(p["at"])) for p in entrada["prices"]).tolist()
+
+    def estatisticas(self, pid):
+        entrada = self.dados.get(pid)
+        if not isinstance(entrada, dict) or not entrada.get("prices"):
+            return None
+        if "stats" not in entrada:
+            self._recalcular(entrada)
+        return entrada["stats"]
+
+    def janela(self, pid):
+        if not self.estatisticas(pid):
+            return array("d")
+        return array("d", self.dados[pid]["janela"])
+
+    def serie(self, pid):
+        return [p["val"] for p in self._precos(pid)]
+
+    def reconstruir_estatisticas(self):
+        total = 0
+        for entrada in self.dados.values():
+            if isinstance(entrada, dict) and entrada.get("prices"):
+                self._recalcular(entrada)
+                total += 1
+        return total
+
+    def produtos(self):
+        for pid, entrada in self.dados.items():
+            if isinstance(entrada, dict) and entrada.get("prices"):
+                yield pid, entrada.get("title"), entrada["prices"][-1]["at"]
+
+    def mesclar(self, destino, origens, title=None):
+        precos = list(self._precos(destino))
+        for pid in origens:
+            if pid != destino:
+                precos.extend(self._precos(pid))
+                self.dados.pop(pid, None)
+        precos.sort(key=lambda p: epoch(p["at"]))
+        entrada = self.dados.get(destino)
+        self.dados[destino] = {
+            "title": entrada["title"] if isinstance(entrada, dict) else title,
+            "prices": precos,
+        }
+        self._recalcular(self.dados[destino])
+
+    def total_produtos(self):
+        return len(self.dados)
+
+    def salvar(self):
+        save_json(self.caminho, self.dados)
+
+
+class HistoricoSQLite:
+    """
+    SQLite em modo WAL: cada preço novo é um INSERT (append-only), com índice
+    por produto. Nada é reescrito e só os produtos da inbox são consultados.
+    Os preços referenciam o produto por inteiro e guardam a data em epoch,
+    para o arquivo ficar pequeno.
+    """
+
+    COLUNAS_AGREGADOS = [
+        ("qtd", "INTEGER NOT NULL DEFAULT 0"),
+        ("soma", "REAL NOT NULL DEFAULT 0"),
+        ("minimo", "REAL"),
+        ("maximo", "REAL"),
+        ("ultimo", "REAL"),
+        ("primeiro_em", "INTEGER"),
+        ("ultimo_em", "INTEGER"),
+        ("janela", "BLOB"),
+    ]
+
+    def __init__(self, caminho=HISTORY_DB):
+        self.caminho = Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.caminho))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS produtos (
+                n INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                titulo TEXT,
+                qtd INTEGER NOT NULL DEFAULT 0,
+                soma REAL NOT NULL DEFAULT 0,
+                minimo REAL,
+                maximo REAL,
+                ultimo REAL,
+                primeiro_em INTEGER,
+                ultimo_em INTEGER,
+                janela BLOB
+            );
+            CREATE TABLE IF NOT EXISTS precos (
+                produto INTEGER NOT NULL,
+                val REAL NOT NULL,
+                at INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_precos_produto ON precos(produto);
+        """)
+        self._ids = {}
+
+        # Bancos criados antes dos agregados: adiciona as colunas e recalcula
+        colunas = {row[1] for row in self.conn.execute("PRAGMA table_info(produtos)")}
+        faltando = [(nome, tipo) for nome, tipo in self.COLUNAS_AGREGADOS if nome not in colunas]
+        for nome, tipo in faltando:
+            self.conn.execute(f"ALTER TABLE produtos ADD COLUMN {nome} {tipo}")
+        if faltando:
+            self.reconstruir_estatisticas()
+            self.conn.commit()
+
+    def _numero(self, pid, title=None, criar=False):
+        """Chave inteira do produto (cacheada); None se não existe e criar=False"""
+        n = self._ids.get(pid)
+        if n is None:
+            row = self.conn.execute("SELECT n FROM produtos WHERE id = ?", (pid,)).fetchone()
+            if row:
+                n = row[0]
+            elif criar:
+                n = self.conn.execute(
+                    "INSERT INTO produtos (id, titulo) VALUES (?, ?)", (pid, title)
+                ).lastrowid
+            else:
+                return None
+            self._ids[pid] = n
+        return n
+
+    def ultimo_preco(self, pid):
+        stats = self.estatisticas(pid)
+        return stats["ultimo"] if stats else None
+
+    def registrar(self, pid, title, val, at):
+        n = self._numero(pid, title, criar=True)
+        at = epoch(at)
+        self.conn.execute("INSERT INTO precos (produto, val, at) VALUES (?, ?, ?)", (n, val, at))
+        self.conn.execute("""
+            UPDATE produtos SET
+                qtd = qtd + 1,
+                soma = soma + :val,
+                minimo = MIN(COALESCE(minimo, :val), :val),
+                maximo = MAX(COALESCE(maximo, :val), :val),
+                ultimo = :val,
+                primeiro_em = COALESCE(primeiro_em, :at),
+                ultimo_em = :at
+            WHERE n = :n
+        """, {"val": val, "at": at, "n": n})
+        buffer = janela_adicionar(self._janela(n), val, at)
+        self.conn.execute("UPDATE produtos SET janela = ? WHERE n = ?", (buffer.tobytes(), n))
+
+    def registrar_serie(self, pid, title, observacoes):
+        """Grava várias observações (val, at) de uma vez — usado na migração"""
+        n = self._numero(pid, title, criar=True)
+        linhas = sorted(((val, epoch(at)) for val, at in observacoes), key=lambda linha: linha[1])
+        self.conn.executemany(
+            "INSERT INTO precos (produto, val, at) VALUES (?, ?, ?)",
+            [(n, val, at) for val, at in linhas]
+        )
+        stats = agregar_serie(linhas)
+        self.conn.execute("""
+            UPDATE produtos SET qtd = :qtd, soma = :soma, minimo = :minimo, maximo = :maximo,
+                ultimo = :ultimo, primeiro_em = :primeiro_em, ultimo_em = :ultimo_em,
+                janela = :janela
+            WHERE n = :n
+        """, {**stats, "janela": janela_serie(linhas).tobytes(), "n": n})
+
+    def _janela(self, n):
+        row = self.conn.execute("SELECT janela FROM produtos WHERE n = ?", (n,)).fetchone()
+        buffer = array("d")
+        if row and row[0]:
+            buffer.frombytes(row[0])
+        return buffer
+
+    def janela(self, pid):
+        n = self._numero(pid)
+        return self._janela(n) if n is not None else array("d")
+
+    def estatisticas(self, pid):
+        row = self.conn.execute(
+            "SELECT qtd, soma, minimo, maximo, ultimo, primeiro_em, ultimo_em FROM produtos WHERE id = ?",
+            (pid,)
+        ).fetchone()
+        if not row or not row[0]:
+            return None
+        return dict(zip(("qtd", "soma", "minimo", "maximo", "ultimo", "primeiro_em", "ultimo_em"), row))
+
+    def serie(self, pid):
+        n = self._numero(pid)
+        if n is None:
+            return []
+        rows = self.conn.execute(
+            "SELECT val FROM precos WHERE produto = ? ORDER BY at, rowid",
+            (n,)
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def reconstruir_estatisticas(self):
+        """
+        Recalcula os agregados de todos os produtos a partir da tabela precos.
+        A ordem é a da data (at) e só no empate a do rowid: séries migradas ou
+        mescladas não chegam à tabela em ordem cronológica.
+        """
+        self.conn.execute("""
+            UPDATE produtos SET qtd = 0, soma = 0, minimo = NULL, maximo = NULL,
+                ultimo = NULL, primeiro_em = NULL, ultimo_em = NULL
+        """)
+        linhas = self.conn.execute("""
+            SELECT a.qtd, a.soma, a.minimo, a.maximo, p.val, a.primeiro_em, p.at, a.produto
+            FROM (
+                SELECT produto, COUNT(*) AS qtd, SUM(val) AS soma, MIN(val) AS minimo,
+                       MAX(val) AS maximo, MIN(at) AS primeiro_em
+                FROM precos GROUP BY produto
+            ) AS a
+            JOIN precos AS p ON p.rowid = (
+                SELECT rowid FROM precos WHERE produto = a.produto
+                ORDER BY at DESC, rowid DESC LIMIT 1
+            )
+        """).fetchall()
+        self.conn.executemany("""
+            UPDATE produtos SET qtd = ?, soma = ?, minimo = ?, maximo = ?,
+                ultimo = ?, primeiro_em = ?, ultimo_em = ?
+            WHERE n = ?
+        """, linhas)
+
+        # Janelas: uma passada pela tabela, produto a produto
+        janelas = {}
+        for produto, val, at in self.conn.execute("SELECT produto, val, at FROM precos ORDER BY produto, at, rowid"):
+            janela_adicionar(janelas.setdefault(produto, array("d")), val, at)
+        self.conn.executemany(
+            "UPDATE produtos SET janela = ? WHERE n = ?",
+            [(buffer.tobytes(), n) for n, buffer in janelas.items()]
+        )
+        return len(linhas)
+
+    def produtos(self):
+        yield from self.conn.execute("SELECT id, titulo, ultimo_em FROM produtos")
+
+    def mesclar(self, destino, origens, title=None):
+        """
+        Move os preços das origens para o destino. Os rowids continuam os da
+        série de origem, então a série mesclada só fica em ordem pela data (at).
+        """
+        n_destino = self._numero(destino, title, criar=True)
+        for pid in origens:
+            n = self._numero(pid)
+            if n is None or n == n_destino:
+                continue
+            self.conn.execute("UPDATE precos SET produto = ? WHERE produto = ?", (n_destino, n))
+            self.conn.execute("DELETE FROM produtos WHERE n = ?", (n,))
+            self._ids.pop(pid, None)
+        # Agregados/janela do destino são refeitos por reconstruir_estatisticas()
+
+    def total_produtos(self):
+        return self.conn.execute("SELECT COUNT(*) FROM produtos").fetchone()[0]
+
+    def salvar(self):
+        self.conn.commit()
+        # Junta o WAL no arquivo principal (o .sqlite é versionado no git)
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.conn.close()
+
+
+BACKENDS = {"json": HistoricoJSON, "sqlite": HistoricoSQLite}
+
+# ======================================================
+# Migração do prices.json
+# ======================================================
+
+def entradas_json(data):
+    """
+    Lê os dois formatos que já existiram no prices.json:
+    - V1 (slug):  {"slug": [{"price": 10.0, "seen_at": "...", "source": "..."}]}
+    - V2 (ID):    {"gatry-123": {"title": "...", "prices": [{"val": 10.0, "at": "..."}]}}
+
+    Gera (pid, title, [(val, at), ...])
+    """
+    for pid, entrada in data.items():
+        if isinstance(entrada, list):
+            obs = [(p.get("price"), p.get("seen_at")) for p in entrada if isinstance(p, dict)]
+            title = None
+        elif isinstance(entrada, dict):
+            obs = [(p.get("val"), p.get("at")) for p in entrada.get("prices", []) if isinstance(p, dict)]
+            title = entrada.get("title")
+        else:
+            continue
+        obs = [(float(val), at or "") for val, at in obs if val is not None]
+        if obs:
+            yield pid, title, obs
+
+def migrar_json(origem=HISTORY_FILE, destino=None):
+    """Copia o prices.json para o SQLite. O JSON original não é alterado."""
+    origem = Path(origem)
+    if not origem.exists():
+        print(f"❌ {origem} não encontrado.")
+        return
+
+    historico = destino or HistoricoSQLite()
+    if historico.total_produtos():
+        print(f"⚠️ {historico.caminho} já tem dados; migração ignorada.")
+        return
+
+    print(f"🚚 Migrando {origem} -> {historico.caminho}...")
+    produtos = precos = 0
+    for pid, title, obs in entradas_json(load_json(origem)):
+        historico.registrar_serie(pid, title, obs)
+        produtos += 1
+        precos += len(obs)
+
+    if destino is None:
+        historico.salvar()
+    else:
+        historico.conn.commit()
+    print(f"✅ Migrados {produtos} produtos / {precos} preços.")
+
+def abrir_historico(backend=BACKEND_PADRAO):
+    if backend == "sqlite":
+        # Primeira execução com SQLite: importa o JSON existente
+        novo = not HISTORY_DB.exists()
+        historico = HistoricoSQLite(HISTORY_DB)
+        if novo and HISTORY_FILE.exists():
+            migrar_json(HISTORY_FILE, historico)
+        return historico
+    return BACKENDS[backend](HISTORY_FILE)
+
+# ======================================================
+# Migração: IDs de hash() -> IDs estáveis
+# ======================================================
+# Ofertas sem ID ganhavam "<fonte>-<abs(hash(url))>", que muda a cada
+# processo: a mesma oferta virava um produto novo no histórico a cada
+# execução. Agora o unify usa um hash da URL canônica. Aqui as entradas
+# antigas da mesma fonte e com o mesmo título são juntadas numa só — no ID
+# estável atual quando a oferta ainda está nos arquivos raw.
+RE_ID_HASH = re.compile(r"^([a-z_]+)-(\d{15,})$")
+
+def ids_estaveis_atuais():
+    """(fonte, título) -> ID estável das ofertas sem ID nos arquivos raw atuais"""
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+    from scripts.normalizers.unify import arquivos_raw, ler_raw, normalize_item
+
+    mapa = {}
+    for file in arquivos_raw():
+        for item in ler_raw(file) or []:
+            if item.get("id") or item.get("offerId"):
+                continue
+            norm = normalize_item(item, file.stem)
+            if norm:
+                mapa[(norm["source"], norm["title"].lower())] = norm["id"]
+    return mapa
+
+def mesclar_ids_hash(backend=BACKEND_PADRAO):
+    print("🔗 Juntando entradas do histórico com IDs de hash()...")
+    history = abrir_historico(backend)
+    mapa = ids_estaveis_atuais()
+
+    grupos = {}
+    for pid, titulo, ultimo_em in history.produtos():
+        m = RE_ID_HASH.match(pid)
+        if not m or not titulo:
+            continue  # sem título não dá para saber se é a mesma oferta
+        grupos.setdefault((m.group(1), titulo.strip().lower()), []).append((ultimo_em or 0, pid, titulo))
+
+    entradas = produtos = 0
+    for chave, membros in grupos.items():
+        membros.sort()
+        destino = mapa.get(chave) or membros[-1][1]
+        origens = [pid for _, pid, _ in membros if pid != destino]
+        if not origens:
+            continue
+        history.mesclar(destino, origens, membros[-1][2])
+        entradas += len(origens)
+        produtos += 1
+
+    history.reconstruir_estatisticas()
+    history.salvar()
+    print(f"✅ {entradas} entradas juntadas em {produtos} produtos.")
+
+# ======================================================
+# Atualização
+# ======================================================
+
+def reconstruir_estatisticas(backend=BACKEND_PADRAO):
+    print("🧮 Reconstruindo estatísticas do histórico...")
+    history = abrir_historico(backend)
+    total = history.reconstruir_estatisticas()
+    history.salvar()
+    print(f"✅ Estatísticas recalculadas para {total} produtos.")
+
+def update_price_history(backend=BACKEND_PADRAO, items=None, salvar=True):
+    """
+    Registra os preços da inbox e enriquece os itens com o histórico.
+
+    items: lista de ofertas já em memória (senão lê o unified.json)
+    salvar: grava os itens enriquecidos de volta no unified.json
+    Retorna a lista enriquecida.
+    """
     print("⏳ Atualizando histórico de preços...")
-    
-    # Carrega histórico existente (Chave = ID do produto)
-    history = load_json(HISTORY_FILE)
-    
+
     # Carrega itens novos
-    if not INBOX_FILE.exists():
-        print("❌ Arquivo inbox/unified.json não encontrado.")
-        return
-        
-    items = json.loads(INBOX_FILE.read_text(encoding="utf-8"))
-    
+    if items is None:
+        if not INBOX_FILE.exists():
+            print("❌ Arquivo inbox/unified.json não encontrado.")
+            return []
+        items = json.loads(INBOX_FILE.read_text(encoding="utf-8"))
+
+    # Histórico (Chave = ID do produto)
+    history = abrir_historico(backend)
+
     updated_items = []
     stats_added = 0
-    
+
     for item in items:
         pid = item.get("id")
         price = item.get("price")
-        
+
         if not pid or price is None:
             continue
-            
-        # Garante que temos histórico para este ID
-        if pid not in history:
-            history[pid] = {
-                "title": item.get("title"), # Guarda título para referência
-                "prices": []
-            }
-            
-        # Adiciona preço se for novo ou se mudou
-        prices_list = history[pid]["prices"]
-        
+
         # Só adiciona se o último preço registrado for diferente
-        # ou se a lista estiver vazia (primeira vez)
-        if not prices_list or prices_list[-1]["val"] != price:
-            prices_list.append({
-                "val": float(price),
-                "at": now_utc()
-            })
+        # ou se não houver histórico (primeira vez)
+        ultimo = history.ultimo_preco(pid)
+        if ultimo is None or ultimo != price:
+            history.registrar(pid, item.get("title"), float(price), now_utc())
             stats_added += 1
-            
+
         # --- ENRIQUECIMENTO ---
-        # Calcula estatísticas e injeta no item atual para o Ranking usar
-        vals = [p["val"] for p in prices_list]
-        item["history_min"] = min(vals)
-        item["history_max"] = max(vals)
-        item["history_avg"] = statistics.mean(vals)
-        item["history_count"] = len(vals)
-        
+        # Agregados mantidos a cada registro: nada de percorrer a série inteira
+        stats = history.estatisticas(pid)
+        item["history_min"] = stats["minimo"]
+        item["history_max"] = stats["maximo"]
+        item["history_avg"] = stats["soma"] / stats["qtd"]
+        item["history_count"] = stats["qtd"]
+
+        # Janelas recentes (30/90/180 dias): só o buffer compacto do produto
+        for dias, janela in estatisticas_janelas(history.janela(pid), float(price)).items():
+            item[f"history_min_{dias}d"] = janela["minimo"]
+            item[f"history_median_{dias}d"] = janela["mediana"]
+            item[f"history_percentile_{dias}d"] = janela["percentil"]
+
         # Flag: É o menor preço histórico?
         item["is_lowest_price"] = (price <= item["history_min"])
-        
+
         updated_items.append(item)
 
+    total = history.total_produtos()
+
     # Salva histórico atualizado
-    save_json(HISTORY_FILE, history)
-    
+    history.salvar()
+
     # Salva itens enriquecidos de volta no inbox (para o Ranking usar)
-    save_json(INBOX_FILE, updated_items)
-    
-    print(f"📊 Histórico: {len(history)} produtos rastreados.")
+    if salvar:
+        save_json(INBOX_FILE, updated_items)
+
+    print(f"📊 Histórico: {total} produtos rastreados.")
     print(f"📈 Atualizações: {stats_added} novos preços registrados.")
-    print(f"✅ Arquivo {INBOX_FILE} enriquecido com dados históricos.")
+    if salvar:
+        print(f"✅ Arquivo {INBOX_FILE} enriquecido com dados históricos.")
+    return updated_items
 
 if __name__ == "__main__":
-    update_price_history()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Histórico de preços dos itens da inbox")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=BACKEND_PADRAO,
+                        help=f"Armazenamento do histórico (padrão: {BACKEND_PADRAO})")
+    parser.add_argument("--migrar", action="store_true",
+                        help=f"Só migra {HISTORY_FILE} para {HISTORY_DB} e sai")
+    parser.add_argument("--reconstruir-estatisticas", action="store_true",
+                        help="Recalcula min/max/média/contagem e as janelas de todos os produtos a partir das séries e sai")
+    parser.add_argument("--mesclar-ids-hash", action="store_true",
+                        help="Junta as entradas duplicadas criadas pelos IDs antigos de hash(url) e sai")
+    args = parser.parse_args()
+
+    if args.migrar:
+        migrar_json()
+    elif args.mesclar_ids_hash:
+        mesclar_ids_hash(backend=args.backend)
+    elif args.reconstruir_estatisticas:
+        reconstruir_estatisticas(backend=args.backend)
+    else:
+        update_price_history(backend=args.backend)
@@ -19,12 +19,16 @@ Observação:
 
 import json
 import re
+import sys
 from pathlib import Path
 
 import requests
 
 from ml_oauth import get_access_token, API_BASE
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from scripts.utils.links import resolver_link
+
 
 MAX_DEPTH = 6
 DEBUG_DIR = Path(".")
@@ -61,11 +65,11 @@ def extrair_alvo(url_or_id: str):
         return ("item", f"MLB{m.group(2)}")
 
     if "/sec/" in s:
-        try:
-            r = requests.get(s, headers={"User-Agent": "Mozilla/5.0"}, allow_redirects=True, timeout=15)
-            return extrair_alvo(r.url)
-        except Exception:
+        # Link curto: destino fica em cache (data/cache/links.sqlite)
+        url_final, _ = resolver_link(s, metodo="GET", headers={"User-Agent": "Mozilla/5.0"}, timeout=15)
+        if not url_final or "/sec/" in url_final:
             return (None, None)
+        return extrair_alvo(url_final)
 
     return (None, None)
 
@@ -1,11 +1,20 @@
 from pathlib import Path
 import json
 import re
+import sys
+import hashlib
 from datetime import datetime, timezone, timedelta
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from scripts.utils.deduplicator import dedupe
+from scripts.utils.links import id_estavel
+
 # --- Configuração ---
 RAW_DIR = Path("data/raw")
 OUT = Path("data/inbox/unified.json")
+STATE_FILE = Path("data/cache/unify_state.json")
+# Sobe quando normalize_item muda de saída: descarta os itens em cache do modo incremental
+VERSAO_NORMALIZACAO = 2
 TZ_BR = timezone(timedelta(hours=-3))
 
 def parse_price(text):
@@ -62,7 +71,8 @@ def normalize_item(item, source):
     # 6. ID UNIVERSAL
     raw_id = str(item.get("id") or item.get("offerId") or "")
     if not raw_id:
-        raw_id = str(abs(hash(url)))
+        # Hash da URL canônica: o mesmo em toda execução (hash() do Python não é)
+        raw_id = id_estavel(str(url))
 
     # Garante prefixo único (ex: gatry-123)
     prefix = f"{source}-"
@@ -80,59 +90,209 @@ def normalize_item(item, source):
         "raw": item
     }
 
-def main():
-    print("🔄 Iniciando Unificação V4 (Universal)...")
+def ler_raw(file):
+    """Lê um arquivo raw (lista JSON). Retorna None se vazio/inválido."""
+    try:
+        content = file.read_text(encoding="utf-8")
+        if not content.strip(): return None
+        data = json.loads(content)
+    except:
+        print("❌ Erro ao ler JSON.")
+        return None
+    return data if isinstance(data, list) else None
+
+def normalizar_lista(data, source):
+    """Normaliza os itens de um arquivo raw (ignora itens inválidos)"""
+    normalizados = []
+    for item in data:
+        try:
+            norm = normalize_item(item, source)
+            if norm: normalizados.append(norm)
+        except: continue
+    return normalizados
+
+def montar_unificado(listas):
+    """Junta as listas normalizadas (na ordem dos arquivos), sem IDs repetidos"""
     unified = []
     ids_vistos = set()
+    for normalizados in listas:
+        for norm in normalizados:
+            # Deduplicação
+            if norm['id'] in ids_vistos: continue
+            unified.append(norm)
+            ids_vistos.add(norm['id'])
 
-    if not RAW_DIR.exists():
-        print(f"❌ Pasta {RAW_DIR} não existe!")
-        return
+    # Ordena pelo mais recente
+    unified.sort(key=lambda x: x['collected_at'], reverse=True)
+    return unified
+
+def salvar_unificado(unified):
+    OUT.parent.mkdir(parents=True, exist_ok=True)
+    OUT.write_text(json.dumps(unified, ensure_ascii=False, indent=2), encoding="utf-8")
 
+def arquivos_raw():
     # Ignora arquivos de debug
-    arquivos = [f for f in sorted(RAW_DIR.glob("*.json")) if "debug" not in f.name]
+    return [f for f in sorted(RAW_DIR.glob("*.json")) if "debug" not in f.name]
 
-    for file in arquivos:
+def unificar():
+    """Unificação completa: renormaliza todos os arquivos raw"""
+    listas = []
+    for file in arquivos_raw():
         source = file.stem 
         print(f"   📂 Lendo: {file.name}...", end=" ")
-        
-        try:
-            content = file.read_text(encoding="utf-8")
-            if not content.strip(): continue
-            data = json.loads(content)
-        except:
-            print("❌ Erro ao ler JSON.")
+        data = ler_raw(file)
+        if data is None:
+            print()
+            continue
+        normalizados = normalizar_lista(data, source)
+        listas.append(normalizados)
+        print(f"✅ {len(normalizados)} itens recuperados.")
+    return montar_unificado(listas)
+
+# ======================================================
+# Modo incremental
+# ======================================================
+# Guarda, por arquivo raw, mtime/tamanho/hash e a impressão digital de cada
+# item já normalizado. Só itens novos ou alterados passam por normalize_item.
+
+def fingerprint(obj):
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def carregar_estado():
+    vazio = {"versao": VERSAO_NORMALIZACAO, "arquivos": {}}
+    if not STATE_FILE.exists(): return vazio
+    try:
+        estado = json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    except:
+        return vazio
+    return estado if estado.get("versao") == VERSAO_NORMALIZACAO else vazio
+
+def salvar_estado(estado):
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    STATE_FILE.write_text(json.dumps(estado, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+
+def unificar_incremental(salvar=True):
+    """
+    Unificação incremental. Retorna (unified, em_dia) — em_dia=True quando
+    nenhum arquivo raw mudou e o unified.json gravado continua valendo.
+
+    salvar: se o chamador vai gravar o unified.json (False no pipeline em
+    memória sem checkpoints; aí a próxima execução não pode pular a escrita).
+    """
+    estado = carregar_estado()
+    anteriores = estado.get("arquivos", {})
+    atuais = {}
+    mudou = False
+    novos_total = 0
+
+    for file in arquivos_raw():
+        source = file.stem
+        st = file.stat()
+        anterior = anteriores.get(file.name)
+
+        # 1. mtime + tamanho iguais: nem lê o arquivo
+        if anterior and anterior["mtime"] == st.st_mtime and anterior["tamanho"] == st.st_size:
+            atuais[file.name] = anterior
             continue
 
-        if not isinstance(data, list): continue
+        print(f"   📂 Lendo: {file.name}...", end=" ")
+        content = file.read_bytes()
+        hash_arquivo = hashlib.sha1(content).hexdigest()
+
+        # 2. Conteúdo idêntico (só o mtime mudou)
+        if anterior and anterior["hash"] == hash_arquivo:
+            atuais[file.name] = dict(anterior, mtime=st.st_mtime)
+            print("⏸️ sem alterações.")
+            continue
 
-        count_local = 0
+        mudou = True
+        data = ler_raw(file)
+        if data is None:
+            print()
+            continue
+
+        # 3. Normaliza só os itens com impressão digital nova
+        cache_itens = (anterior or {}).get("itens", {})
+        itens = []
+        novos = 0
         for item in data:
-            try:
-                norm = normalize_item(item, source)
-                if not norm: continue
-                
-                # Deduplicação
-                if norm['id'] in ids_vistos: continue
-                
-                # Filtro opcional: Se quiser ignorar itens sem preço REAL
-                if norm['price'] == 0 and source != "promobit": # Promobit as vezes tem grátis válido
-                     pass 
-                
-                unified.append(norm)
-                ids_vistos.add(norm['id'])
-                count_local += 1
-            except: continue
-        
-        print(f"✅ {count_local} itens recuperados.")
+            fp = fingerprint(item)
+            norm = cache_itens.get(fp)
+            if norm is None:
+                try:
+                    norm = normalize_item(item, source)
+                except:
+                    norm = None
+                novos += 1
+            if norm:
+                itens.append((fp, norm))
 
-    # Ordena pelo mais recente
-    unified.sort(key=lambda x: x['collected_at'], reverse=True)
-    
-    OUT.parent.mkdir(parents=True, exist_ok=True)
-    OUT.write_text(json.dumps(unified, ensure_ascii=False, indent=2), encoding="utf-8")
+        atuais[file.name] = {
+            "mtime": st.st_mtime,
+            "tamanho": st.st_size,
+            "hash": hash_arquivo,
+            "ordem": [fp for fp, _ in itens],
+            "itens": dict(itens),
+        }
+        novos_total += novos
+        print(f"✅ {len(itens)} itens ({novos} novos/alterados).")
+
+    if set(atuais) != set(anteriores):
+        mudou = True
+
+    listas = [[arq["itens"][fp] for fp in arq.get("ordem", [])] for _, arq in sorted(atuais.items())]
+    unified = montar_unificado(listas)
 
-    print(f"\n🎉 Resultado Final: {len(unified)} ofertas em {OUT}")
+    em_dia = not mudou and estado.get("saida_em_dia", False) and OUT.exists()
+
+    estado["arquivos"] = atuais
+    estado["saida_em_dia"] = salvar or em_dia
+    salvar_estado(estado)
+
+    print(f"   🧮 {novos_total} itens normalizados nesta execução.")
+    return unified, em_dia
+
+def main(incremental=False, deduplicar=False, salvar=True):
+    """
+    Unifica os arquivos raw e retorna a lista de ofertas.
+    salvar=False não grava o unified.json (pipeline em memória).
+    """
+    print("🔄 Iniciando Unificação V4 (Universal)...")
+
+    if not RAW_DIR.exists():
+        print(f"❌ Pasta {RAW_DIR} não existe!")
+        return []
+
+    em_dia = False
+    if incremental:
+        unified, em_dia = unificar_incremental(salvar)
+    else:
+        unified = unificar()
+
+    if deduplicar:
+        total = len(unified)
+        unified = dedupe(unified)
+        print(f"   🧹 Duplicatas entre fontes removidas: {total - len(unified)}")
+
+    if em_dia:
+        print(f"\n⏸️ Nenhum arquivo raw mudou: {OUT} mantido ({len(unified)} ofertas)")
+        return unified
+
+    if salvar:
+        salvar_unificado(unified)
+        print(f"\n🎉 Resultado Final: {len(unified)} ofertas em {OUT}")
+    else:
+        print(f"\n🎉 Resultado Final: {len(unified)} ofertas")
+    return unified
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Unificação dos arquivos raw em data/inbox/unified.json")
+    parser.add_argument("--incremental", "-i", action="store_true",
+                        help="Só renormaliza arquivos/itens que mudaram desde a última execução")
+    parser.add_argument("--dedupe", "-d", action="store_true",
+                        help="Remove a mesma oferta vinda de fontes diferentes (mantém a mais recente)")
+    args = parser.parse_args()
+
+    main(incremental=args.incremental, deduplicar=args.dedupe)
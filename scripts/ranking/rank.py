@@ -1,10 +1,18 @@
 import json
+import sys
 from pathlib import Path
 from datetime import datetime, timezone
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from scripts.utils.aho_corasick import AhoCorasick
+
 INBOX_FILE = Path("data/inbox/unified.json")
 OUT_FILE = Path("data/inbox/ranked.json")
 
+# Listas de palavras opcionais (substituem as de baixo, chave a chave):
+# {"allowed_stores": [...], "blocklist": [...], "interests": [["rtx", 50], ...]}
+CONFIG_FILE = Path("data/config/ranking.json")
+
 # ======================================================
 # 🔒 Lista de Lojas Permitidas (Suas Afiliações)
 # ======================================================
@@ -38,6 +46,18 @@ INTERESTS = [
     ("air fryer", 20), ("fritadeira", 20)
 ]
 
+# Menor preço histórico: só vale com mais de uma observação (na primeira
+# vez que um produto aparece, qualquer preço é o "menor")
+LOWEST_PRICE_POINTS = 30
+# "💎 Top": 30 pontos acima da base (50), vindos de palavra-chave, menor
+# preço real ou desconto. Antes todo item novo chegava a 80 só pelo bônus de
+# menor preço; nos dados atuais (history_count = 1 em todos) ficam 21 de 203.
+TOP_SCORE = 80
+
+# Desconto real: preço atual vs mediana dos últimos 90 dias
+DISCOUNT_POINTS_MAX = 40     # teto do bônus
+DISCOUNT_MIN_TAG = 0.10      # a partir de 10% abaixo da mediana vira tag
+
 def load_json(path):
     if not path.exists(): return []
     try:
@@ -45,35 +65,86 @@ def load_json(path):
     except:
         return []
 
-def calculate_score(item):
+# ======================================================
+# Buscadores (montados uma vez por execução)
+# ======================================================
+_matchers = None
+
+def load_keywords(path=CONFIG_FILE):
+    """Listas do arquivo de config, caindo nas listas do código"""
+    config = {}
+    if path.exists():
+        try:
+            config = json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"⚠️ Config de ranking inválida ({path}): {e}")
+    return (
+        config.get("allowed_stores", ALLOWED_STORES),
+        config.get("blocklist", BLOCKLIST),
+        [tuple(i) for i in config.get("interests", INTERESTS)],
+    )
+
+def matchers():
+    """(lojas, título): um autômato para a loja e um para blocklist + interesses"""
+    global _matchers
+    if _matchers is None:
+        stores, blocklist, interests = load_keywords()
+        store_matcher = AhoCorasick(stores).compilar()
+        title_matcher = AhoCorasick(
+            [(w, ("block", 0)) for w in blocklist]
+            + [(w, ("interest", pts)) for w, pts in interests]
+        ).compilar()
+        _matchers = (store_matcher, title_matcher)
+    return _matchers
+
+def store_allowed(item):
+    return matchers()[0].contem(str(item.get("store", "")))
+
+def is_real_lowest_price(item):
+    return bool(item.get("is_lowest_price")) and item.get("history_count", 0) > 1
+
+def real_discount(item):
+    """Quanto o preço atual está abaixo da mediana de 90 dias (0.25 = 25%); 0 se não está"""
+    median = item.get("history_median_90d")
+    price = item.get("price") or 0
+    if not median or not price or price >= median:
+        return 0.0
+    return (median - price) / median
+
+def calculate_score(item, check_store=True):
     score = 0
-    title = str(item.get("title", "")).lower()
-    store = str(item.get("store", "")).lower()
+    title = str(item.get("title", ""))
     price = item.get("price", 0)
 
     # 1. Filtro de Loja Permitida (CRÍTICO)
     # Se a loja não estiver na lista permitida, tchau.
-    if not any(loja in store for loja in ALLOWED_STORES):
+    if check_store and not store_allowed(item):
         # Debug: Pode descomentar para ver o que está perdendo
-        # print(f"🚫 Loja não afiliada: {store}")
+        # print(f"🚫 Loja não afiliada: {item.get('store')}")
         return -1
 
+    # 2 e 4. Uma passada no título: palavras banidas e palavras-chave
+    hits = {(word, kind, points) for _, word, (kind, points) in matchers()[1].buscar(title)}
+
     # 2. Filtro de Palavras Banidas
-    for bad_word in BLOCKLIST:
-        if bad_word in title:
-            return -1
+    if any(kind == "block" for _, kind, _ in hits):
+        return -1
 
     # 3. Pontuação Base
     score = 50 # Começa com 50 se passou nos filtros
 
-    # 4. Bônus por Palavras-Chave
-    for keyword, points in INTERESTS:
-        if keyword in title:
-            score += points
+    # 4. Bônus por Palavras-Chave (cada palavra conta uma vez)
+    score += sum(points for _, kind, points in hits if kind == "interest")
 
     # 5. Bônus por Menor Preço Histórico (Se disponível)
-    if item.get("is_lowest_price"):
-        score += 30
+    # Com uma única observação todo item é o "menor preço": só conta com histórico
+    if is_real_lowest_price(item):
+        score += LOWEST_PRICE_POINTS
+
+    # 5b. Desconto real contra a mediana de 90 dias (1 ponto por % abaixo)
+    discount = real_discount(item)
+    if discount > 0:
+        score += min(DISCOUNT_POINTS_MAX, round(discount * 100))
     
     # 6. Penalidade para preços muito baixos (provável erro ou acessório não filtrado)
     if price < 10: 
@@ -81,9 +152,14 @@ def calculate_score(item):
     
     return score
 
-def rank_offers():
+def rank_offers(items=None, salvar=True):
+    """
+    Pontua e ordena as ofertas. items: lista em memória (senão lê o
+    unified.json); salvar: grava o ranked.json. Retorna a lista ranqueada.
+    """
     print("⚖️  Iniciando Ranking (Filtro de Afiliação Ativo)...")
-    items = load_json(INBOX_FILE)
+    if items is None:
+        items = load_json(INBOX_FILE)
     
     ranked_items = []
     rejected_store = 0
@@ -91,12 +167,11 @@ def rank_offers():
 
     for item in items:
         # Verifica loja antes de tudo para estatística
-        store_lower = str(item.get("store", "")).lower()
-        if not any(loja in store_lower for loja in ALLOWED_STORES):
+        if not store_allowed(item):
             rejected_store += 1
             continue
 
-        score = calculate_score(item)
+        score = calculate_score(item, check_store=False)
         
         if score < 0:
             rejected_block += 1
@@ -106,8 +181,10 @@ def rank_offers():
         
         # Tags Visuais
         tags = []
-        if item.get("is_lowest_price"): tags.append("🔥 Menor Preço")
-        if score >= 80: tags.append("💎 Top")
+        if is_real_lowest_price(item): tags.append("🔥 Menor Preço")
+        discount = real_discount(item)
+        if discount >= DISCOUNT_MIN_TAG: tags.append(f"📉 -{round(discount * 100)}% vs 90 dias")
+        if score >= TOP_SCORE: tags.append("💎 Top")
         item["tags"] = tags
         
         ranked_items.append(item)
@@ -116,13 +193,15 @@ def rank_offers():
     ranked_items.sort(key=lambda x: (x["score"], -x["price"]), reverse=True)
 
     # Salva
-    OUT_FILE.parent.mkdir(parents=True, exist_ok=True)
-    OUT_FILE.write_text(json.dumps(ranked_items, ensure_ascii=False, indent=2), encoding="utf-8")
+    if salvar:
+        OUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+        OUT_FILE.write_text(json.dumps(ranked_items, ensure_ascii=False, indent=2), encoding="utf-8")
 
     print(f"📊 Total Entrada: {len(items)}")
     print(f"🚫 Rejeitados (Loja não afiliada): {rejected_store}")
     print(f"🗑️ Rejeitados (Blocklist/Lixo): {rejected_block}")
     print(f"✅ Aprovados para Rascunho: {len(ranked_items)}")
+    return ranked_items
 
 if __name__ == "__main__":
     rank_offers()
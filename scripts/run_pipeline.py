@@ -1,8 +1,11 @@
 # scripts/run_pipeline.py
+import hashlib
+import json
 import subprocess
 import sys
 import os
 import time
+from datetime import date
 from pathlib import Path
 
 # --------------------------------------------------
@@ -11,6 +14,9 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]
 PYTHON = sys.executable
 
+# Permite "from scripts.x import y" rodando como script
+sys.path.insert(0, str(ROOT))
+
 def p(*parts):
     return str(ROOT.joinpath(*parts))
 
@@ -36,21 +42,160 @@ def run_step(label, command, cwd=None):
     print(f"✅ Etapa concluída: {label}")
     time.sleep(1)
 
+def run_stage(label, func, *args, **kwargs):
+    print(f"\n▶️  {label}")
+    inicio = time.perf_counter()
+    resultado = func(*args, **kwargs)
+    print(f"✅ Etapa concluída: {label} ({time.perf_counter() - inicio:.2f}s)")
+    return resultado
+
+# --------------------------------------------------
+# DAG com cache por impressão digital
+# --------------------------------------------------
+# Cada etapa declara o que lê: arquivos de entrada, o próprio código, as
+# etapas anteriores e parâmetros. A impressão digital junta tudo isso (e a
+# das etapas de que depende); se bater com a da última execução e as saídas
+# existirem, a etapa é pulada e a saída guardada em cache é reaproveitada.
+# Arquivos que a etapa lê e também grava (o histórico de preços) entram como
+# `estado`: a impressão guardada é a de depois da execução, então só uma
+# mudança feita fora da etapa (migração, mesclagem, correção manual) a
+# faz rodar de novo.
+CACHE_DIR = ROOT / "data" / "cache" / "pipeline"
+MANIFESTO = CACHE_DIR / "manifesto.json"
+
+class Etapa:
+    def __init__(self, nome, label, executar, depende=(), entradas=(), codigo=(), extras=None, saidas=(), estado=()):
+        self.nome = nome
+        self.label = label
+        self.executar = executar      # recebe as saídas de `depende`, na ordem
+        self.depende = list(depende)  # nomes de etapas anteriores
+        self.entradas = list(entradas)  # globs relativos à raiz
+        self.codigo = list(codigo)    # arquivos .py que definem a etapa
+        self.extras = extras or {}    # parâmetros que mudam o resultado
+        self.saidas = list(saidas)    # arquivos que a etapa precisa deixar no disco
+        self.estado = list(estado)    # globs lidos e regravados pela própria etapa
+
+def hash_arquivo(caminho):
+    return hashlib.sha1(caminho.read_bytes()).hexdigest()
+
+def impressao_digital(etapa, anteriores):
+    h = hashlib.sha256(etapa.nome.encode())
+    for rel in etapa.codigo:
+        h.update(f"codigo:{rel}:{hash_arquivo(ROOT / rel)}".encode())
+    for tipo, padroes in (("entrada", etapa.entradas), ("estado", etapa.estado)):
+        for padrao in padroes:
+            for arquivo in sorted(ROOT.glob(padrao)):
+                h.update(f"{tipo}:{arquivo.relative_to(ROOT)}:{hash_arquivo(arquivo)}".encode())
+    for dep in etapa.depende:
+        h.update(f"depende:{dep}:{anteriores[dep]}".encode())
+    h.update(json.dumps(etapa.extras, sort_keys=True).encode())
+    return h.hexdigest()
+
+def executar_dag(etapas, forcar=False):
+    """Roda as etapas (já em ordem topológica), pulando as que não mudaram"""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    try:
+        manifesto = json.loads(MANIFESTO.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        manifesto = {}
+
+    digitais = {}
+    saidas = {}
+
+    def saida(nome):
+        # Saída de etapa pulada: só é lida do cache se alguém precisar dela
+        if nome not in saidas:
+            saidas[nome] = json.loads((CACHE_DIR / f"{nome}.json").read_text(encoding="utf-8"))
+        return saidas[nome]
+
+    for etapa in etapas:
+        digital = digitais[etapa.nome] = impressao_digital(etapa, digitais)
+        cache = CACHE_DIR / f"{etapa.nome}.json"
+
+        em_dia = (
+            not forcar
+            and manifesto.get(etapa.nome) == digital
+            and cache.exists()
+            and all((ROOT / s).exists() for s in etapa.saidas)
+        )
+        if em_dia:
+            print(f"\n⏭️  {etapa.label}: entradas sem mudança, usando cache")
+            continue
+
+        resultado = run_stage(etapa.label, etapa.executar, *[saida(d) for d in etapa.depende])
+        saidas[etapa.nome] = resultado
+        if etapa.estado:
+            # O estado mudou ao rodar: vale a impressão do estado já atualizado
+            digital = digitais[etapa.nome] = impressao_digital(etapa, digitais)
+        cache.write_text(json.dumps(resultado, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+
+        # Grava a cada etapa: se a seguinte falhar, esta continua valendo
+        manifesto[etapa.nome] = digital
+        MANIFESTO.write_text(json.dumps(manifesto, indent=2), encoding="utf-8")
+
 # --------------------------------------------------
 # Pipeline
 # --------------------------------------------------
-def main():
-    print("🚀 Iniciando pipeline Modo 3")
-    print(f"📂 Root do projeto: {ROOT}")
-    
-    # Mudar para a raiz do projeto
-    os.chdir(ROOT)
-    print(f"📍 Diretório atual: {os.getcwd()}")
-    
+def etapas_pipeline(checkpoints=False):
+    """
+    As etapas rodam no mesmo processo, passando a lista de ofertas em memória.
+    Só o rascunhos.json é sempre gravado; unified.json e ranked.json só com
+    checkpoints=True (o Editorial/cli.py lê o ranked.json).
+    """
+    from scripts.normalizers.unify import main as unify
+    from scripts.history.price_history import update_price_history
+    from scripts.ranking.rank import rank_offers
+    from scripts.Editorial.apply_threshold import apply_threshold
+
+    def checkpoint(arquivo):
+        return [arquivo] if checkpoints else []
+
+    return [
+        Etapa(
+            "unify", "Unificação de dados",
+            lambda: unify(incremental=True, deduplicar=True, salvar=checkpoints),
+            entradas=["data/raw/*.json"],
+            codigo=["scripts/normalizers/unify.py", "scripts/utils/deduplicator.py", "scripts/utils/links.py"],
+            extras={"checkpoints": checkpoints},
+            saidas=checkpoint("data/inbox/unified.json"),
+        ),
+        Etapa(
+            "historico", "Atualização de histórico de preços",
+            lambda ofertas: update_price_history(items=ofertas, salvar=checkpoints),
+            depende=["unify"],
+            codigo=["scripts/history/price_history.py"],
+            # As janelas de 30/90/180 dias mudam com a data, mesmo sem preço novo
+            extras={"checkpoints": checkpoints, "dia": date.today().isoformat()},
+            saidas=checkpoint("data/inbox/unified.json"),
+            estado=["data/history/prices.sqlite", "data/history/prices.json"],
+        ),
+        Etapa(
+            "ranking", "Ranking editorial",
+            lambda ofertas: rank_offers(items=ofertas, salvar=checkpoints),
+            depende=["historico"],
+            entradas=["data/config/ranking.json"],
+            codigo=["scripts/ranking/rank.py", "scripts/utils/aho_corasick.py"],
+            extras={"checkpoints": checkpoints},
+            saidas=checkpoint("data/inbox/ranked.json"),
+        ),
+        Etapa(
+            "rascunhos", "Aplicação do limiar editorial (Modo 3)",
+            lambda ranking: apply_threshold(ranked=ranking),
+            depende=["ranking"],
+            codigo=["scripts/Editorial/apply_threshold.py"],
+            saidas=["data/inbox/rascunhos.json"],
+        ),
+    ]
+
+def pipeline_em_memoria(checkpoints=False, forcar=False):
+    executar_dag(etapas_pipeline(checkpoints), forcar=forcar)
+
+def pipeline_subprocess():
+    """Modo antigo: um interpretador por etapa, comunicando por arquivos"""
     steps = [
         (
             "Unificação de dados",
-            [PYTHON, p("scripts", "normalizers", "unify.py")]
+            [PYTHON, p("scripts", "normalizers", "unify.py"), "--incremental", "--dedupe"]
         ),
         (
             "Atualização de histórico de preços",
@@ -62,19 +207,45 @@ def main():
         ),
         (
             "Aplicação do limiar editorial (Modo 3)",
-            [PYTHON, p("scripts", "editorial", "apply_threshold.py")]
+            [PYTHON, p("scripts", "Editorial", "apply_threshold.py")]
         ),
     ]
     
     for label, command in steps:
         run_step(label, command)
+
+def main(modo_subprocess=False, checkpoints=False, forcar=False):
+    print("🚀 Iniciando pipeline Modo 3")
+    print(f"📂 Root do projeto: {ROOT}")
+    
+    # Mudar para a raiz do projeto
+    os.chdir(ROOT)
+    print(f"📍 Diretório atual: {os.getcwd()}")
+
+    inicio = time.perf_counter()
+    if modo_subprocess:
+        pipeline_subprocess()
+    else:
+        pipeline_em_memoria(checkpoints, forcar)
     
     print("\n" + "=" * 50)
     print("🎉 Pipeline finalizado com sucesso!")
     print("=" * 50)
+    print(f"⏱️ Tempo total: {time.perf_counter() - inicio:.2f}s")
     print("\n📄 Arquivo pronto para upload:")
     print(f"   → {p('data', 'inbox', 'rascunhos.json')}")
     print("\n💡 Próximo passo: upload para o Hostinger")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pipeline Modo 3: unify -> histórico -> ranking -> rascunhos")
+    parser.add_argument("--checkpoints", action="store_true",
+                        help="Também grava unified.json e ranked.json entre as etapas")
+    parser.add_argument("--subprocess", dest="modo_subprocess", action="store_true",
+                        help="Modo antigo: cada etapa num processo separado, via arquivos")
+    parser.add_argument("--forcar", action="store_true",
+                        help="Roda todas as etapas mesmo se as entradas não mudaram")
+    args = parser.parse_args()
+
+    main(modo_subprocess=args.modo_subprocess, checkpoints=args.checkpoints, forcar=args.forcar)
\ No newline at end of file
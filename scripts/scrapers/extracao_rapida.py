@@ -0,0 +1,171 @@
+"""
+Extração rápida de preço/título/imagem de páginas de produto
+Em Casa com Cecília
+
+Em vez de montar a árvore BeautifulSoup inteira (páginas de centenas de KB),
+lê o HTML em streaming com html.parser e só guarda o que interessa:
+- JSON-LD (<script type="application/ld+json">) com @type Product/offers
+- meta og:* / product:* / itemprop="price"
+
+Para assim que preço, título e imagem foram encontrados. Se não achar preço,
+retorna None e o chamador cai no parse completo.
+"""
+
+import json
+import re
+from html.parser import HTMLParser
+
+TAMANHO_BLOCO = 32 * 1024
+
+RE_SCRIPT_STYLE = re.compile(r"<(script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+
+# @type aceitos como produto (Organization, WebSite, BreadcrumbList... também podem ter "offers")
+TIPOS_PRODUTO = {"Product", "ProductGroup", "ProductModel", "IndividualProduct"}
+
+
+def _tipos(obj):
+    """Nomes do @type sem prefixo (schema:Product, https://schema.org/Product -> Product)"""
+    tipo = obj.get("@type")
+    tipos = tipo if isinstance(tipo, list) else [tipo]
+    return {re.split(r"[/:#]", t)[-1] for t in tipos if isinstance(t, str)}
+
+
+class _Pronto(Exception):
+    """Sinaliza que já temos tudo e o parse pode parar"""
+
+
+class _ExtratorProduto(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta = {}
+        self.json_ld = []
+        self._em_json_ld = False
+        self._buffer = []
+
+    # --- tags ---
+    def handle_starttag(self, tag, attrs):
+        if tag == "meta":
+            a = dict(attrs)
+            chave = a.get("property") or a.get("name") or a.get("itemprop")
+            if chave and a.get("content") is not None:
+                self.meta.setdefault(chave.lower(), a["content"])
+        elif tag == "script":
+            a = dict(attrs)
+            if (a.get("type") or "").lower() == "application/ld+json":
+                self._em_json_ld = True
+                self._buffer = []
+
+    def handle_endtag(self, tag):
+        if tag == "script" and self._em_json_ld:
+            self._em_json_ld = False
+            try:
+                self.json_ld.append(json.loads("".join(self._buffer)))
+            except ValueError:
+                pass
+            if self.completo():
+                raise _Pronto()
+        elif tag == "head" and self.completo():
+            raise _Pronto()
+
+    def handle_data(self, data):
+        if self._em_json_ld:
+            self._buffer.append(data)
+
+    # --- resultado ---
+    def produto_ld(self):
+        """
+        Primeiro Product (ou ProductGroup) dos blocos JSON-LD. Um Offer solto
+        vale pelo itemOffered, com a própria oferta como "offers".
+        """
+        pendentes = list(self.json_ld)
+        while pendentes:
+            obj = pendentes.pop(0)
+            if isinstance(obj, list):
+                pendentes.extend(obj)
+            elif isinstance(obj, dict):
+                if "@graph" in obj:
+                    pendentes.extend(obj["@graph"] if isinstance(obj["@graph"], list) else [obj["@graph"]])
+                tipos = _tipos(obj)
+                if tipos & TIPOS_PRODUTO:
+                    return obj
+                item = obj.get("itemOffered")
+                if "Offer" in tipos and isinstance(item, dict) and _tipos(item) & TIPOS_PRODUTO:
+                    return {**item, "offers": obj}
+        return None
+
+    @staticmethod
+    def ofertas_ld(produto):
+        """Oferta do produto; no ProductGroup, a da primeira variação que tem uma"""
+        ofertas = produto.get("offers")
+        if not ofertas:
+            variacoes = produto.get("hasVariant") or []
+            for variacao in variacoes if isinstance(variacoes, list) else [variacoes]:
+                if isinstance(variacao, dict) and variacao.get("offers"):
+                    ofertas = variacao["offers"]
+                    break
+        if isinstance(ofertas, list):
+            ofertas = ofertas[0] if ofertas else {}
+        return ofertas if isinstance(ofertas, dict) else {}
+
+    def dados(self):
+        produto = self.produto_ld() or {}
+        ofertas = self.ofertas_ld(produto)
+
+        preco = ofertas.get("price") or ofertas.get("lowPrice")
+        if preco is None:
+            preco = (self.meta.get("product:price:amount")
+                     or self.meta.get("og:price:amount")
+                     or self.meta.get("price"))
+
+        titulo = produto.get("name") or self.meta.get("og:title")
+
+        imagem = produto.get("image") or self.meta.get("og:image")
+        if isinstance(imagem, list):
+            imagem = imagem[0] if imagem else None
+        if isinstance(imagem, dict):
+            imagem = imagem.get("url")
+
+        disponibilidade = ofertas.get("availability") or self.meta.get("product:availability")
+
+        return {
+            "preco": preco,
+            "titulo": titulo,
+            "imagem": imagem,
+            "disponibilidade": disponibilidade,
+        }
+
+    def completo(self):
+        d = self.dados()
+        return bool(d["preco"] and d["titulo"] and d["imagem"])
+
+
+def extrair_dados(html):
+    """
+    Lê o HTML em blocos e para assim que preço, título e imagem aparecem.
+
+    Retorna:
+        dict com preco (texto/num cru), titulo, imagem, disponibilidade (ou None em cada)
+    """
+    parser = _ExtratorProduto()
+    try:
+        for inicio in range(0, len(html), TAMANHO_BLOCO):
+            parser.feed(html[inicio:inicio + TAMANHO_BLOCO])
+        parser.close()
+    except _Pronto:
+        pass
+    except Exception:
+        pass
+    return parser.dados()
+
+
+def disponivel(dados, html, padrao_indisponivel):
+    """
+    Disponibilidade: usa schema.org availability quando existe; senão procura
+    as frases de indisponível no texto (sem <script>/<style>).
+    """
+    disponibilidade = dados.get("disponibilidade")
+    if disponibilidade:
+        return not re.search(r"OutOfStock|SoldOut|Discontinued", str(disponibilidade), re.IGNORECASE)
+    texto = RE_SCRIPT_STYLE.sub(" ", html)
+    return not re.search(padrao_indisponivel, texto, re.IGNORECASE)
@@ -9,8 +9,13 @@ Funciona para extrair: título, preço, imagem, frete grátis
 import requests
 import json
 import re
+import sys
+from pathlib import Path
 from urllib.parse import unquote
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from scripts.utils.links import resolver_link
+
 # Headers para simular navegador
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -42,13 +47,11 @@ def extrair_id_produto(url):
     if match:
         return f"MLB{match.group(2)}"
     
-    # Short link - resolver redirect
+    # Short link - resolver redirect (com cache persistente)
     if '/sec/' in url:
-        try:
-            response = requests.get(url, headers=HEADERS, allow_redirects=True, timeout=10)
-            return extrair_id_produto(response.url)
-        except:
-            pass
+        url_final, _ = resolver_link(url, metodo="GET", headers=HEADERS, timeout=10)
+        if url_final and '/sec/' not in url_final:
+            return extrair_id_produto(url_final)
     
     return None
 
@@ -18,9 +18,24 @@ import random
 import hashlib
 import hmac
 import logging
+import threading
+import asyncio
+import contextlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 from pathlib import Path
 import os
+import sys
+
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from scripts.utils.links import (
+    eh_link_curto, resolver_link, resolver_link_async, url_resolvida, registrar_redirect,
+    CACHE as CACHE_LINKS
+)
+from scripts.utils.http_cache import CACHE as CACHE_HTTP
+from scripts.scrapers.extracao_rapida import extrair_dados, disponivel
 
 # =====================================================
 # CONFIGURAÇÃO DE LOGGING
@@ -81,7 +96,7 @@ STORE_CONFIGS = {
             "div.pmmxKx",
             "span.pqTWkA"
         ],
-        "delay": (2, 4)
+        "delay": (1, 2)  # API oficial (affiliate GraphQL)
     },
     "Magazine Luiza": {
         "price_selectors": [
@@ -104,6 +119,18 @@ STORE_CONFIGS = {
     }
 }
 
+# Cliente HTTP assíncrono (opcional, usado no modo --async)
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401 - habilita HTTP/2 no httpx
+    HTTP2_DISPONIVEL = True
+except ImportError:
+    HTTP2_DISPONIVEL = False
+
 # Amazon API (carregar do .env se disponível)
 try:
     from dotenv import load_dotenv
@@ -121,6 +148,53 @@ SHOPEE_SECRET = os.getenv('SHOPEE_SECRET', '6O3BGLID65IBOKMCHQOXJ2TKJJDYVZ6R')
 SHOPEE_API_URL = "https://open-api.affiliate.shopee.com.br/graphql"
 
 
+# =====================================================
+# RATE LIMIT POR LOJA (TOKEN BUCKET)
+# =====================================================
+
+class TokenBucket:
+    """
+    Limitador token bucket thread-safe.
+    A taxa vem do delay médio da loja: delay (1, 3) -> 1 req a cada 2s.
+    """
+
+    def __init__(self, taxa, capacidade=1):
+        self.taxa = taxa  # tokens por segundo
+        self.capacidade = capacidade
+        self.tokens = float(capacidade)
+        self.ultimo = time.monotonic()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def da_loja(cls, loja):
+        """Cria o limitador a partir de STORE_CONFIGS[loja]["delay"]"""
+        minimo, maximo = STORE_CONFIGS.get(loja, STORE_CONFIGS["default"])["delay"]
+        return cls(taxa=2.0 / (minimo + maximo))
+
+    def reservar(self):
+        """Reserva um token e retorna quantos segundos esperar até poder usá-lo"""
+        with self.lock:
+            agora = time.monotonic()
+            self.tokens = min(self.capacidade, self.tokens + (agora - self.ultimo) * self.taxa)
+            self.ultimo = agora
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.taxa
+
+    def aguardar(self):
+        espera = self.reservar()
+        if espera > 0:
+            time.sleep(espera)
+
+
+# Limitadores ativos (preenchido pelo motor concorrente de atualização)
+LIMITADORES = {}
+
+# Requisições em voo por loja no modo assíncrono (preenchido por executar_tarefas_async)
+SEMAFOROS_ASYNC = {}
+
+
 # =====================================================
 # FUNÇÕES AUXILIARES
 # =====================================================
@@ -142,6 +216,35 @@ def get_headers():
     }
 
 
+def aguardar_vez(loja):
+    """
+    Respeita o rate limit da loja antes de uma requisição.
+    Com o motor concorrente ativo usa o token bucket da loja;
+    senão mantém o delay aleatório sequencial de STORE_CONFIGS.
+    """
+    limitador = LIMITADORES.get(loja)
+    if limitador:
+        limitador.aguardar()
+    else:
+        delay = STORE_CONFIGS.get(loja, STORE_CONFIGS["default"])["delay"]
+        time.sleep(random.uniform(*delay))
+
+
+def precisa_resolver(url):
+    """Link curto que não está no cache: resolver vai fazer requisição"""
+    return eh_link_curto(url) and CACHE_LINKS.obter(url.strip()) is None
+
+
+def resolver_link_da_loja(url, loja, **kwargs):
+    """
+    resolver_link contando no rate limit da loja: seguir o link curto também
+    é uma requisição para a loja. Hits do cache não esperam a vez.
+    """
+    if precisa_resolver(url):
+        aguardar_vez(loja)
+    return resolver_link(url, **kwargs)
+
+
 def parse_price(price_text):
     """Converte texto de preço para float"""
     if not price_text:
@@ -175,80 +278,117 @@ def parse_price(price_text):
 # SCRAPER MERCADO LIVRE
 # =====================================================
 
-def scrape_mercadolivre(url):
-    """Scraping do Mercado Livre"""
+def parse_rapido(html, loja, padrao_indisponivel):
+    """
+    Caminho rápido: JSON-LD / meta via streaming, sem árvore BeautifulSoup.
+    Retorna None se não achou preço (chamador faz o parse completo).
+    """
+    dados = extrair_dados(html)
+    preco = parse_price(dados["preco"])
+    if not preco:
+        return None
+    
+    resultado = {'loja': loja, 'preco': preco}
+    if dados["titulo"]:
+        resultado['titulo'] = str(dados["titulo"]).split('|')[0].strip()
+    if dados["imagem"]:
+        resultado['imagem'] = dados["imagem"]
+    resultado['disponivel'] = disponivel(dados, html, padrao_indisponivel)
+    return resultado
+
+
+INDISPONIVEL_ML = r'não está mais disponível|indisponível|esgotou'
+INDISPONIVEL_MAGALU = r'indisponível|esgotado|não disponível'
+
+
+def parse_mercadolivre(html):
+    """Extrai preço, título, imagem e disponibilidade do HTML do Mercado Livre"""
+    return parse_rapido(html, 'Mercado Livre', INDISPONIVEL_ML) or parse_mercadolivre_completo(html)
+
+
+def parse_mercadolivre_completo(html):
+    """Parse completo com BeautifulSoup (fallback quando não há JSON-LD/meta de preço)"""
     store_config = STORE_CONFIGS["Mercado Livre"]
     
-    try:
-        time.sleep(random.uniform(*store_config["delay"]))
-        
-        response = requests.get(url, headers=get_headers(), timeout=30, allow_redirects=True)
-        
-        if response.status_code != 200:
-            return {"erro": f"Status {response.status_code}"}
-        
-        html = response.text
-        soup = BeautifulSoup(html, 'html.parser')
-        resultado = {'loja': 'Mercado Livre'}
-        
-        # Tentar extrair preço via seletores
-        price_text = None
-        decimal_text = "00"
-        
-        for selector in store_config["price_selectors"]:
-            if selector.startswith("meta"):
-                elem = soup.select_one(selector)
-                if elem and elem.get('content'):
-                    price_text = elem.get('content')
-                    break
-            else:
-                elem = soup.select_one(selector)
-                if elem:
-                    price_text = elem.text.strip()
-                    break
-        
-        # Extrair decimais se houver
-        if price_text and "decimal_selectors" in store_config:
-            for selector in store_config["decimal_selectors"]:
-                elem = soup.select_one(selector)
-                if elem:
-                    decimal_text = elem.text.strip()
-                    break
-            
-            # Combinar inteiro + decimal se necessário
-            if ',' not in price_text and '.' not in price_text and decimal_text:
-                price_text = f"{price_text}.{decimal_text}"
-        
-        # Fallback: regex no HTML
-        if not price_text:
-            match = re.search(r'"price"\s*:\s*"?(\d+(?:\.\d+)?)"?', html)
-            if match:
-                price_text = match.group(1)
-        
-        resultado['preco'] = parse_price(price_text)
-        
-        # Título
-        title_elem = soup.select_one('h1.ui-pdp-title')
-        if title_elem:
-            resultado['titulo'] = title_elem.text.strip()
+    soup = BeautifulSoup(html, 'html.parser')
+    resultado = {'loja': 'Mercado Livre'}
+    
+    # Tentar extrair preço via seletores
+    price_text = None
+    decimal_text = "00"
+    
+    for selector in store_config["price_selectors"]:
+        if selector.startswith("meta"):
+            elem = soup.select_one(selector)
+            if elem and elem.get('content'):
+                price_text = elem.get('content')
+                break
         else:
-            og_title = soup.select_one('meta[property="og:title"]')
-            if og_title:
-                resultado['titulo'] = og_title.get('content', '').split('|')[0].strip()
+            elem = soup.select_one(selector)
+            if elem:
+                price_text = elem.text.strip()
+                break
+    
+    # Extrair decimais se houver
+    if price_text and "decimal_selectors" in store_config:
+        for selector in store_config["decimal_selectors"]:
+            elem = soup.select_one(selector)
+            if elem:
+                decimal_text = elem.text.strip()
+                break
         
-        # Imagem
-        og_image = soup.select_one('meta[property="og:image"]')
-        if og_image:
-            resultado['imagem'] = og_image.get('content', '')
+        # Combinar inteiro + decimal se necessário
+        if ',' not in price_text and '.' not in price_text and decimal_text:
+            price_text = f"{price_text}.{decimal_text}"
+    
+    # Fallback: regex no HTML
+    if not price_text:
+        match = re.search(r'"price"\s*:\s*"?(\d+(?:\.\d+)?)"?', html)
+        if match:
+            price_text = match.group(1)
+    
+    resultado['preco'] = parse_price(price_text)
+    
+    # Título
+    title_elem = soup.select_one('h1.ui-pdp-title')
+    if title_elem:
+        resultado['titulo'] = title_elem.text.strip()
+    else:
+        og_title = soup.select_one('meta[property="og:title"]')
+        if og_title:
+            resultado['titulo'] = og_title.get('content', '').split('|')[0].strip()
+    
+    # Imagem
+    og_image = soup.select_one('meta[property="og:image"]')
+    if og_image:
+        resultado['imagem'] = og_image.get('content', '')
+    
+    resultado['disponivel'] = not bool(
+        soup.find(string=re.compile(INDISPONIVEL_ML, re.IGNORECASE))
+    )
+    
+    if not resultado.get('preco'):
+        return {"erro": "Preço não encontrado"}
+    
+    return resultado
+
+
+def scrape_mercadolivre(url):
+    """Scraping do Mercado Livre"""
+    try:
+        aguardar_vez("Mercado Livre")
         
-        resultado['disponivel'] = not bool(
-            soup.find(string=re.compile(r'não está mais disponível|indisponível|esgotou', re.IGNORECASE))
+        # Link curto já resolvido antes? Vai direto ao destino
+        response = requests.get(
+            url_resolvida(url),
+            headers={**get_headers(), **CACHE_HTTP.cabecalhos(url)},
+            timeout=30,
+            allow_redirects=True
         )
+        registrar_redirect(url, response.url, response.status_code)
         
-        if not resultado.get('preco'):
-            return {"erro": "Preço não encontrado"}
-        
-        return resultado
+        # 304 ou corpo idêntico -> reaproveita o resultado anterior sem parse
+        return CACHE_HTTP.processar(url, response.status_code, response.headers, response.text, parse_mercadolivre)
         
     except Exception as e:
         return {"erro": str(e)}
@@ -264,8 +404,8 @@ def shopee_gerar_assinatura(app_id, timestamp, payload, secret):
     return hashlib.sha256(base_string.encode('utf-8')).hexdigest()
 
 
-def shopee_fazer_requisicao(query):
-    """Faz requisição GraphQL autenticada para a API Shopee"""
+def shopee_montar_requisicao(query):
+    """Monta (headers, payload) assinados para uma query GraphQL da Shopee"""
     timestamp = int(time.time())
     payload_dict = {"query": query}
     payload = json.dumps(payload_dict, separators=(',', ':'))
@@ -276,6 +416,12 @@ def shopee_fazer_requisicao(query):
         'Content-Type': 'application/json',
         'Authorization': f'SHA256 Credential={SHOPEE_APP_ID}, Timestamp={timestamp}, Signature={signature}'
     }
+    return headers, payload
+
+
+def shopee_fazer_requisicao(query):
+    """Faz requisição GraphQL autenticada para a API Shopee"""
+    headers, payload = shopee_montar_requisicao(query)
     
     response = requests.post(SHOPEE_API_URL, headers=headers, data=payload, timeout=30)
     
@@ -285,13 +431,19 @@ def shopee_fazer_requisicao(query):
         return {"error": f"Resposta inválida: {response.text[:100]}"}
 
 
-def shopee_extrair_ids_da_url(url):
+def shopee_extrair_ids_da_url(url, resolver=True):
     """
     Extrai shop_id e item_id de uma URL Shopee.
     Formatos:
     - https://shopee.com.br/produto-i.123456.789012
     - https://shopee.com.br/product/123456/789012
+    - https://s.shopee.com.br/xxxx (link curto, resolvido via cache)
     """
+    if resolver and eh_link_curto(url):
+        url_final, _ = resolver_link_da_loja(url, "Shopee")
+        if url_final:
+            url = url_final
+    
     # Formato: produto-i.SHOPID.ITEMID
     match = re.search(r'-i\.(\d+)\.(\d+)', url)
     if match:
@@ -305,11 +457,7 @@ def shopee_extrair_ids_da_url(url):
     return None, None
 
 
-def shopee_buscar_produto(shop_id, item_id):
-    """Busca informações de um produto específico via API"""
-    query = '''
-    query {
-        productOfferV2(shopId: %s, itemId: %s, limit: 1) {
+SHOPEE_CAMPOS_PRODUTO = '''
             nodes {
                 productName
                 priceMin
@@ -318,17 +466,25 @@ def shopee_buscar_produto(shop_id, item_id):
                 shopName
                 productLink
                 commissionRate
-            }
+            }'''
+
+
+def shopee_query_produto(shop_id, item_id):
+    """Query GraphQL productOfferV2 para um produto"""
+    return '''
+    query {
+        productOfferV2(shopId: %s, itemId: %s, limit: 1) {%s
         }
     }
-    ''' % (shop_id, item_id)
-    
-    result = shopee_fazer_requisicao(query)
-    
+    ''' % (shop_id, item_id, SHOPEE_CAMPOS_PRODUTO)
+
+
+def shopee_parse_produto(result):
+    """Converte a resposta do productOfferV2 no formato do scraper"""
     if result.get('errors'):
         return {"erro": str(result['errors'])}
     
-    nodes = result.get('data', {}).get('productOfferV2', {}).get('nodes', [])
+    nodes = (result.get('data') or {}).get('productOfferV2', {}).get('nodes', [])
     
     if not nodes:
         return {"erro": "Produto não encontrado na API Shopee"}
@@ -345,22 +501,34 @@ def shopee_buscar_produto(shop_id, item_id):
     }
 
 
-def shopee_gerar_link_afiliado(url):
-    """Gera link de afiliado para uma URL Shopee"""
-    query = '''
+def shopee_buscar_produto(shop_id, item_id):
+    """Busca informações de um produto específico via API"""
+    result = shopee_fazer_requisicao(shopee_query_produto(shop_id, item_id))
+    return shopee_parse_produto(result)
+
+
+def shopee_query_link_afiliado(url):
+    """Mutation GraphQL generateShortLink para uma URL"""
+    return '''
     mutation {
         generateShortLink(input: {originUrl: "%s", subIds: ["emcasacomcecilia"]}) {
             shortLink
         }
     }
     ''' % url
-    
-    result = shopee_fazer_requisicao(query)
-    
+
+
+def shopee_parse_link_afiliado(result):
     if result.get('errors'):
         return None
     
-    return result.get('data', {}).get('generateShortLink', {}).get('shortLink', '')
+    return (result.get('data') or {}).get('generateShortLink', {}).get('shortLink', '')
+
+
+def shopee_gerar_link_afiliado(url):
+    """Gera link de afiliado para uma URL Shopee"""
+    result = shopee_fazer_requisicao(shopee_query_link_afiliado(url))
+    return shopee_parse_link_afiliado(result)
 
 
 def scrape_shopee(url):
@@ -370,7 +538,7 @@ def scrape_shopee(url):
     """
     try:
         # Delay para rate limit
-        time.sleep(random.uniform(1, 2))
+        aguardar_vez("Shopee")
         
         # Extrair IDs da URL
         shop_id, item_id = shopee_extrair_ids_da_url(url)
@@ -399,80 +567,245 @@ def scrape_shopee(url):
         return {"erro": f"Erro API Shopee: {str(e)[:50]}"}
 
 
+# -----------------------------------------------------
+# Lote: várias consultas/mutations num único documento GraphQL (aliases)
+# -----------------------------------------------------
+
+SHOPEE_LOTE_MAX = 25  # produtos por documento GraphQL
+
+
+def shopee_query_lote(ids):
+    """Query com um alias pN: productOfferV2 por (shop_id, item_id)"""
+    campos = "".join(
+        '''
+        p%d: productOfferV2(shopId: %s, itemId: %s, limit: 1) {%s
+        }''' % (n, shop_id, item_id, SHOPEE_CAMPOS_PRODUTO)
+        for n, (shop_id, item_id) in enumerate(ids)
+    )
+    return "query {%s\n}" % campos
+
+
+def shopee_mutation_lote(urls):
+    """Mutation com um alias lN: generateShortLink por URL"""
+    campos = "".join(
+        '''
+        l%d: generateShortLink(input: {originUrl: %s, subIds: ["emcasacomcecilia"]}) {
+            shortLink
+        }''' % (n, json.dumps(url))
+        for n, url in enumerate(urls)
+    )
+    return "mutation {%s\n}" % campos
+
+
+def shopee_separar_lote(result, prefixo, total):
+    """
+    Separa a resposta de um documento com aliases em uma resposta por alias
+    ({"data": {alias: ...}, "errors": [...]}), na ordem dos aliases.
+    """
+    data = result.get('data') or {}
+    erros = result.get('errors') or []
+    
+    if not data and not erros and result.get('error'):
+        erros = [{"message": result['error']}]
+    
+    erros_por_alias = {}
+    erros_gerais = []
+    for erro in erros:
+        caminho = erro.get('path') or []
+        if caminho and str(caminho[0]).startswith(prefixo):
+            erros_por_alias.setdefault(caminho[0], []).append(erro)
+        else:
+            erros_gerais.append(erro)
+    
+    respostas = []
+    for n in range(total):
+        alias = f"{prefixo}{n}"
+        resposta = {"data": {}}
+        if data.get(alias) is not None:
+            resposta["data"] = {alias: data[alias]}
+        erros_alias = erros_por_alias.get(alias) or (erros_gerais if data.get(alias) is None else [])
+        if erros_alias:
+            resposta["errors"] = erros_alias
+        respostas.append(resposta)
+    return respostas
+
+
+def shopee_preparar_lote(urls, resolvidas=None):
+    """
+    Separa as URLs em válidas [(url, shop_id, item_id)] e erros {url: resultado}.
+    `resolvidas` (url -> url final) evita resolver links curtos aqui.
+    """
+    validas = []
+    resultados = {}
+    for url in dict.fromkeys(urls):
+        if resolvidas is not None:
+            shop_id, item_id = shopee_extrair_ids_da_url(resolvidas.get(url) or url, resolver=False)
+        else:
+            shop_id, item_id = shopee_extrair_ids_da_url(url)
+        if shop_id and item_id:
+            validas.append((url, shop_id, item_id))
+        else:
+            resultados[url] = {"erro": "Não foi possível extrair IDs da URL Shopee"}
+    return validas, resultados
+
+
+def shopee_aplicar_lote(lote, respostas_produto, respostas_link):
+    """
+    Combina produto + link afiliado de cada item do lote.
+    Retorna (resultados por url, urls encontradas com preço).
+    """
+    resultados = {}
+    encontrados = []
+    for (url, _, _), resposta in zip(lote, respostas_produto):
+        alias_data = next(iter(resposta["data"].values()), None)
+        resultado = shopee_parse_produto({
+            "data": {"productOfferV2": alias_data} if alias_data else {},
+            "errors": resposta.get("errors")
+        })
+        if 'erro' not in resultado and not resultado.get('preco'):
+            resultado = {"erro": "Preço não encontrado na API Shopee"}
+        resultados[url] = resultado
+        if 'erro' not in resultado:
+            encontrados.append(url)
+    
+    for url, resposta in zip(encontrados, respostas_link or []):
+        alias_data = next(iter(resposta["data"].values()), None)
+        link = shopee_parse_link_afiliado({
+            "data": {"generateShortLink": alias_data or {}},
+            "errors": resposta.get("errors")
+        })
+        if link:
+            resultados[url]['link_afiliado'] = link
+    
+    return resultados, encontrados
+
+
+def shopee_buscar_lote(urls):
+    """
+    Busca vários produtos Shopee com 2 requisições a cada SHOPEE_LOTE_MAX links:
+    uma query com todos os productOfferV2 e uma mutation com todos os
+    generateShortLink (GraphQL não executa query e mutation na mesma operação).
+    
+    Retorna:
+        dict url -> resultado (mesmo formato de scrape_shopee)
+    """
+    validas, resultados = shopee_preparar_lote(urls)
+    
+    for inicio in range(0, len(validas), SHOPEE_LOTE_MAX):
+        lote = validas[inicio:inicio + SHOPEE_LOTE_MAX]
+        try:
+            aguardar_vez("Shopee")
+            result = shopee_fazer_requisicao(shopee_query_lote([(s, i) for _, s, i in lote]))
+            respostas_produto = shopee_separar_lote(result, "p", len(lote))
+            
+            _, encontrados = shopee_aplicar_lote(lote, respostas_produto, None)
+            respostas_link = None
+            if encontrados:
+                aguardar_vez("Shopee")
+                result = shopee_fazer_requisicao(shopee_mutation_lote(encontrados))
+                respostas_link = shopee_separar_lote(result, "l", len(encontrados))
+            
+            parciais, _ = shopee_aplicar_lote(lote, respostas_produto, respostas_link)
+            resultados.update(parciais)
+        except Exception as e:
+            resultados.update({url: {"erro": f"Erro API Shopee: {str(e)[:50]}"} for url, _, _ in lote})
+    
+    return resultados
+
+
+def executar_lote_shopee(tarefas, workers=2):
+    """Atualiza todas as tarefas Shopee via shopee_buscar_lote"""
+    resultados = shopee_buscar_lote([tarefa[2] for tarefa in tarefas])
+    return [(tarefa, resultados[tarefa[2]]) for tarefa in tarefas]
+
+
 # =====================================================
 # SCRAPER MAGAZINE LUIZA
 # =====================================================
 
-def scrape_magalu(url):
-    """Scraping do Magazine Luiza"""
+def parse_magalu(html):
+    """Extrai preço, título, imagem e disponibilidade do HTML da Magalu"""
+    return parse_rapido(html, 'Magazine Luiza', INDISPONIVEL_MAGALU) or parse_magalu_completo(html)
+
+
+def parse_magalu_completo(html):
+    """Parse completo com BeautifulSoup (fallback quando não há JSON-LD/meta de preço)"""
     store_config = STORE_CONFIGS["Magazine Luiza"]
     
+    soup = BeautifulSoup(html, 'html.parser')
+    resultado = {'loja': 'Magazine Luiza'}
+    
+    # Tentar JSON-LD primeiro (mais confiável)
+    script_ld = soup.find('script', type='application/ld+json')
+    if script_ld:
+        try:
+            data = json.loads(script_ld.string)
+            if isinstance(data, list):
+                data = data[0]
+            
+            if 'offers' in data:
+                offers = data['offers']
+                if isinstance(offers, list):
+                    offers = offers[0]
+                if 'price' in offers:
+                    resultado['preco'] = float(offers['price'])
+            
+            if 'name' in data:
+                resultado['titulo'] = data['name']
+            
+            if 'image' in data:
+                img = data['image']
+                resultado['imagem'] = img[0] if isinstance(img, list) else img
+        except:
+            pass
+    
+    # Fallback: seletores CSS
+    if not resultado.get('preco'):
+        for selector in store_config["price_selectors"]:
+            elem = soup.select_one(selector)
+            if elem:
+                price_text = elem.text.strip()
+                resultado['preco'] = parse_price(price_text)
+                if resultado['preco']:
+                    break
+    
+    # Fallback: regex
+    if not resultado.get('preco'):
+        match = re.search(r'"price"\s*:\s*"?(\d+(?:\.\d+)?)"?', html)
+        if match:
+            resultado['preco'] = parse_price(match.group(1))
+    
+    # Título fallback
+    if not resultado.get('titulo'):
+        h1 = soup.select_one('h1')
+        if h1:
+            resultado['titulo'] = h1.text.strip()
+    
+    resultado['disponivel'] = not bool(
+        soup.find(string=re.compile(INDISPONIVEL_MAGALU, re.IGNORECASE))
+    )
+    
+    if not resultado.get('preco'):
+        return {"erro": "Preço não encontrado"}
+    
+    return resultado
+
+
+def scrape_magalu(url):
+    """Scraping do Magazine Luiza"""
     try:
-        time.sleep(random.uniform(*store_config["delay"]))
-        
-        response = requests.get(url, headers=get_headers(), timeout=30, allow_redirects=True)
-        
-        if response.status_code != 200:
-            return {"erro": f"Status {response.status_code}"}
+        aguardar_vez("Magazine Luiza")
         
-        html = response.text
-        soup = BeautifulSoup(html, 'html.parser')
-        resultado = {'loja': 'Magazine Luiza'}
-        
-        # Tentar JSON-LD primeiro (mais confiável)
-        script_ld = soup.find('script', type='application/ld+json')
-        if script_ld:
-            try:
-                data = json.loads(script_ld.string)
-                if isinstance(data, list):
-                    data = data[0]
-                
-                if 'offers' in data:
-                    offers = data['offers']
-                    if isinstance(offers, list):
-                        offers = offers[0]
-                    if 'price' in offers:
-                        resultado['preco'] = float(offers['price'])
-                
-                if 'name' in data:
-                    resultado['titulo'] = data['name']
-                
-                if 'image' in data:
-                    img = data['image']
-                    resultado['imagem'] = img[0] if isinstance(img, list) else img
-            except:
-                pass
-        
-        # Fallback: seletores CSS
-        if not resultado.get('preco'):
-            for selector in store_config["price_selectors"]:
-                elem = soup.select_one(selector)
-                if elem:
-                    price_text = elem.text.strip()
-                    resultado['preco'] = parse_price(price_text)
-                    if resultado['preco']:
-                        break
-        
-        # Fallback: regex
-        if not resultado.get('preco'):
-            match = re.search(r'"price"\s*:\s*"?(\d+(?:\.\d+)?)"?', html)
-            if match:
-                resultado['preco'] = parse_price(match.group(1))
-        
-        # Título fallback
-        if not resultado.get('titulo'):
-            h1 = soup.select_one('h1')
-            if h1:
-                resultado['titulo'] = h1.text.strip()
-        
-        resultado['disponivel'] = not bool(
-            soup.find(string=re.compile(r'indisponível|esgotado|não disponível', re.IGNORECASE))
+        response = requests.get(
+            url_resolvida(url),
+            headers={**get_headers(), **CACHE_HTTP.cabecalhos(url)},
+            timeout=30,
+            allow_redirects=True
         )
+        registrar_redirect(url, response.url, response.status_code)
         
-        if not resultado.get('preco'):
-            return {"erro": "Preço não encontrado"}
-        
-        return resultado
+        # 304 ou corpo idêntico -> reaproveita o resultado anterior sem parse
+        return CACHE_HTTP.processar(url, response.status_code, response.headers, response.text, parse_magalu)
         
     except Exception as e:
         return {"erro": str(e)}
@@ -482,215 +815,690 @@ def scrape_magalu(url):
 # AMAZON API
 # =====================================================
 
-def scrape_amazon_api(url):
-    """Busca preço via Amazon Product Advertising API"""
+AMAZON_HOST = "webservices.amazon.com.br"
+AMAZON_REGION = "us-east-1"
+AMAZON_SERVICE = "ProductAdvertisingAPI"
+AMAZON_URI = "/paapi5/getitems"
+AMAZON_LOTE_MAX = 10  # GetItems aceita até 10 ItemIds por requisição
+
+
+def amazon_asin_da_url(url):
+    """Extrai o ASIN de uma URL completa da Amazon (sem seguir redirects)"""
+    match = re.search(r'/dp/([A-Z0-9]{10})', url)
+    if match:
+        return match.group(1)
     
-    if not all([AMAZON_ACCESS_KEY, AMAZON_SECRET_KEY, AMAZON_PARTNER_TAG]):
-        return {"erro": "Credenciais Amazon não configuradas"}
+    match = re.search(r'/gp/product/([A-Z0-9]{10})', url)
+    if match:
+        return match.group(1)
     
-    # Delay para respeitar rate limit (1 req/sec)
-    time.sleep(random.uniform(1.5, 2.5))
+    return None
+
+
+def amazon_extrair_asin(url):
+    """Extrai o ASIN da URL, resolvendo short links (amzn.to) se necessário"""
+    asin = amazon_asin_da_url(url)
     
-    # Extrair ASIN da URL
-    asin = None
+    # Se não encontrou, resolver short link (com cache persistente)
+    if not asin and 'amzn' in url:
+        url_final, _ = resolver_link_da_loja(url, "Amazon", timeout=10)
+        if url_final:
+            asin = amazon_asin_da_url(url_final)
     
-    # Tentar extrair ASIN diretamente
-    match = re.search(r'/dp/([A-Z0-9]{10})', url)
-    if match:
-        asin = match.group(1)
-    else:
-        match = re.search(r'/gp/product/([A-Z0-9]{10})', url)
-        if match:
-            asin = match.group(1)
+    return asin
+
+
+def amazon_montar_requisicao(asins):
+    """
+    Monta (url, headers, payload) assinados com AWS Signature v4
+    para um GetItems da PA-API.
+    """
+    t = datetime.now(timezone.utc)
+    amz_date = t.strftime('%Y%m%dT%H%M%SZ')
+    date_stamp = t.strftime('%Y%m%d')
     
-    # Se não encontrou, resolver short link
-    if not asin and 'amzn' in url:
+    payload = {
+        "ItemIds": list(asins),
+        "Resources": [
+            "Images.Primary.Large",
+            "ItemInfo.Title",
+            "Offers.Listings.Price"
+        ],
+        "PartnerTag": AMAZON_PARTNER_TAG,
+        "PartnerType": "Associates",
+        "Marketplace": "www.amazon.com.br"
+    }
+    payload_json = json.dumps(payload, separators=(',', ':'))
+    
+    def sign(key, msg):
+        return hmac.new(key, msg.encode('utf-8'), hashlib.sha256).digest()
+    
+    def get_signature_key(key, date_stamp, region, service):
+        k_date = sign(('AWS4' + key).encode('utf-8'), date_stamp)
+        k_region = sign(k_date, region)
+        k_service = sign(k_region, service)
+        k_signing = sign(k_service, 'aws4_request')
+        return k_signing
+    
+    method = 'POST'
+    canonical_querystring = ''
+    
+    payload_hash = hashlib.sha256(payload_json.encode('utf-8')).hexdigest()
+    
+    canonical_headers = (
+        f'content-encoding:amz-1.0\n'
+        f'content-type:application/json; charset=utf-8\n'
+        f'host:{AMAZON_HOST}\n'
+        f'x-amz-date:{amz_date}\n'
+        f'x-amz-target:com.amazon.paapi5.v1.ProductAdvertisingAPIv1.GetItems\n'
+    )
+    signed_headers = 'content-encoding;content-type;host;x-amz-date;x-amz-target'
+    
+    canonical_request = (
+        f'{method}\n{AMAZON_URI}\n{canonical_querystring}\n'
+        f'{canonical_headers}\n{signed_headers}\n{payload_hash}'
+    )
+    
+    algorithm = 'AWS4-HMAC-SHA256'
+    credential_scope = f'{date_stamp}/{AMAZON_REGION}/{AMAZON_SERVICE}/aws4_request'
+    
+    string_to_sign = (
+        f'{algorithm}\n{amz_date}\n{credential_scope}\n'
+        f'{hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()}'
+    )
+    
+    signing_key = get_signature_key(AMAZON_SECRET_KEY, date_stamp, AMAZON_REGION, AMAZON_SERVICE)
+    signature = hmac.new(signing_key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+    
+    authorization_header = (
+        f'{algorithm} Credential={AMAZON_ACCESS_KEY}/{credential_scope}, '
+        f'SignedHeaders={signed_headers}, Signature={signature}'
+    )
+    
+    headers = {
+        'content-encoding': 'amz-1.0',
+        'content-type': 'application/json; charset=utf-8',
+        'host': AMAZON_HOST,
+        'x-amz-date': amz_date,
+        'x-amz-target': 'com.amazon.paapi5.v1.ProductAdvertisingAPIv1.GetItems',
+        'Authorization': authorization_header
+    }
+    
+    return f'https://{AMAZON_HOST}{AMAZON_URI}', headers, payload_json
+
+
+def amazon_parse_item(item):
+    """Converte um item do GetItems no formato do scraper"""
+    resultado = {'loja': 'Amazon'}
+    
+    if 'ItemInfo' in item and 'Title' in item['ItemInfo']:
+        resultado['titulo'] = item['ItemInfo']['Title'].get('DisplayValue', '')
+    
+    if 'Offers' in item and 'Listings' in item['Offers']:
+        listings = item['Offers']['Listings']
+        if listings:
+            price_info = listings[0].get('Price', {})
+            resultado['preco'] = price_info.get('Amount', 0)
+    
+    if 'Images' in item and 'Primary' in item['Images']:
+        resultado['imagem'] = item['Images']['Primary'].get('Large', {}).get('URL', '')
+    
+    resultado['disponivel'] = True
+    
+    if not resultado.get('preco'):
+        return {"erro": "Preço não encontrado na API"}
+    
+    return resultado
+
+
+def amazon_parse_resposta(status_code, data):
+    """Valida a resposta do GetItems e retorna a lista de itens ou {"erro": ...}"""
+    if status_code != 200:
+        error_msg = (data or {}).get('Errors', [{}])[0].get('Message', f'Status {status_code}')
+        return {"erro": error_msg}
+    
+    if 'ItemsResult' not in data or not data['ItemsResult'].get('Items'):
+        return {"erro": "Produto não encontrado"}
+    
+    return data['ItemsResult']['Items']
+
+
+def amazon_credenciais_ok():
+    return all([AMAZON_ACCESS_KEY, AMAZON_SECRET_KEY, AMAZON_PARTNER_TAG])
+
+
+def amazon_distribuir_lote(lote, data, status_code):
+    """Mapeia a resposta de um GetItems de volta para cada ASIN do lote"""
+    itens = amazon_parse_resposta(status_code, data)
+    
+    if isinstance(itens, dict):
+        return {asin: itens for asin in lote}
+    
+    por_asin = {item.get('ASIN'): item for item in itens}
+    return {
+        asin: amazon_parse_item(por_asin[asin]) if asin in por_asin else {"erro": "Produto não encontrado"}
+        for asin in lote
+    }
+
+
+def amazon_buscar_lote(asins):
+    """
+    Busca vários ASINs via GetItems, até AMAZON_LOTE_MAX por requisição.
+    Cada requisição respeita o rate limit da Amazon (1 req/sec).
+    
+    Retorna:
+        dict asin -> resultado (mesmo formato de scrape_amazon_api)
+    """
+    asins = list(dict.fromkeys(asins))
+    resultados = {}
+    
+    for inicio in range(0, len(asins), AMAZON_LOTE_MAX):
+        lote = asins[inicio:inicio + AMAZON_LOTE_MAX]
+        aguardar_vez("Amazon")
+        
         try:
-            resp = requests.head(url, allow_redirects=True, timeout=10)
-            match = re.search(r'/dp/([A-Z0-9]{10})', resp.url)
-            if match:
-                asin = match.group(1)
-        except:
-            pass
+            endpoint, headers, payload_json = amazon_montar_requisicao(lote)
+            response = requests.post(endpoint, headers=headers, data=payload_json, timeout=15)
+            data = response.json() if response.text else {}
+            resultados.update(amazon_distribuir_lote(lote, data, response.status_code))
+        except Exception as e:
+            resultados.update({asin: {"erro": str(e)} for asin in lote})
+    
+    return resultados
+
+
+def scrape_amazon_api(url):
+    """Busca preço via Amazon Product Advertising API"""
+    
+    if not amazon_credenciais_ok():
+        return {"erro": "Credenciais Amazon não configuradas"}
+    
+    asin = amazon_extrair_asin(url)
     
     if not asin:
         return {"erro": "Não consegui extrair ASIN da URL"}
     
+    return amazon_buscar_lote([asin])[asin]
+
+
+def executar_lote_amazon(tarefas, workers=2):
+    """
+    Atualiza todas as tarefas Amazon de uma vez:
+    1) resolve os ASINs (inclusive short links amzn.to) em paralelo, no
+       máximo `workers` por vez e respeitando o token bucket da Amazon
+    2) envia GetItems em lotes de até 10 ASINs
+    3) distribui os resultados de volta para cada produto
+    """
+    if not amazon_credenciais_ok():
+        return [(tarefa, {"erro": "Credenciais Amazon não configuradas"}) for tarefa in tarefas]
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="asin") as executor:
+        asins = list(executor.map(lambda tarefa: amazon_extrair_asin(tarefa[2]), tarefas))
+    
+    unicos = list(dict.fromkeys(asin for asin in asins if asin))
+    logging.info(f"Amazon: {len(unicos)} ASINs em {-(-len(unicos) // AMAZON_LOTE_MAX)} requisições GetItems")
+    resultados = amazon_buscar_lote(unicos)
+    
+    return [
+        (tarefa, resultados[asin] if asin else {"erro": "Não consegui extrair ASIN da URL"})
+        for tarefa, asin in zip(tarefas, asins)
+    ]
+
+
+# =====================================================
+# FUNÇÃO PRINCIPAL - DETECTAR LOJA E SCRAPE
+# =====================================================
+
+def detectar_loja(url):
+    """Detecta a loja pelo URL (None se não suportada)"""
+    url_lower = url.lower()
+    
+    if 'mercadolivre' in url_lower or 'mercadolibre' in url_lower:
+        return 'Mercado Livre'
+    elif 'shopee' in url_lower:
+        return 'Shopee'
+    elif 'magazineluiza' in url_lower or 'magalu' in url_lower:
+        return 'Magazine Luiza'
+    elif 'amazon' in url_lower or 'amzn' in url_lower:
+        return 'Amazon'
+    
+    return None
+
+
+def scrape_preco(url, store_name=None):
+    """
+    Detecta a loja pelo URL e faz o scraping apropriado.
+    
+    Args:
+        url: URL do produto
+        store_name: Nome da loja (opcional, detecta automaticamente)
+    
+    Retorna:
+        dict com preco, titulo, imagem, disponivel, erro
+    """
+    
+    if not url:
+        return {"erro": "URL vazia"}
+    
+    # Detectar loja pela URL ou usar nome fornecido
+    loja = store_name or detectar_loja(url)
+    if not loja:
+        return {"erro": f"Loja não suportada: {url[:50]}"}
+    
+    logging.info(f"Scraping {loja}: {url[:60]}...")
+    
+    if loja == 'Mercado Livre':
+        return scrape_mercadolivre(url)
+    elif loja == 'Shopee':
+        return scrape_shopee(url)
+    elif loja == 'Magazine Luiza':
+        return scrape_magalu(url)
+    elif loja == 'Amazon':
+        return scrape_amazon_api(url)
+    else:
+        return {"erro": f"Loja não implementada: {loja}"}
+
+
+# =====================================================
+# MOTOR CONCORRENTE (UMA FILA POR LOJA)
+# =====================================================
+
+def coletar_tarefas(produtos, lojas):
+    """Lista (indice_produto, loja, link) de tudo que precisa ser atualizado"""
+    tarefas = []
+    for i, produto in enumerate(produtos):
+        precos = produto.get('prices', {})
+        for loja in lojas:
+            if loja not in precos:
+                continue
+            link = precos[loja].get('link', '')
+            if link:
+                tarefas.append((i, loja, link))
+    return tarefas
+
+
+def executar_tarefas(tarefas, workers=2):
+    """
+    Executa as tarefas com um pool de threads por loja, todas as lojas ao mesmo tempo.
+    Cada loja tem seu próprio token bucket, então o tempo total é ditado pela
+    loja mais lenta e não pela soma de todas. Lojas em EXECUTORES_LOTE
+    (ex: Amazon) são processadas em lote por uma única tarefa.
+
+    Gera (tarefa, dados) na ordem em que as requisições terminam.
+    """
+    por_loja = {}
+    for tarefa in tarefas:
+        por_loja.setdefault(tarefa[1], []).append(tarefa)
+
+    LIMITADORES.update({loja: TokenBucket.da_loja(loja) for loja in por_loja})
+
+    def rodar(tarefa):
+        return [(tarefa, scrape_preco(tarefa[2], tarefa[1]))]
+
+    executores = []
+    futuros = {}
     try:
-        # AWS Signature v4
-        host = "webservices.amazon.com.br"
-        region = "us-east-1"
-        service = "ProductAdvertisingAPI"
-        
-        t = datetime.now(timezone.utc)
-        amz_date = t.strftime('%Y%m%dT%H%M%SZ')
-        date_stamp = t.strftime('%Y%m%d')
-        
-        payload = {
-            "ItemIds": [asin],
-            "Resources": [
-                "Images.Primary.Large",
-                "ItemInfo.Title",
-                "Offers.Listings.Price"
-            ],
-            "PartnerTag": AMAZON_PARTNER_TAG,
-            "PartnerType": "Associates",
-            "Marketplace": "www.amazon.com.br"
-        }
-        payload_json = json.dumps(payload, separators=(',', ':'))
-        
-        def sign(key, msg):
-            return hmac.new(key, msg.encode('utf-8'), hashlib.sha256).digest()
-        
-        def get_signature_key(key, date_stamp, region, service):
-            k_date = sign(('AWS4' + key).encode('utf-8'), date_stamp)
-            k_region = sign(k_date, region)
-            k_service = sign(k_region, service)
-            k_signing = sign(k_service, 'aws4_request')
-            return k_signing
-        
-        method = 'POST'
-        canonical_uri = '/paapi5/getitems'
-        canonical_querystring = ''
-        
-        payload_hash = hashlib.sha256(payload_json.encode('utf-8')).hexdigest()
-        
-        canonical_headers = (
-            f'content-encoding:amz-1.0\n'
-            f'content-type:application/json; charset=utf-8\n'
-            f'host:{host}\n'
-            f'x-amz-date:{amz_date}\n'
-            f'x-amz-target:com.amazon.paapi5.v1.ProductAdvertisingAPIv1.GetItems\n'
-        )
-        signed_headers = 'content-encoding;content-type;host;x-amz-date;x-amz-target'
-        
-        canonical_request = (
-            f'{method}\n{canonical_uri}\n{canonical_querystring}\n'
-            f'{canonical_headers}\n{signed_headers}\n{payload_hash}'
+        for loja, lista in por_loja.items():
+            executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=f"scraper-{loja}")
+            executores.append(executor)
+            if loja in EXECUTORES_LOTE:
+                futuros[executor.submit(EXECUTORES_LOTE[loja], lista, workers)] = lista
+            else:
+                for tarefa in lista:
+                    futuros[executor.submit(rodar, tarefa)] = [tarefa]
+
+        for futuro in as_completed(futuros):
+            try:
+                pares = futuro.result()
+            except Exception as e:
+                pares = [(tarefa, {"erro": str(e)}) for tarefa in futuros[futuro]]
+            yield from pares
+    finally:
+        for executor in executores:
+            executor.shutdown(wait=False, cancel_futures=True)
+        LIMITADORES.clear()
+
+
+# Lojas com atualização em lote: loja -> função(tarefas, workers) -> [(tarefa, dados)]
+EXECUTORES_LOTE = {
+    "Amazon": executar_lote_amazon,
+    "Shopee": executar_lote_shopee,
+}
+
+
+# =====================================================
+# MODO ASSÍNCRONO (HTTPX, CONEXÕES REAPROVEITADAS)
+# =====================================================
+# Mesmo fluxo dos scrapers síncronos, mas com um AsyncClient keep-alive
+# (HTTP/2 quando o pacote h2 está instalado) por loja. O parse é o mesmo.
+
+async def aguardar_vez_async(loja):
+    """Versão assíncrona de aguardar_vez (não bloqueia o event loop)"""
+    limitador = LIMITADORES.get(loja)
+    if limitador:
+        espera = limitador.reservar()
+    else:
+        delay = STORE_CONFIGS.get(loja, STORE_CONFIGS["default"])["delay"]
+        espera = random.uniform(*delay)
+    if espera > 0:
+        await asyncio.sleep(espera)
+
+
+async def resolver_link_da_loja_async(url, cliente, loja):
+    """
+    Versão assíncrona de resolver_link_da_loja: a resolução ocupa uma das
+    `workers` vagas da loja (SEMAFOROS_ASYNC) e espera o token bucket.
+    """
+    if not precisa_resolver(url):
+        return await resolver_link_async(url, cliente)
+    async with SEMAFOROS_ASYNC.get(loja) or contextlib.nullcontext():
+        await aguardar_vez_async(loja)
+        return await resolver_link_async(url, cliente)
+
+
+def criar_clientes_async(lojas, workers=2):
+    """Cria um httpx.AsyncClient por loja com pool de conexões persistente"""
+    if httpx is None:
+        raise RuntimeError("Modo assíncrono requer httpx (pip install 'httpx[http2]')")
+    
+    limites = httpx.Limits(max_connections=max(1, workers) * 2, max_keepalive_connections=max(1, workers) * 2)
+    return {
+        loja: httpx.AsyncClient(
+            http2=HTTP2_DISPONIVEL,
+            timeout=30,
+            follow_redirects=True,
+            limits=limites,
         )
+        for loja in lojas
+    }
+
+
+async def scrape_mercadolivre_async(url, cliente):
+    try:
+        await aguardar_vez_async("Mercado Livre")
         
-        algorithm = 'AWS4-HMAC-SHA256'
-        credential_scope = f'{date_stamp}/{region}/{service}/aws4_request'
+        response = await cliente.get(url_resolvida(url), headers={**get_headers(), **CACHE_HTTP.cabecalhos(url)})
+        registrar_redirect(url, response.url, response.status_code)
         
-        string_to_sign = (
-            f'{algorithm}\n{amz_date}\n{credential_scope}\n'
-            f'{hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()}'
+        # 304 ou corpo idêntico -> reaproveita o resultado anterior sem parse.
+        # Parse do HTML e gravação no SQLite numa thread: não travam as outras lojas
+        return await asyncio.to_thread(
+            CACHE_HTTP.processar, url, response.status_code, response.headers, response.text, parse_mercadolivre
         )
         
-        signing_key = get_signature_key(AMAZON_SECRET_KEY, date_stamp, region, service)
-        signature = hmac.new(signing_key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
-        
-        authorization_header = (
-            f'{algorithm} Credential={AMAZON_ACCESS_KEY}/{credential_scope}, '
-            f'SignedHeaders={signed_headers}, Signature={signature}'
-        )
+    except Exception as e:
+        return {"erro": str(e)}
+
+
+async def scrape_magalu_async(url, cliente):
+    try:
+        await aguardar_vez_async("Magazine Luiza")
         
-        headers = {
-            'content-encoding': 'amz-1.0',
-            'content-type': 'application/json; charset=utf-8',
-            'host': host,
-            'x-amz-date': amz_date,
-            'x-amz-target': 'com.amazon.paapi5.v1.ProductAdvertisingAPIv1.GetItems',
-            'Authorization': authorization_header
-        }
+        response = await cliente.get(url_resolvida(url), headers={**get_headers(), **CACHE_HTTP.cabecalhos(url)})
+        registrar_redirect(url, response.url, response.status_code)
         
-        response = requests.post(
-            f'https://{host}{canonical_uri}',
-            headers=headers,
-            data=payload_json,
-            timeout=15
+        # 304 ou corpo idêntico -> reaproveita o resultado anterior sem parse.
+        # Parse do HTML e gravação no SQLite numa thread: não travam as outras lojas
+        return await asyncio.to_thread(
+            CACHE_HTTP.processar, url, response.status_code, response.headers, response.text, parse_magalu
         )
         
-        if response.status_code != 200:
-            error_data = response.json() if response.text else {}
-            error_msg = error_data.get('Errors', [{}])[0].get('Message', f'Status {response.status_code}')
-            return {"erro": error_msg}
-        
-        data = response.json()
-        
-        if 'ItemsResult' not in data or not data['ItemsResult'].get('Items'):
-            return {"erro": "Produto não encontrado"}
+    except Exception as e:
+        return {"erro": str(e)}
+
+
+async def shopee_fazer_requisicao_async(query, cliente):
+    headers, payload = shopee_montar_requisicao(query)
+    
+    response = await cliente.post(SHOPEE_API_URL, headers=headers, content=payload)
+    
+    try:
+        return response.json()
+    except:
+        return {"error": f"Resposta inválida: {response.text[:100]}"}
+
+
+async def shopee_buscar_lote_async(urls, cliente):
+    """Versão assíncrona de shopee_buscar_lote"""
+    curtas = [url for url in dict.fromkeys(urls) if eh_link_curto(url)]
+    finais = await asyncio.gather(*(resolver_link_da_loja_async(url, cliente, "Shopee") for url in curtas))
+    resolvidas = {url: final for url, (final, _) in zip(curtas, finais) if final}
+    validas, resultados = shopee_preparar_lote(urls, resolvidas)
+    
+    for inicio in range(0, len(validas), SHOPEE_LOTE_MAX):
+        lote = validas[inicio:inicio + SHOPEE_LOTE_MAX]
+        try:
+            await aguardar_vez_async("Shopee")
+            result = await shopee_fazer_requisicao_async(shopee_query_lote([(s, i) for _, s, i in lote]), cliente)
+            respostas_produto = shopee_separar_lote(result, "p", len(lote))
+            
+            _, encontrados = shopee_aplicar_lote(lote, respostas_produto, None)
+            respostas_link = None
+            if encontrados:
+                await aguardar_vez_async("Shopee")
+                result = await shopee_fazer_requisicao_async(shopee_mutation_lote(encontrados), cliente)
+                respostas_link = shopee_separar_lote(result, "l", len(encontrados))
+            
+            parciais, _ = shopee_aplicar_lote(lote, respostas_produto, respostas_link)
+            resultados.update(parciais)
+        except Exception as e:
+            resultados.update({url: {"erro": f"Erro API Shopee: {str(e)[:50]}"} for url, _, _ in lote})
+    
+    return resultados
+
+
+async def executar_lote_shopee_async(tarefas, cliente):
+    resultados = await shopee_buscar_lote_async([tarefa[2] for tarefa in tarefas], cliente)
+    return [(tarefa, resultados[tarefa[2]]) for tarefa in tarefas]
+
+
+async def scrape_shopee_async(url, cliente):
+    try:
+        await aguardar_vez_async("Shopee")
         
-        item = data['ItemsResult']['Items'][0]
-        resultado = {'loja': 'Amazon'}
+        url_final, _ = await resolver_link_async(url, cliente)
+        shop_id, item_id = shopee_extrair_ids_da_url(url_final or url, resolver=False)
         
-        if 'ItemInfo' in item and 'Title' in item['ItemInfo']:
-            resultado['titulo'] = item['ItemInfo']['Title'].get('DisplayValue', '')
+        if not shop_id or not item_id:
+            return {"erro": "Não foi possível extrair IDs da URL Shopee"}
         
-        if 'Offers' in item and 'Listings' in item['Offers']:
-            listings = item['Offers']['Listings']
-            if listings:
-                price_info = listings[0].get('Price', {})
-                resultado['preco'] = price_info.get('Amount', 0)
+        result = await shopee_fazer_requisicao_async(shopee_query_produto(shop_id, item_id), cliente)
+        resultado = shopee_parse_produto(result)
         
-        if 'Images' in item and 'Primary' in item['Images']:
-            resultado['imagem'] = item['Images']['Primary'].get('Large', {}).get('URL', '')
+        if 'erro' in resultado:
+            return resultado
         
-        resultado['disponivel'] = True
+        result = await shopee_fazer_requisicao_async(shopee_query_link_afiliado(url), cliente)
+        link_afiliado = shopee_parse_link_afiliado(result)
+        if link_afiliado:
+            resultado['link_afiliado'] = link_afiliado
         
         if not resultado.get('preco'):
-            return {"erro": "Preço não encontrado na API"}
+            return {"erro": "Preço não encontrado na API Shopee"}
         
         return resultado
         
     except Exception as e:
-        return {"erro": str(e)}
+        return {"erro": f"Erro API Shopee: {str(e)[:50]}"}
 
 
-# =====================================================
-# FUNÇÃO PRINCIPAL - DETECTAR LOJA E SCRAPE
-# =====================================================
+async def amazon_extrair_asin_async(url, cliente):
+    asin = amazon_asin_da_url(url)
+    if not asin and 'amzn' in url:
+        url_final, _ = await resolver_link_da_loja_async(url, cliente, "Amazon")
+        if url_final:
+            asin = amazon_asin_da_url(url_final)
+    return asin
 
-def scrape_preco(url, store_name=None):
+
+async def amazon_buscar_lote_async(asins, cliente):
+    """Versão assíncrona de amazon_buscar_lote"""
+    asins = list(dict.fromkeys(asins))
+    resultados = {}
+    
+    for inicio in range(0, len(asins), AMAZON_LOTE_MAX):
+        lote = asins[inicio:inicio + AMAZON_LOTE_MAX]
+        await aguardar_vez_async("Amazon")
+        
+        try:
+            endpoint, headers, payload_json = amazon_montar_requisicao(lote)
+            response = await cliente.post(endpoint, headers=headers, content=payload_json, timeout=15)
+            data = response.json() if response.text else {}
+            resultados.update(amazon_distribuir_lote(lote, data, response.status_code))
+        except Exception as e:
+            resultados.update({asin: {"erro": str(e)} for asin in lote})
+    
+    return resultados
+
+
+async def scrape_amazon_api_async(url, cliente):
+    if not amazon_credenciais_ok():
+        return {"erro": "Credenciais Amazon não configuradas"}
+    
+    asin = await amazon_extrair_asin_async(url, cliente)
+    
+    if not asin:
+        return {"erro": "Não consegui extrair ASIN da URL"}
+    
+    return (await amazon_buscar_lote_async([asin], cliente))[asin]
+
+
+async def executar_lote_amazon_async(tarefas, cliente):
+    """Versão assíncrona de executar_lote_amazon"""
+    if not amazon_credenciais_ok():
+        return [(tarefa, {"erro": "Credenciais Amazon não configuradas"}) for tarefa in tarefas]
+    
+    asins = await asyncio.gather(*(amazon_extrair_asin_async(tarefa[2], cliente) for tarefa in tarefas))
+    resultados = await amazon_buscar_lote_async([asin for asin in asins if asin], cliente)
+    
+    return [
+        (tarefa, resultados[asin] if asin else {"erro": "Não consegui extrair ASIN da URL"})
+        for tarefa, asin in zip(tarefas, asins)
+    ]
+
+
+async def scrape_preco_async(url, store_name=None, clientes=None):
     """
-    Detecta a loja pelo URL e faz o scraping apropriado.
+    Versão assíncrona de scrape_preco.
     
     Args:
         url: URL do produto
         store_name: Nome da loja (opcional, detecta automaticamente)
-    
-    Retorna:
-        dict com preco, titulo, imagem, disponivel, erro
+        clientes: dict loja -> httpx.AsyncClient (ver criar_clientes_async)
     """
-    
     if not url:
         return {"erro": "URL vazia"}
     
-    url_lower = url.lower()
-    
-    # Detectar loja pela URL ou usar nome fornecido
-    if store_name:
-        loja = store_name
-    elif 'mercadolivre' in url_lower or 'mercadolibre' in url_lower:
-        loja = 'Mercado Livre'
-    elif 'shopee' in url_lower:
-        loja = 'Shopee'
-    elif 'magazineluiza' in url_lower or 'magalu' in url_lower:
-        loja = 'Magazine Luiza'
-    elif 'amazon' in url_lower or 'amzn' in url_lower:
-        loja = 'Amazon'
-    else:
+    loja = store_name or detectar_loja(url)
+    if not loja:
         return {"erro": f"Loja não suportada: {url[:50]}"}
     
-    logging.info(f"Scraping {loja}: {url[:60]}...")
+    if not clientes or loja not in clientes:
+        return {"erro": f"Sem cliente HTTP para {loja}"}
     
+    logging.info(f"Scraping {loja} (async): {url[:60]}...")
+    
+    cliente = clientes[loja]
     if loja == 'Mercado Livre':
-        return scrape_mercadolivre(url)
+        return await scrape_mercadolivre_async(url, cliente)
     elif loja == 'Shopee':
-        return scrape_shopee(url)
+        return await scrape_shopee_async(url, cliente)
     elif loja == 'Magazine Luiza':
-        return scrape_magalu(url)
+        return await scrape_magalu_async(url, cliente)
     elif loja == 'Amazon':
-        return scrape_amazon_api(url)
+        return await scrape_amazon_api_async(url, cliente)
     else:
         return {"erro": f"Loja não implementada: {loja}"}
 
 
+async def executar_tarefas_async(tarefas, workers=2):
+    """
+    Equivalente assíncrono de executar_tarefas: mesmas filas/token buckets por loja,
+    no máximo `workers` requisições em voo por loja, um cliente HTTP por loja.
+
+    Gera (tarefa, dados) na ordem em que as requisições terminam.
+    """
+    por_loja = {}
+    for tarefa in tarefas:
+        por_loja.setdefault(tarefa[1], []).append(tarefa)
+    
+    LIMITADORES.update({loja: TokenBucket.da_loja(loja) for loja in por_loja})
+    SEMAFOROS_ASYNC.update({loja: asyncio.Semaphore(max(1, workers)) for loja in por_loja})
+    clientes = criar_clientes_async(list(por_loja), workers)
+    
+    async def rodar(tarefa):
+        async with SEMAFOROS_ASYNC[tarefa[1]]:
+            try:
+                dados = await scrape_preco_async(tarefa[2], tarefa[1], clientes)
+            except Exception as e:
+                dados = {"erro": str(e)}
+        return [(tarefa, dados)]
+    
+    async def rodar_lote(loja, lista):
+        try:
+            return await EXECUTORES_LOTE_ASYNC[loja](lista, clientes[loja])
+        except Exception as e:
+            return [(tarefa, {"erro": str(e)}) for tarefa in lista]
+    
+    trabalhos = []
+    for loja, lista in por_loja.items():
+        if loja in EXECUTORES_LOTE_ASYNC:
+            trabalhos.append(rodar_lote(loja, lista))
+        else:
+            trabalhos.extend(rodar(tarefa) for tarefa in lista)
+    
+    try:
+        for proximo in asyncio.as_completed(trabalhos):
+            for par in await proximo:
+                yield par
+    finally:
+        for cliente in clientes.values():
+            await cliente.aclose()
+        LIMITADORES.clear()
+        SEMAFOROS_ASYNC.clear()
+
+
+EXECUTORES_LOTE_ASYNC = {
+    "Amazon": executar_lote_amazon_async,
+    "Shopee": executar_lote_shopee_async,
+}
+
+
 # =====================================================
 # ATUALIZAR PRODUCTS.JSON
 # =====================================================
 
-def atualizar_products_json(caminho_json, dry_run=False, lojas=None):
+def aplicar_resultado(produtos, tarefa, dados, stats, dry_run, progresso=""):
+    """Aplica o resultado de uma tarefa no produto e contabiliza nas stats"""
+    i, loja, link = tarefa
+    produto = produtos[i]
+    precos = produto['prices']
+    nome = produto.get('name', 'Sem nome')[:40]
+    
+    prefixo = f"{progresso} {loja} | {nome}:".strip()
+    
+    if 'erro' in dados:
+        print(f"{prefixo} ❌ {dados['erro']}")
+        stats[loja]['erros'] += 1
+        return
+    
+    preco_antigo = precos[loja].get('price', 0)
+    preco_novo = dados.get('preco', preco_antigo)
+    
+    if preco_novo and preco_novo != preco_antigo:
+        print(f"{prefixo} R${preco_antigo} → R${preco_novo}")
+        
+        if not dry_run:
+            precos[loja]['price'] = preco_novo
+            produto['last_update'] = datetime.now().strftime('%Y-%m-%d %H:%M')
+        
+        stats[loja]['atualizados'] += 1
+    else:
+        print(f"{prefixo} R${preco_novo} (sem alteração)")
+        stats[loja]['sem_alteracao'] += 1
+
+
+def atualizar_products_json(caminho_json, dry_run=False, lojas=None, workers=2, modo_async=False):
     """
     Atualiza preços de todas as lojas no products.json.
     
@@ -698,6 +1506,8 @@ def atualizar_products_json(caminho_json, dry_run=False, lojas=None):
         caminho_json: Caminho para o arquivo
         dry_run: Se True, não salva alterações
         lojas: Lista de lojas para atualizar (None = todas)
+        workers: Requisições simultâneas por loja (limitadas pelo token bucket)
+        modo_async: Usa httpx assíncrono com conexões persistentes por loja
     """
     
     if lojas is None:
@@ -713,49 +1523,26 @@ def atualizar_products_json(caminho_json, dry_run=False, lojas=None):
     with open(caminho, 'r', encoding='utf-8') as f:
         produtos = json.load(f)
     
-    print(f"📦 {len(produtos)} produtos encontrados")
+    tarefas = coletar_tarefas(produtos, lojas)
+    
+    print(f"📦 {len(produtos)} produtos encontrados ({len(tarefas)} links)")
     print(f"🏪 Lojas: {', '.join(lojas)}")
+    print(f"🧵 Workers por loja: {workers}{' (async)' if modo_async else ''}")
     print("=" * 60)
     
     stats = {loja: {'atualizados': 0, 'erros': 0, 'sem_alteracao': 0} for loja in lojas}
+    inicio = time.monotonic()
     
-    for i, produto in enumerate(produtos):
-        nome = produto.get('name', 'Sem nome')[:40]
-        precos = produto.get('prices', {})
-        
-        print(f"\n[{i+1}/{len(produtos)}] {nome}")
-        
-        for loja in lojas:
-            if loja not in precos:
-                continue
-            
-            link = precos[loja].get('link', '')
-            if not link:
-                continue
-            
-            print(f"   🔗 {loja}: ", end='', flush=True)
-            
-            dados = scrape_preco(link, loja)
-            
-            if 'erro' in dados:
-                print(f"❌ {dados['erro']}")
-                stats[loja]['erros'] += 1
-                continue
-            
-            preco_antigo = precos[loja].get('price', 0)
-            preco_novo = dados.get('preco', preco_antigo)
-            
-            if preco_novo and preco_novo != preco_antigo:
-                print(f"R${preco_antigo} → R${preco_novo}")
-                
-                if not dry_run:
-                    precos[loja]['price'] = preco_novo
-                    produto['last_update'] = datetime.now().strftime('%Y-%m-%d %H:%M')
-                
-                stats[loja]['atualizados'] += 1
-            else:
-                print(f"R${preco_novo} (sem alteração)")
-                stats[loja]['sem_alteracao'] += 1
+    if modo_async:
+        async def consumir():
+            n = 0
+            async for tarefa, dados in executar_tarefas_async(tarefas, workers=workers):
+                n += 1
+                aplicar_resultado(produtos, tarefa, dados, stats, dry_run, f"[{n}/{len(tarefas)}]")
+        asyncio.run(consumir())
+    else:
+        for n, (tarefa, dados) in enumerate(executar_tarefas(tarefas, workers=workers), start=1):
+            aplicar_resultado(produtos, tarefa, dados, stats, dry_run, f"[{n}/{len(tarefas)}]")
     
     # Resumo
     print("\n" + "=" * 60)
@@ -774,6 +1561,12 @@ def atualizar_products_json(caminho_json, dry_run=False, lojas=None):
             total_erros += s['erros']
     
     print(f"\n   📦 Total: {total_atualizados} atualizados, {total_erros} erros")
+    print(f"   ⏱️ Tempo: {time.monotonic() - inicio:.1f}s")
+    
+    cache = CACHE_HTTP.stats
+    if sum(cache.values()):
+        print(f"   🗄️ Cache HTTP: {cache['nao_modificado']} não modificadas (304), "
+              f"{cache['corpo_identico']} idênticas, {cache['parseado']} parseadas")
     
     if not dry_run and total_atualizados > 0:
         import shutil
@@ -802,6 +1595,8 @@ if __name__ == "__main__":
     parser.add_argument('--dry-run', '-d', action='store_true', help='Não salvar alterações')
     parser.add_argument('--lojas', '-l', nargs='+', help='Lojas específicas para atualizar')
     parser.add_argument('--test', '-t', help='Testar URL específica')
+    parser.add_argument('--workers', '-w', type=int, default=2, help='Requisições simultâneas por loja (padrão: 2)')
+    parser.add_argument('--async', dest='modo_async', action='store_true', help='Usar httpx assíncrono (conexões reaproveitadas)')
     
     args = parser.parse_args()
     
@@ -809,11 +1604,23 @@ if __name__ == "__main__":
         print("=" * 60)
         print("🧪 Teste de URL")
         print("=" * 60)
-        resultado = scrape_preco(args.test)
+        if args.modo_async:
+            async def testar():
+                loja = detectar_loja(args.test)
+                clientes = criar_clientes_async([loja] if loja else [])
+                try:
+                    return await scrape_preco_async(args.test, loja, clientes)
+                finally:
+                    for cliente in clientes.values():
+                        await cliente.aclose()
+            resultado = asyncio.run(testar())
+        else:
+            resultado = scrape_preco(args.test)
         print(json.dumps(resultado, indent=2, ensure_ascii=False))
     
     elif args.update:
-        atualizar_products_json(args.update, dry_run=args.dry_run, lojas=args.lojas)
+        atualizar_products_json(args.update, dry_run=args.dry_run, lojas=args.lojas,
+                                workers=args.workers, modo_async=args.modo_async)
     
     else:
         # Teste padrão
@@ -833,5 +1640,6 @@ if __name__ == "__main__":
         print("💡 Uso:")
         print("   python price_scraper_v2.py --update ../public/data/products.json")
         print("   python price_scraper_v2.py --update ../public/data/products.json --dry-run")
+        print("   python price_scraper_v2.py --update ../public/data/products.json --async")
         print("   python price_scraper_v2.py --test 'URL_DO_PRODUTO'")
         print("=" * 60)
@@ -2,6 +2,7 @@ import os
 import logging
 import sys
 import re
+import threading
 from pathlib import Path
 from telegram import Update
 from telegram.ext import ApplicationBuilder, ContextTypes, CommandHandler, MessageHandler, filters
@@ -10,13 +11,20 @@ from dotenv import load_dotenv
 project_root = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(project_root))
 
+from scripts.utils.browser_pool import POOL, MAX_SESSOES
 from scripts.utils.extractor import extract_metadata
+from scripts.utils.job_queue import FilaExtracao
+from scripts.utils.links import chave_canonica
 from scripts.utils.converter import convert_link
 from scripts.utils.image_generator import generate_social_art
 
 load_dotenv()
 TOKEN = os.getenv("TELEGRAM_TOKEN")
 
+# Extrações simultâneas (padrão: uma por navegador do pool)
+WORKERS = int(os.getenv("BOT_WORKERS", str(MAX_SESSOES)))
+FILA = FilaExtracao(extract_metadata, workers=WORKERS, chave=chave_canonica)
+
 logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s',
     level=logging.INFO
@@ -34,10 +42,23 @@ async def handle_link(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not url_match: return
     
     raw_url = url_match.group(1)
-    status = await update.message.reply_text("🔎 **Analisando...**", parse_mode='Markdown')
+    status = await update.message.reply_text("📥 **Recebido...**", parse_mode='Markdown')
+    ultimo_texto = [None]
+    concluido = [False]  # Depois do resultado, a posição na fila não edita mais o status
+
+    async def mostrar_posicao(posicao):
+        if concluido[0]: return
+        texto = "🔎 **Analisando...**" if posicao == 0 else f"⏳ **Na fila** (posição {posicao})"
+        if texto == ultimo_texto[0]: return
+        ultimo_texto[0] = texto
+        await status.edit_text(texto, parse_mode='Markdown')
     
+    img_path = None
     try:
-        data = await extract_metadata(raw_url)
+        try:
+            data = await FILA.enviar(update.effective_user.id, raw_url, mostrar_posicao)
+        finally:
+            concluido[0] = True
         
         if not data:
             await status.edit_text("❌ Erro ao ler produto.")
@@ -73,13 +94,12 @@ async def handle_link(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         # --- ENVIO ---
         if img_path and os.path.exists(img_path):
-            await update.message.reply_photo(
-                photo=open(img_path, 'rb'),
-                caption=caption,
-                parse_mode='HTML'
-            )
-            try: os.remove(img_path)
-            except: pass
+            with open(img_path, 'rb') as foto:
+                await update.message.reply_photo(
+                    photo=foto,
+                    caption=caption,
+                    parse_mode='HTML'
+                )
         else:
             # Se não tiver arte, manda só o texto
             await update.message.reply_text(caption, parse_mode='HTML', disable_web_page_preview=False)
@@ -89,11 +109,19 @@ async def handle_link(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception as e:
         logging.error(f"Erro: {e}")
         await status.edit_text(f"❌ Erro: {str(e)}")
+    finally:
+        # A arte é um arquivo temporário por pedido
+        if img_path:
+            try: os.remove(img_path)
+            except OSError: pass
 
 if __name__ == '__main__':
     if not TOKEN: exit(1)
     print("🤖 Bot Iniciado!")
-    app = ApplicationBuilder().token(TOKEN).build()
+    # Abre o(s) navegador(es) do extrator já com cookies da Shopee, sem travar o bot
+    threading.Thread(target=POOL.aquecer, name="aquecer-pool", daemon=True).start()
+    # Handlers em paralelo: quem limita as extrações é a FILA
+    app = ApplicationBuilder().token(TOKEN).concurrent_updates(True).build()
     app.add_handler(CommandHandler("start", start))
     app.add_handler(MessageHandler(filters.Entity("url"), handle_link))
     app.run_polling()
\ No newline at end of file
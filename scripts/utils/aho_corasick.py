@@ -0,0 +1,87 @@
+"""
+Busca de várias palavras-chave de uma vez (Aho-Corasick)
+Em Casa com Cecília
+
+Monta o autômato uma vez a partir de uma lista de termos e, depois, cada
+texto é percorrido uma única vez, não importa quantos termos existam.
+A busca é por substring (como `termo in texto`) e sem diferenciar maiúsculas.
+"""
+
+from collections import deque
+
+
+class AhoCorasick:
+
+    def __init__(self, termos=()):
+        """
+        Args:
+            termos: iterável de termos (str) ou de pares (termo, valor).
+                    O valor é devolvido em cada ocorrência (padrão: o próprio termo).
+        """
+        self._filhos = [{}]     # estado -> {caractere: estado}
+        self._falha = [0]
+        self._saidas = [[]]     # estado -> [(termo, valor)] que terminam aqui
+        self._compilado = False
+        for termo in termos:
+            if isinstance(termo, str):
+                self.adicionar(termo)
+            else:
+                self.adicionar(*termo)
+
+    def adicionar(self, termo, valor=None):
+        if self._compilado:
+            raise RuntimeError("autômato já compilado")
+        termo = termo.lower()
+        if not termo:
+            return
+        estado = 0
+        for c in termo:
+            prox = self._filhos[estado].get(c)
+            if prox is None:
+                prox = len(self._filhos)
+                self._filhos[estado][c] = prox
+                self._filhos.append({})
+                self._falha.append(0)
+                self._saidas.append([])
+            estado = prox
+        self._saidas[estado].append((termo, termo if valor is None else valor))
+
+    def compilar(self):
+        """Calcula os links de falha (BFS). Chamado sozinho na primeira busca."""
+        # Filhos da raiz falham para a raiz (já é 0)
+        fila = deque(self._filhos[0].values())
+        while fila:
+            estado = fila.popleft()
+            for c, prox in self._filhos[estado].items():
+                fila.append(prox)
+                f = self._falha[estado]
+                while f and c not in self._filhos[f]:
+                    f = self._falha[f]
+                self._falha[prox] = self._filhos[f].get(c, 0)
+                # Termos que terminam no estado de falha também terminam aqui
+                self._saidas[prox] = self._saidas[prox] + self._saidas[self._falha[prox]]
+        self._compilado = True
+        return self
+
+    def buscar(self, texto):
+        """Gera (posição_final, termo, valor) para cada ocorrência no texto"""
+        if not self._compilado:
+            self.compilar()
+        filhos, falha, saidas = self._filhos, self._falha, self._saidas
+        estado = 0
+        for i, c in enumerate(texto.lower()):
+            while estado and c not in filhos[estado]:
+                estado = falha[estado]
+            estado = filhos[estado].get(c, 0)
+            for termo, valor in saidas[estado]:
+                yield i, termo, valor
+
+    def encontrados(self, texto):
+        """Termos distintos presentes no texto -> valor"""
+        return {termo: valor for _, termo, valor in self.buscar(texto)}
+
+    def contem(self, texto):
+        """True se algum termo aparece no texto (para na primeira ocorrência)"""
+        for _ in self.buscar(texto):
+            return True
+        return False
@@ -0,0 +1,188 @@
+"""
+Pool de navegadores SeleniumBase (UC) já aquecidos
+Em Casa com Cecília
+
+Abrir um Chrome indetectável custa vários segundos por mensagem do bot. O
+pool mantém algumas sessões vivas e as empresta para o extrator:
+- no máximo BROWSER_POOL_MAX sessões (padrão 2); quem chega com todas
+  emprestadas espera uma voltar;
+- sessões paradas há mais de BROWSER_POOL_IDLE segundos (padrão 900) são
+  fechadas, mas BROWSER_POOL_MIN (padrão 1) continuam abertas;
+- cada sessão guarda os cookies da Shopee depois da primeira visita à home
+  e só reaquece depois de SHOPEE_REAQUECER segundos;
+- sessão que deu erro ou já atendeu MAX_USOS pedidos é descartada.
+
+Uso:
+    with POOL.emprestar() as sessao:
+        sessao.abrir(url)
+        sessao.sb.get_text("h1")
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from seleniumbase import SB
+
+OPCOES_SB = {"uc": True, "headless": True, "page_load_strategy": "eager"}
+
+MAX_SESSOES = int(os.getenv("BROWSER_POOL_MAX", "2"))
+MIN_SESSOES = int(os.getenv("BROWSER_POOL_MIN", "1"))
+OCIOSO_MAX = float(os.getenv("BROWSER_POOL_IDLE", "900"))
+MAX_USOS = 50
+SHOPEE_HOME = "https://shopee.com.br"
+SHOPEE_REAQUECER = 30 * 60
+
+
+class Sessao:
+    """Um navegador UC aberto (contexto SB mantido aberto até fechar())"""
+
+    def __init__(self):
+        self._cm = SB(**OPCOES_SB)
+        self.sb = self._cm.__enter__()
+        self.cdp_ativo = False
+        self.usos = 0
+        self.usada_em = time.monotonic()
+        self.shopee_em = None
+        self.saudavel = True
+
+    def abrir(self, url):
+        """Navega em modo CDP (ativa na primeira vez)"""
+        if not self.cdp_ativo:
+            self.sb.activate_cdp_mode(url)
+            self.cdp_ativo = True
+        else:
+            self.sb.cdp.open(url)
+
+    def garantir_shopee(self):
+        """Deixa a aba numa página da Shopee com cookies válidos (fetch same-origin na API)"""
+        aquecida = self.shopee_em and time.monotonic() - self.shopee_em < SHOPEE_REAQUECER
+        if aquecida and "shopee.com.br" in (self.url_atual() or ""):
+            return
+        self.abrir(SHOPEE_HOME)
+        if not aquecida:
+            self.sb.sleep(3)  # Primeira visita: a Shopee ainda está gravando os cookies
+            self.shopee_em = time.monotonic()
+
+    def url_atual(self):
+        try:
+            return self.sb.get_current_url()
+        except Exception:
+            return None
+
+    def fechar(self):
+        try:
+            self._cm.__exit__(None, None, None)
+        except Exception as e:
+            logging.warning(f"⚠️ Erro ao fechar navegador do pool: {e}")
+
+
+class PoolNavegadores:
+
+    def __init__(self, max_sessoes=MAX_SESSOES, min_sessoes=MIN_SESSOES, ocioso_max=OCIOSO_MAX):
+        self.max_sessoes = max(1, max_sessoes)
+        self.min_sessoes = min(min_sessoes, self.max_sessoes)
+        self.ocioso_max = ocioso_max
+        self._livres = []               # Sessões paradas (a mais recente no fim)
+        self._vagas = threading.BoundedSemaphore(self.max_sessoes)
+        self._lock = threading.Lock()
+        self._faxineiro = None
+        self._encerrado = False
+
+    @contextmanager
+    def emprestar(self, timeout=None):
+        """Empresta uma sessão (reaproveita uma parada ou abre uma nova)"""
+        if not self._vagas.acquire(timeout=timeout):
+            raise TimeoutError("Nenhum navegador livre no pool")
+        sessao = None
+        try:
+            with self._lock:
+                if self._livres:
+                    sessao = self._livres.pop()
+            if sessao is None:
+                logging.info("🌐 Pool: abrindo navegador novo...")
+                sessao = Sessao()
+            self._iniciar_faxineiro()
+            yield sessao
+        except Exception:
+            if sessao:
+                sessao.saudavel = False
+            raise
+        finally:
+            if sessao:
+                self._devolver(sessao)
+            self._vagas.release()
+
+    def _devolver(self, sessao):
+        sessao.usos += 1
+        sessao.usada_em = time.monotonic()
+        if not sessao.saudavel or sessao.usos >= MAX_USOS or self._encerrado:
+            sessao.fechar()
+            return
+        with self._lock:
+            self._livres.append(sessao)
+
+    def aquecer(self, quantidade=None, shopee=True):
+        """Abre sessões antes do primeiro pedido (bloqueia; rode numa thread)"""
+        quantidade = min(self.min_sessoes if quantidade is None else quantidade, self.max_sessoes)
+        with self._lock:
+            faltam = quantidade - len(self._livres)
+        for _ in range(max(0, faltam)):
+            if not self._vagas.acquire(timeout=0):
+                break
+            try:
+                sessao = Sessao()
+                if shopee:
+                    sessao.garantir_shopee()
+                with self._lock:
+                    self._livres.append(sessao)
+            except Exception as e:
+                logging.warning(f"⚠️ Pool: falha ao aquecer navegador: {e}")
+                break
+            finally:
+                self._vagas.release()
+        self._iniciar_faxineiro()
+        logging.info(f"🔥 Pool: {len(self._livres)} navegador(es) pronto(s)")
+
+    def fechar_ociosas(self):
+        """Fecha as sessões paradas há mais de ocioso_max, mantendo min_sessoes"""
+        agora = time.monotonic()
+        with self._lock:
+            # As mais antigas ficam no começo da lista
+            vencidas = [s for s in self._livres if agora - s.usada_em > self.ocioso_max]
+            vencidas = vencidas[:max(0, len(self._livres) - self.min_sessoes)]
+            for s in vencidas:
+                self._livres.remove(s)
+        for s in vencidas:
+            s.fechar()
+        if vencidas:
+            logging.info(f"🧹 Pool: {len(vencidas)} navegador(es) ocioso(s) fechado(s)")
+
+    def _iniciar_faxineiro(self):
+        if self._faxineiro:
+            return
+        with self._lock:
+            if self._faxineiro:
+                return
+
+            def laco():
+                while not self._encerrado:
+                    time.sleep(min(60, self.ocioso_max / 2))
+                    self.fechar_ociosas()
+
+            self._faxineiro = threading.Thread(target=laco, name="pool-navegadores", daemon=True)
+            self._faxineiro.start()
+
+    def fechar_tudo(self):
+        self._encerrado = True
+        with self._lock:
+            livres, self._livres = self._livres, []
+        for s in livres:
+            s.fechar()
+
+
+POOL = PoolNavegadores()
+atexit.register(POOL.fechar_tudo)
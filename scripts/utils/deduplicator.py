@@ -1,7 +1,12 @@
+import hashlib
+import math
+import random
 import re
 from difflib import SequenceMatcher
 from urllib.parse import urlparse
 
+from scripts.utils.links import extrair_id_canonico, url_resolvida
+
 STOPWORDS = {
     "com", "para", "de", "da", "do", "e",
     "novo", "nova", "original", "oficial",
@@ -29,19 +34,23 @@ def extract_store_domain(url: str | None) -> str | None:
 def title_similarity(a: str, b: str) -> float:
     return SequenceMatcher(None, a, b).ratio()
 
+def title_similar(a: str, b: str, threshold=0.85) -> bool:
+    """title_similarity >= threshold, usando os limites superiores baratos antes do ratio()"""
+    sm = SequenceMatcher(None, a, b)
+    return (
+        sm.real_quick_ratio() >= threshold
+        and sm.quick_ratio() >= threshold
+        and sm.ratio() >= threshold
+    )
+
 def price_close(p1: float | None, p2: float | None, tolerance=0.05) -> bool:
     if not p1 or not p2:
         return False
     return abs(p1 - p2) / min(p1, p2) <= tolerance
 
 def is_duplicate(item_a: dict, item_b: dict) -> bool:
-    # 1️⃣ Mesmo domínio de loja
-    dom_a = extract_store_domain(item_a.get("url"))
-    dom_b = extract_store_domain(item_b.get("url"))
-    if dom_a and dom_b and dom_a == dom_b:
-        return True
-
-    # 2️⃣ Título parecido
+    # Mesmo domínio de loja não basta: amazon.com.br tem milhares de produtos
+    # Título parecido + preço próximo
     t1 = normalize_title(item_a.get("title", ""))
     t2 = normalize_title(item_b.get("title", ""))
     sim = title_similarity(t1, t2)
@@ -50,3 +59,178 @@ def is_duplicate(item_a: dict, item_b: dict) -> bool:
         return True
 
     return False
+
+
+# =====================================================
+# Deduplicação em lote (blocking + MinHash/LSH)
+# =====================================================
+# Comparar todos os pares com is_duplicate é O(n²), com um SequenceMatcher
+# por par. Aqui a mesma regra (título parecido + preço próximo) só é checada
+# para pares que caem na mesma faixa de preço (log, largura = tolerância) e
+# ainda colidem em alguma banda do MinHash dos tokens de normalize_title ou
+# apontam para o mesmo produto da loja (ASIN, MLB... da URL, seguindo links
+# curtos já resolvidos no cache). As URLs dos agregadores (pelando, promobit,
+# gafanho) não têm ID de produto e só entram pelo LSH; o domínio não serve
+# de bloco, é o do agregador. O produto só gera candidatos: nunca junta dois
+# itens sem a confirmação do título e do preço.
+#
+# Os pares confirmados são unidos do mais parecido para o menos (preço mais
+# próximo, depois título): como um grupo só tem uma oferta de cada fonte, o
+# par exato ganha do par a 4% quando os dois disputam a mesma oferta.
+
+SIMILARITY_THRESHOLD = 0.85
+PRICE_TOLERANCE = 0.05
+
+MINHASH_PERMUTATIONS = 16
+LSH_ROWS = 2  # linhas por banda -> 8 bandas; Jaccard 0.6 vira candidato com ~97%
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240101)  # fixo: assinaturas estáveis entre execuções
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+def _token_hash(token: str) -> int:
+    # hash() do Python muda a cada processo; blake2b é estável
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+_token_vectors = {}
+
+def _token_vector(token: str) -> tuple[int, ...]:
+    """As MINHASH_PERMUTATIONS imagens do token (tokens se repetem muito entre títulos)"""
+    vec = _token_vectors.get(token)
+    if vec is None:
+        h = _token_hash(token)
+        vec = _token_vectors[token] = tuple((a * h + b) % _PRIME for a, b in _PERMUTATIONS)
+    return vec
+
+def minhash(tokens) -> list[int]:
+    vectors = [_token_vector(t) for t in set(tokens)] or [_token_vector("")]
+    return [min(col) for col in zip(*vectors)]
+
+def lsh_keys(signature: list[int]) -> list[int]:
+    """Uma chave por banda (índice da banda + suas linhas, reduzidos a um int)"""
+    return [
+        hash((start, *signature[start:start + LSH_ROWS]))
+        for start in range(0, len(signature), LSH_ROWS)
+    ]
+
+def price_band(price: float, tolerance=PRICE_TOLERANCE) -> int:
+    """Faixa logarítmica: preços com price_close() caem na mesma faixa ou na vizinha"""
+    return math.floor(math.log(price) / math.log1p(tolerance))
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+def find_duplicate_groups(items: list[dict], cross_source_only=True) -> list[list[int]]:
+    """
+    Agrupa duplicatas com a mesma regra de is_duplicate.
+
+    Args:
+        items: ofertas normalizadas (title, url, price, source)
+        cross_source_only: só considera duplicatas entre fontes diferentes;
+            um grupo nunca junta dois itens da mesma fonte, nem por tabela
+            (A~B e B~C com A e C da mesma fonte: C fica fora do grupo)
+
+    Retorna:
+        lista de grupos (índices em ordem crescente), só grupos com 2+ itens
+    """
+    uf = _UnionFind(len(items))
+    sources = {i: {item.get("source")} for i, item in enumerate(items)}  # raiz -> fontes do grupo
+
+    def join(i, j):
+        ri, rj = uf.find(i), uf.find(j)
+        if ri == rj:
+            return
+        if cross_source_only and sources[ri] & sources[rj]:
+            return
+        uf.union(ri, rj)
+        root = uf.find(ri)
+        sources[root] = sources.pop(ri) | sources.pop(rj)
+
+    # Candidatos: mesma faixa de preço (ou vizinha) + banda do LSH ou mesmo produto
+    titles = {}
+    signatures = {}  # título normalizado -> chaves LSH (títulos repetidos são comuns)
+    buckets = {}
+    for i, item in enumerate(items):
+        price = item.get("price")
+        if not price or price <= 0:
+            continue  # price_close exige os dois preços
+        titles[i] = title = normalize_title(item.get("title", ""))
+        if title not in signatures:
+            signatures[title] = lsh_keys(minhash(title.split()))
+        keys = list(signatures[title])
+        product = extrair_id_canonico(url_resolvida(item.get("url")))
+        if product:
+            keys.append(("product", product))
+        band = price_band(price)
+        for key in keys:
+            # Indexa na própria faixa e na seguinte: vizinhas se encontram
+            buckets.setdefault((band, key), []).append(i)
+            buckets.setdefault((band + 1, key), []).append(i)
+
+    checked = set()
+    confirmed = []  # (distância de preço, -similaridade, i, j)
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        for x, i in enumerate(members):
+            for j in members[x + 1:]:
+                if cross_source_only and items[i].get("source") == items[j].get("source"):
+                    continue
+                pair = (i, j) if i < j else (j, i)
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                p1, p2 = items[i]["price"], items[j]["price"]
+                if not price_close(p1, p2, PRICE_TOLERANCE):
+                    continue
+                if titles[i] == titles[j]:
+                    similarity = 1.0
+                elif title_similar(titles[i], titles[j], SIMILARITY_THRESHOLD):
+                    similarity = title_similarity(titles[i], titles[j])
+                else:
+                    continue
+                confirmed.append((abs(p1 - p2) / min(p1, p2), -similarity, *pair))
+
+    for *_, i, j in sorted(confirmed):
+        join(i, j)
+
+    groups = {}
+    for i in range(len(items)):
+        groups.setdefault(uf.find(i), []).append(i)
+    return [g for g in groups.values() if len(g) > 1]
+
+def dedupe(items: list[dict], cross_source_only=True) -> list[dict]:
+    """
+    Mantém o primeiro item de cada grupo de duplicatas (a ordem da lista manda)
+    e anota nele os IDs descartados em "duplicates".
+    """
+    drop = set()
+    merged = {}
+    for group in find_duplicate_groups(items, cross_source_only):
+        keep, rest = group[0], group[1:]
+        drop.update(rest)
+        merged[keep] = [items[i].get("id") for i in rest]
+
+    result = []
+    for i, item in enumerate(items):
+        if i in drop:
+            continue
+        if i in merged:
+            item = {**item, "duplicates": merged[i]}
+        result.append(item)
+    return result
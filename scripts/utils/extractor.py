@@ -4,10 +4,16 @@ import asyncio
 import os
 import json
 import time
-from seleniumbase import SB
+
+from scripts.utils.browser_pool import POOL
 
 logging.basicConfig(level=logging.INFO)
 
+# Pelando: espera o preço renderizar (com sessão quente do pool isso leva
+# só o tempo da página), até este limite em segundos
+SELETOR_PRECO_PELANDO = "span[class*='Price'], div[class*='Price']"
+ESPERA_PELANDO = 10
+
 # ==============================================================================
 # 1. EXTRATOR PELANDO (Resolve o redirecionamento)
 # ==============================================================================
@@ -15,11 +21,16 @@ def scrape_pelando(url):
     data = None
     final_url = url
     
-    with SB(uc=True, headless=True, page_load_strategy="eager") as sb:
+    # Navegador emprestado do pool (já aberto), em vez de um Chrome novo por pedido
+    with POOL.emprestar() as sessao:
+        sb = sessao.sb
         try:
             logging.info(f"🕵️ Pelando: Acessando {url}...")
-            sb.activate_cdp_mode(url)
-            sb.sleep(4) # Espera carregar
+            sessao.abrir(url)
+            try:
+                sb.wait_for_element(SELETOR_PRECO_PELANDO, timeout=ESPERA_PELANDO)
+            except Exception:
+                logging.warning(f"⚠️ Pelando: preço não apareceu em {ESPERA_PELANDO}s, lendo o que carregou")
             
             # --- 1. Extração Visual (Título/Preço/Img) ---
             title = ""
@@ -32,7 +43,7 @@ def scrape_pelando(url):
             
             # Preço: Procura qualquer R$ grande
             try:
-                price_elem = sb.find_element("span[class*='Price'], div[class*='Price']")
+                price_elem = sb.find_element(SELETOR_PRECO_PELANDO)
                 if price_elem:
                     clean = re.sub(r'[^\d,]', '', price_elem.text).replace(',', '.')
                     if clean: price = float(clean)
@@ -88,6 +99,7 @@ def scrape_pelando(url):
 
         except Exception as e:
             logging.error(f"❌ Erro Pelando: {e}")
+            sessao.saudavel = False
             
     return data
 
@@ -116,12 +128,12 @@ def scrape_shopee_injection(url):
     api_url = f"https://shopee.com.br/api/v4/item/get?itemid={item_id}"
     if shop_id: api_url += f"&shopid={shop_id}"
 
-    with SB(uc=True, headless=True, page_load_strategy="eager") as sb:
+    with POOL.emprestar() as sessao:
+        sb = sessao.sb
         try:
             logging.info(f"💉 Shopee: Injetando API para ID {item_id}...")
-            # Abre a Home (sem login)
-            sb.activate_cdp_mode("https://shopee.com.br")
-            sb.sleep(3)
+            # Home da Shopee (sem login): só espera os cookies na 1ª vez desta sessão
+            sessao.garantir_shopee()
             
             # Script JS para buscar os dados direto da API (usando cookies do navegador)
             js = f"""
@@ -159,6 +171,7 @@ def scrape_shopee_injection(url):
                     }
         except Exception as e:
             logging.error(f"❌ Erro Shopee Injection: {e}")
+            sessao.saudavel = False
             
     return data
 
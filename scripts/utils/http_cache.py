@@ -0,0 +1,124 @@
+"""
+Cache HTTP condicional (ETag / Last-Modified / hash do corpo)
+Em Casa com Cecília
+
+Para páginas de produto que raramente mudam entre duas atualizações:
+- envia If-None-Match / If-Modified-Since quando já temos um resultado;
+- 304 Not Modified -> devolve o resultado parseado anterior;
+- 200 com corpo idêntico (mesmo sha256) -> também devolve o anterior, sem parse.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+CACHE_DB = ROOT / "data" / "cache" / "http.sqlite"
+
+
+def hash_corpo(texto):
+    return hashlib.sha256((texto or "").encode("utf-8", "replace")).hexdigest()
+
+
+class CacheHTTP:
+    """Guarda por URL: ETag, Last-Modified, hash do corpo e o último resultado parseado"""
+
+    def __init__(self, caminho=CACHE_DB):
+        self.caminho = Path(caminho)
+        self._conn = None
+        self._lock = threading.Lock()
+        self.stats = {"nao_modificado": 0, "corpo_identico": 0, "parseado": 0}
+
+    def _conexao(self):
+        if self._conn is None:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.caminho), check_same_thread=False, timeout=30)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS paginas (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    hash_corpo TEXT,
+                    resultado TEXT,
+                    atualizado_em REAL
+                )
+            """)
+            self._conn.commit()
+        return self._conn
+
+    def obter(self, url):
+        with self._lock:
+            row = self._conexao().execute(
+                "SELECT etag, last_modified, hash_corpo, resultado FROM paginas WHERE url = ?",
+                (url,)
+            ).fetchone()
+        if not row or not row[3]:
+            return None
+        return {
+            "etag": row[0],
+            "last_modified": row[1],
+            "hash_corpo": row[2],
+            "resultado": json.loads(row[3]),
+        }
+
+    def salvar(self, url, etag, last_modified, hash_, resultado):
+        with self._lock:
+            conn = self._conexao()
+            conn.execute(
+                "INSERT OR REPLACE INTO paginas VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, hash_, json.dumps(resultado, ensure_ascii=False), time.time())
+            )
+            conn.commit()
+
+    def cabecalhos(self, url):
+        """Headers condicionais para a URL (vazio se não há resultado anterior)"""
+        anterior = self.obter(url)
+        if not anterior:
+            return {}
+        headers = {}
+        if anterior["etag"]:
+            headers["If-None-Match"] = anterior["etag"]
+        if anterior["last_modified"]:
+            headers["If-Modified-Since"] = anterior["last_modified"]
+        return headers
+
+    def _contar(self, chave):
+        with self._lock:
+            self.stats[chave] += 1
+
+    def processar(self, url, status_code, headers, texto, parser):
+        """
+        Decide entre reaproveitar o resultado anterior ou parsear o corpo novo.
+
+        Args:
+            url: chave do cache (a mesma usada em cabecalhos())
+            status_code, headers, texto: resposta HTTP (requests ou httpx)
+            parser: função html -> resultado (dict; com "erro" não é guardado)
+        """
+        if status_code == 304:
+            anterior = self.obter(url)
+            if anterior:
+                self._contar("nao_modificado")
+                return dict(anterior["resultado"])
+            return {"erro": "Status 304 sem resultado em cache"}
+
+        if status_code != 200:
+            return {"erro": f"Status {status_code}"}
+
+        hash_ = hash_corpo(texto)
+        anterior = self.obter(url)
+        if anterior and anterior["hash_corpo"] == hash_:
+            self._contar("corpo_identico")
+            return dict(anterior["resultado"])
+
+        resultado = parser(texto)
+        self._contar("parseado")
+        if "erro" not in resultado:
+            self.salvar(url, headers.get("ETag"), headers.get("Last-Modified"), hash_, resultado)
+        return resultado
+
+
+CACHE = CacheHTTP()
@@ -2,6 +2,7 @@ from PIL import Image, ImageDraw, ImageFont
 import requests
 from io import BytesIO
 import os
+import tempfile
 
 def generate_social_art(product_image_source, price, title):
     # --- PROTEÇÃO CONTRA IMAGEM VAZIA ---
@@ -9,7 +10,6 @@ def generate_social_art(product_image_source, price, title):
         print("⚠️ Nenhuma imagem fornecida para a arte.")
         return None
     
-    output_path = "temp_story.png"
     template_path = "assets/template_story.png"
     
     # Cria base roxa se não tiver template
@@ -55,5 +55,8 @@ def generate_social_art(product_image_source, price, title):
     # Ajuste a posição conforme seu template
     draw.text((100, 1400), text, font=font, fill="white")
     
-    base.save(output_path)
+    # Um arquivo por chamada: o bot gera várias artes ao mesmo tempo
+    with tempfile.NamedTemporaryFile(prefix="story_", suffix=".png", delete=False) as arquivo:
+        output_path = arquivo.name
+        base.save(arquivo, format="PNG")
     return output_path
\ No newline at end of file
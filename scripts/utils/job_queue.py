@@ -0,0 +1,160 @@
+"""
+Fila de extrações do bot (asyncio)
+Em Casa com Cecília
+
+Cada link recebido vira um job; só `workers` jobs rodam ao mesmo tempo (o
+resto espera na fila), então uma rajada de links não abre um Chrome por
+mensagem.
+- Justiça por usuário: a fila é rodada entre usuários (round-robin), quem
+  manda 10 links não passa na frente de quem mandou 1.
+- Links iguais (mesma chave) enquanto o primeiro ainda está na fila ou
+  rodando viram um job só; todos recebem o mesmo resultado.
+- `ao_mudar_posicao(posicao)` avisa cada pedido da sua posição na fila
+  (1 = o próximo a rodar; 0 = começou). Os avisos do job terminam antes do
+  resultado ser entregue: nenhum chega depois (e sobrescreve o que o pedido
+  mostrou com o resultado).
+
+Uso:
+    fila = FilaExtracao(extract_metadata, workers=2, chave=chave_canonica)
+    data = await fila.enviar(user_id, url, ao_mudar_posicao=mostrar)
+"""
+
+import asyncio
+import logging
+from collections import deque
+
+
+class Job:
+
+    def __init__(self, chave, url, usuario):
+        self.chave = chave
+        self.url = url
+        self.usuario = usuario
+        self.futuro = asyncio.get_running_loop().create_future()
+        self.avisos = []        # Callbacks de posição de todos os pedidos deste job
+        self.avisando = set()   # Tarefas de aviso deste job ainda rodando
+        self.posicao = None
+
+
+class FilaExtracao:
+
+    def __init__(self, executar, workers=2, chave=None):
+        """
+        Args:
+            executar: corrotina executar(url) -> resultado
+            workers: jobs rodando ao mesmo tempo
+            chave: função url -> chave para juntar links iguais (padrão: a própria URL)
+        """
+        self.executar = executar
+        self.workers = max(1, workers)
+        self.chave = chave or (lambda url: url)
+        self._por_usuario = {}          # usuario -> deque de jobs esperando
+        self._rodada = deque()          # Usuários com jobs esperando; o primeiro é o próximo
+        self._ativos = {}               # chave -> job (na fila ou rodando)
+        self._pendentes = None          # Semáforo com a quantidade de jobs esperando
+        self._tarefas = []
+        self._avisos_em_curso = set()   # Referência às tarefas de aviso (senão o GC pode levá-las)
+
+    def _iniciar(self):
+        if self._tarefas:
+            return
+        self._pendentes = asyncio.Semaphore(0)
+        self._tarefas = [
+            asyncio.create_task(self._worker(), name=f"fila-extracao-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def enviar(self, usuario, url, ao_mudar_posicao=None):
+        """Enfileira (ou junta a um job igual em andamento) e espera o resultado"""
+        self._iniciar()
+        try:
+            chave = self.chave(url)
+        except Exception:
+            chave = url
+
+        job = self._ativos.get(chave)
+        if job:
+            logging.info(f"🔁 Fila: {url} já está em andamento, juntando pedidos")
+        else:
+            job = Job(chave, url, usuario)
+            self._ativos[chave] = job
+            if usuario not in self._por_usuario:
+                self._por_usuario[usuario] = deque()
+                self._rodada.append(usuario)
+            self._por_usuario[usuario].append(job)
+            self._pendentes.release()
+
+        if ao_mudar_posicao:
+            job.avisos.append(ao_mudar_posicao)
+            if job.posicao is not None:
+                self._avisar(job, [ao_mudar_posicao])
+        self._atualizar_posicoes()
+
+        # shield: se um dos pedidos for cancelado, o job continua para os outros
+        return await asyncio.shield(job.futuro)
+
+    def _proximo(self):
+        """Tira o próximo job no round-robin entre usuários"""
+        usuario = self._rodada.popleft()
+        fila = self._por_usuario[usuario]
+        job = fila.popleft()
+        if fila:
+            self._rodada.append(usuario)
+        else:
+            del self._por_usuario[usuario]
+        return job
+
+    def ordem(self):
+        """Jobs esperando, na ordem em que vão rodar"""
+        filas = [self._por_usuario[u] for u in self._rodada]
+        ordem = []
+        for i in range(max(map(len, filas), default=0)):
+            ordem.extend(f[i] for f in filas if i < len(f))
+        return ordem
+
+    def _atualizar_posicoes(self):
+        for posicao, job in enumerate(self.ordem(), start=1):
+            if job.posicao != posicao:
+                job.posicao = posicao
+                self._avisar(job)
+
+    def _avisar(self, job, avisos=None):
+        for aviso in avisos or job.avisos:
+            tarefa = asyncio.create_task(self._chamar_aviso(aviso, job.posicao))
+            self._avisos_em_curso.add(tarefa)
+            tarefa.add_done_callback(self._avisos_em_curso.discard)
+            job.avisando.add(tarefa)
+            tarefa.add_done_callback(job.avisando.discard)
+
+    @staticmethod
+    async def _esperar_avisos(job):
+        # Um pedido pode se juntar ao job (e ganhar aviso) enquanto esperamos
+        while job.avisando:
+            await asyncio.gather(*job.avisando, return_exceptions=True)
+
+    @staticmethod
+    async def _chamar_aviso(aviso, posicao):
+        try:
+            await aviso(posicao)
+        except Exception as e:
+            logging.warning(f"⚠️ Fila: falha ao avisar posição: {e}")
+
+    async def _worker(self):
+        while True:
+            await self._pendentes.acquire()
+            job = self._proximo()
+            job.posicao = 0
+            self._avisar(job)
+            self._atualizar_posicoes()
+            try:
+                resultado = await self.executar(job.url)
+            except Exception as e:
+                await self._esperar_avisos(job)
+                job.futuro.set_exception(e)
+            else:
+                await self._esperar_avisos(job)
+                job.futuro.set_result(resultado)
+            finally:
+                self._ativos.pop(job.chave, None)
+            # Marca a exceção como lida mesmo se todos os pedidos foram cancelados
+            job.futuro.exception()
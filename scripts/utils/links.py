@@ -0,0 +1,274 @@
+"""
+Resolução de links curtos com cache persistente (SQLite)
+Em Casa com Cecília
+
+Quase todo link do products.json é curto (amzn.to, mercadolivre.com/sec,
+s.shopee.com.br, divulgador.magalu.com). Seguir a cadeia de redirects a cada
+execução custa uma ou mais requisições por link; aqui o destino final e o ID
+canônico (ASIN / MLB / shop.item) ficam guardados com TTL. Só resoluções
+que deram certo entram no cache: um bloqueio passageiro (erro HTTP, captcha,
+timeout) não pode travar o link por 30 dias.
+
+Também gera chaves estáveis para ofertas sem ID (canonicalizar_url / id_estavel).
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+ROOT = Path(__file__).resolve().parents[2]
+CACHE_DB = ROOT / "data" / "cache" / "links.sqlite"
+
+TTL_PADRAO = 30 * 24 * 3600  # 30 dias
+
+# Hosts/prefixos de links curtos conhecidos
+PADROES_CURTOS = [
+    r"^https?://(www\.)?amzn\.to/",
+    r"^https?://(www\.)?a\.co/",
+    r"^https?://(www\.)?mercadolivre\.com/sec/",
+    r"^https?://(s\.shopee\.com\.br|shope\.ee)/",
+    r"^https?://(www\.)?divulgador\.magalu\.com/",
+    r"^https?://(www\.)?magalu\.lu/",
+]
+_RE_CURTO = re.compile("|".join(PADROES_CURTOS), re.IGNORECASE)
+
+# Destinos que são bloqueio/verificação, não o produto
+_RE_BLOQUEIO = re.compile(
+    r"captcha|/challenge|account-verification|/(buyer/)?login|/ap/signin|/errors/",
+    re.IGNORECASE
+)
+
+
+def eh_link_curto(url):
+    return bool(url and _RE_CURTO.match(url.strip()))
+
+
+def extrair_id_canonico(url):
+    """
+    ID canônico do produto a partir de uma URL final de loja.
+    Ex: "amazon:B0ABC12345", "mlb:MLB123456", "shopee:123.456", "magalu:ab1234567"
+    """
+    if not url:
+        return None
+
+    m = re.search(r"/(?:dp|gp/product)/([A-Z0-9]{10})", url)
+    if m:
+        return f"amazon:{m.group(1)}"
+
+    m = re.search(r"/p/(MLB\d+)", url, re.IGNORECASE)
+    if m:
+        return f"mlb:{m.group(1).upper()}"
+
+    m = re.search(r"(MLB)-?(\d+)", url, re.IGNORECASE)
+    if m:
+        return f"mlb:MLB{m.group(2)}"
+
+    m = re.search(r"-i\.(\d+)\.(\d+)", url) or re.search(r"shopee\.com\.br/product/(\d+)/(\d+)", url)
+    if m:
+        return f"shopee:{m.group(1)}.{m.group(2)}"
+
+    m = re.search(r"magazineluiza\.com\.br/.*?/p/([a-z0-9]+)/", url, re.IGNORECASE)
+    if m:
+        return f"magalu:{m.group(1).lower()}"
+
+    return None
+
+
+# =====================================================
+# URL CANÔNICA / ID ESTÁVEL
+# =====================================================
+
+# Parâmetros que não mudam o produto (rastreio, afiliado, busca)
+PARAMS_RASTREIO = re.compile(
+    r"^(utm_\w*|fbclid|gclid|gclsrc|dclid|msclkid|igshid|mc_\w+|ref|ref_|tag|linkcode|"
+    r"camp|creative|creativeasin|ascsubtag|smid|psc|th|sr|qid|keywords|_encoding|"
+    r"pf_rd_\w+|pd_rd_\w+|spm|sp_atk|xptdk|matt_\w+|aff_\w+|afsrc|sub_id|subid|"
+    r"partner_id|partnerid|promoter_id|utm)$",
+    re.IGNORECASE
+)
+
+
+def canonicalizar_url(url):
+    """
+    URL sem rastreio: esquema https, host minúsculo sem www, parâmetros de
+    rastreio removidos e os demais em ordem, sem fragmento nem barra final.
+    """
+    if not url:
+        return ""
+    partes = urlsplit(url.strip())
+    host = partes.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    host = re.sub(r":(80|443)$", "", host)
+    esquema = "https" if partes.scheme.lower() in ("http", "https", "") else partes.scheme.lower()
+    query = sorted(
+        (k, v) for k, v in parse_qsl(partes.query, keep_blank_values=True)
+        if not PARAMS_RASTREIO.match(k)
+    )
+    caminho = partes.path.rstrip("/") or "/"
+    return urlunsplit((esquema, host, caminho, urlencode(query), ""))
+
+
+def chave_canonica(url):
+    """ID de produto da loja quando a URL tem um (ASIN, MLB...), senão a URL canônica"""
+    return extrair_id_canonico(url) or canonicalizar_url(url)
+
+
+def id_estavel(url):
+    """Hash curto e determinístico da chave canônica (igual em qualquer processo)"""
+    return hashlib.sha1(chave_canonica(url).encode("utf-8")).hexdigest()[:16]
+
+
+# =====================================================
+# CACHE
+# =====================================================
+
+class CacheLinks:
+    """Cache link curto -> (url final, id canônico), com expiração por linha"""
+
+    def __init__(self, caminho=CACHE_DB):
+        self.caminho = Path(caminho)
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _conexao(self):
+        if self._conn is None:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.caminho), check_same_thread=False, timeout=30)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS links (
+                    url_curta TEXT PRIMARY KEY,
+                    url_final TEXT,
+                    id_canonico TEXT,
+                    resolvido_em REAL,
+                    expira_em REAL
+                )
+            """)
+            self._conn.commit()
+        return self._conn
+
+    def obter(self, url):
+        """Retorna (url_final, id_canonico) se houver entrada válida, senão None"""
+        with self._lock:
+            row = self._conexao().execute(
+                "SELECT url_final, id_canonico, expira_em FROM links WHERE url_curta = ?",
+                (url,)
+            ).fetchone()
+        if not row or row[2] < time.time():
+            return None
+        return row[0], row[1]
+
+    def salvar(self, url, url_final, id_canonico=None, ttl=TTL_PADRAO):
+        agora = time.time()
+        with self._lock:
+            conn = self._conexao()
+            conn.execute(
+                "INSERT OR REPLACE INTO links VALUES (?, ?, ?, ?, ?)",
+                (url, url_final, id_canonico, agora, agora + ttl)
+            )
+            conn.commit()
+
+    def limpar_expirados(self):
+        with self._lock:
+            conn = self._conexao()
+            apagados = conn.execute("DELETE FROM links WHERE expira_em < ?", (time.time(),)).rowcount
+            conn.commit()
+        return apagados
+
+
+CACHE = CacheLinks()
+
+
+# =====================================================
+# RESOLUÇÃO
+# =====================================================
+
+def url_resolvida(url, cache=CACHE):
+    """URL final em cache para um link curto (ou a própria URL). Não faz requisição."""
+    if not eh_link_curto(url):
+        return url
+    hit = cache.obter(url)
+    return hit[0] if hit else url
+
+
+def resolucao_ok(url, url_final, status=None):
+    """Resolução que pode ir para o cache: saiu do link curto e não caiu em erro/captcha"""
+    if not url_final or url_final == url or eh_link_curto(url_final):
+        return False
+    if status is not None and status >= 400:
+        return False
+    return not _RE_BLOQUEIO.search(url_final)
+
+
+def registrar_redirect(url, url_final, status=None, cache=CACHE):
+    """Guarda o destino de um link curto que já foi seguido por outra requisição"""
+    url_final = str(url_final) if url_final else None
+    if eh_link_curto(url) and resolucao_ok(url, url_final, status):
+        cache.salvar(url, url_final, extrair_id_canonico(url_final))
+
+
+def resolver_link(url, metodo="HEAD", headers=None, timeout=15, cache=CACHE):
+    """
+    Resolve um link curto seguindo os redirects, usando o cache quando possível.
+
+    Retorna:
+        (url_final, id_canonico) — url_final é None se não foi possível resolver
+    """
+    if not url:
+        return None, None
+
+    url = url.strip()
+    if not eh_link_curto(url):
+        return url, extrair_id_canonico(url)
+
+    hit = cache.obter(url)
+    if hit:
+        return hit
+
+    # Import local: o unify usa este módulo só para id_estavel, sem rede
+    import requests
+
+    try:
+        r = requests.request(metodo, url, headers=headers, allow_redirects=True, timeout=timeout)
+        # Alguns encurtadores não respondem HEAD direito
+        if metodo == "HEAD" and r.status_code >= 400:
+            r = requests.get(url, headers=headers, allow_redirects=True, timeout=timeout)
+        url_final = r.url
+    except Exception:
+        return None, None
+
+    id_canonico = extrair_id_canonico(url_final)
+    if resolucao_ok(url, url_final, r.status_code):
+        cache.salvar(url, url_final, id_canonico)
+    return url_final, id_canonico
+
+
+async def resolver_link_async(url, cliente, metodo="HEAD", cache=CACHE):
+    """Versão assíncrona de resolver_link (cliente httpx com follow_redirects=True)"""
+    if not url:
+        return None, None
+
+    url = url.strip()
+    if not eh_link_curto(url):
+        return url, extrair_id_canonico(url)
+
+    hit = cache.obter(url)
+    if hit:
+        return hit
+
+    try:
+        r = await cliente.request(metodo, url)
+        if metodo == "HEAD" and r.status_code >= 400:
+            r = await cliente.get(url)
+        url_final = str(r.url)
+    except Exception:
+        return None, None
+
+    id_canonico = extrair_id_canonico(url_final)
+    if resolucao_ok(url, url_final, r.status_code):
+        cache.salvar(url, url_final, id_canonico)
+    return url_final, id_canonico
@@ -1,6 +1,10 @@
 import json
+import sys
+import time
 from pathlib import Path
-from deduplicator import is_duplicate
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from scripts.utils.deduplicator import find_duplicate_groups
 
 DATA = Path("data/inbox")
 
@@ -8,17 +12,16 @@ files = list(DATA.glob("*.json"))
 items = []
 
 for f in files:
-    items.extend(json.loads(f.read_text(encoding="utf-8")))
+    data = json.loads(f.read_text(encoding="utf-8"))
+    if isinstance(data, list):  # status.json é um objeto
+        items.extend(data)
 
 print(f"🔎 Testando {len(items)} itens...")
 
-dupes = []
-
-for i, a in enumerate(items):
-    for b in items[i+1:]:
-        if a["source"] != b["source"] and is_duplicate(a, b):
-            dupes.append((a["id"], b["id"]))
+inicio = time.perf_counter()
+groups = find_duplicate_groups(items)
+tempo = time.perf_counter() - inicio
 
-print(f"⚠️ Duplicatas encontradas: {len(dupes)}")
-for d in dupes[:10]:
-    print(" ↪", d)
+print(f"⚠️ Grupos de duplicatas: {len(groups)} ({sum(len(g) for g in groups)} itens) em {tempo:.3f}s")
+for g in groups[:10]:
+    print(" ↪", tuple(items[i]["id"] for i in g))
@@ -0,0 +1,15 @@
+"""
+Testes dos scripts (pytest, rodar da raiz do repositório)
+Em Casa com Cecília
+
+Os scripts gravam em caminhos relativos (data/...): cada teste roda numa
+pasta temporária vazia para não tocar nos dados reais.
+"""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def pasta_temporaria(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,38 @@
+import random
+
+import pytest
+
+from scripts.utils.aho_corasick import AhoCorasick
+
+
+def test_ocorrencias_sobrepostas():
+    ac = AhoCorasick(["he", "she", "his", "hers"])
+    assert sorted(ac.buscar("ushers")) == [(3, "he", "he"), (3, "she", "she"), (5, "hers", "hers")]
+
+
+def test_sem_diferenciar_maiusculas_e_com_valor():
+    ac = AhoCorasick([("RTX", 50), ("air fryer", 20)])
+    assert ac.encontrados("Placa de vídeo rtx 4060 + AIR FRYER") == {"rtx": 50, "air fryer": 20}
+    assert ac.contem("Notebook Gamer RTX")
+    assert not ac.contem("Notebook Gamer")
+
+
+def test_termo_vazio_ignorado():
+    ac = AhoCorasick(["", "ps5"])
+    assert ac.encontrados("console ps5") == {"ps5": "ps5"}
+    assert not ac.contem("")
+
+
+def test_nao_aceita_termo_depois_de_compilar():
+    ac = AhoCorasick(["iphone"]).compilar()
+    with pytest.raises(RuntimeError):
+        ac.adicionar("galaxy")
+
+
+def test_igual_a_busca_por_substring():
+    rng = random.Random(7)
+    termos = {"".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(30)}
+    ac = AhoCorasick(termos)
+    for _ in range(200):
+        texto = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 20)))
+        assert set(ac.encontrados(texto)) == {t for t in termos if t in texto}
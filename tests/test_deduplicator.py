@@ -0,0 +1,126 @@
+import random
+
+from scripts.utils.deduplicator import (
+    dedupe, find_duplicate_groups, is_duplicate, normalize_title, title_similarity,
+)
+
+
+def oferta(id_, source, title, price, url="https://www.amazon.com.br/dp/B000000000"):
+    return {"id": id_, "source": source, "title": title, "price": price, "url": url}
+
+
+def test_mesma_loja_com_produtos_diferentes_nao_e_duplicata():
+    items = [
+        oferta("gatry-1", "gatry", "Fone Bluetooth JBL Tune 520BT", 199.0, "https://www.amazon.com.br/dp/B0C1"),
+        oferta("pelando-1", "pelando", "Air Fryer Mondial 4L Family", 349.0, "https://www.amazon.com.br/dp/B0C2"),
+        oferta("gatry-2", "gatry", "Kindle 11ª geração 16GB", 499.0, "https://www.amazon.com.br/dp/B0C3"),
+        oferta("pelando-2", "pelando", "Cafeteira Nespresso Essenza Mini", 389.0, "https://www.amazon.com.br/dp/B0C4"),
+    ]
+    assert find_duplicate_groups(items) == []
+    assert [i["id"] for i in dedupe(items)] == ["gatry-1", "pelando-1", "gatry-2", "pelando-2"]
+    assert not is_duplicate(items[0], items[2])
+
+
+def test_mesmo_produto_em_fontes_diferentes():
+    items = [
+        oferta("gatry-1", "gatry", "Air Fryer Mondial 4L Family AFN-40", 349.90),
+        oferta("pelando-1", "pelando", "Air Fryer Mondial 4L Family AFN-40 Preta", 339.90),
+        oferta("promobit-1", "promobit", "Kindle 11ª geração 16GB", 499.0),
+    ]
+    assert find_duplicate_groups(items) == [[0, 1]]
+
+    resultado = dedupe(items)
+    assert [i["id"] for i in resultado] == ["gatry-1", "promobit-1"]
+    assert resultado[0]["duplicates"] == ["pelando-1"]
+
+
+def test_preco_fora_da_tolerancia_nao_e_duplicata():
+    items = [
+        oferta("gatry-1", "gatry", "Air Fryer Mondial 4L Family AFN-40", 349.90),
+        oferta("pelando-1", "pelando", "Air Fryer Mondial 4L Family AFN-40", 299.90),
+    ]
+    assert find_duplicate_groups(items) == []
+
+
+def test_nao_encadeia_itens_da_mesma_fonte():
+    # gatry-1 ~ pelando-1 ~ gatry-2: as duas ofertas do Gatry não podem cair no mesmo grupo
+    items = [
+        oferta("gatry-1", "gatry", "Smart TV Samsung 50 Crystal UHD 4K", 2000.0),
+        oferta("pelando-1", "pelando", "Smart TV Samsung 50 Crystal UHD 4K", 2040.0),
+        oferta("gatry-2", "gatry", "Smart TV Samsung 50 Crystal UHD 4K", 2100.0),
+    ]
+    grupos = find_duplicate_groups(items)
+    assert grupos == [[0, 1]]
+    assert [i["id"] for i in dedupe(items)] == ["gatry-1", "gatry-2"]
+
+
+def test_mesma_fonte_so_quando_pedido():
+    items = [
+        oferta("gatry-1", "gatry", "Cafeteira Nespresso Essenza Mini", 389.0),
+        oferta("gatry-2", "gatry", "Cafeteira Nespresso Essenza Mini", 389.0),
+    ]
+    assert find_duplicate_groups(items) == []
+    assert find_duplicate_groups(items, cross_source_only=False) == [[0, 1]]
+
+
+def test_sem_preco_nunca_e_duplicata():
+    items = [
+        oferta("gatry-1", "gatry", "Cafeteira Nespresso Essenza Mini", 0.0),
+        oferta("pelando-1", "pelando", "Cafeteira Nespresso Essenza Mini", None),
+    ]
+    assert find_duplicate_groups(items) == []
+
+
+def test_par_exato_ganha_do_par_mais_distante():
+    # Caso do inbox: a oferta do Gafanho bate com duas do Pelando (0% e 3,9%).
+    # Só uma do Pelando cabe no grupo; tem que ser a de preço igual.
+    items = [
+        oferta("pelando-1", "pelando", "PlayStation 5 Pro Sony 2TB SSD com Controle Branco", 4799.0,
+               "https://www.pelando.com.br/d/playstation-5-pro-sony-2tb-ssd-com-controle-branco-4366"),
+        oferta("gafanho-4948330", "gafanho", "PlayStation 5 Pro Sony 2TB SSD com Controle Branco", 4621.0,
+               "https://gafanho.to/gafanhoto/go/6634665"),
+        oferta("pelando-2", "pelando", "PlayStation 5 Pro Sony 2TB SSD com Controle Branco", 4621.0,
+               "https://www.pelando.com.br/d/playstation-5-pro-sony-2tb-ssd-com-controle-branco-0d9e"),
+    ]
+    assert find_duplicate_groups(items) == [[1, 2]]
+
+
+def grupos_forca_bruta(items):
+    """Referência: is_duplicate em todos os pares, unidos do mais parecido para o menos"""
+    pares = []
+    for i in range(len(items)):
+        for j in range(i + 1, len(items)):
+            a, b = items[i], items[j]
+            if a["source"] != b["source"] and is_duplicate(a, b):
+                ta, tb = normalize_title(a["title"]), normalize_title(b["title"])
+                dist = abs(a["price"] - b["price"]) / min(a["price"], b["price"])
+                pares.append((dist, -title_similarity(ta, tb), i, j))
+    grupo = list(range(len(items)))
+    fontes = {i: {item["source"]} for i, item in enumerate(items)}
+    for *_, i, j in sorted(pares):
+        gi, gj = grupo[i], grupo[j]
+        if gi != gj and not fontes[gi] & fontes[gj]:
+            fontes[gi] |= fontes.pop(gj)
+            grupo = [gi if g == gj else g for g in grupo]
+    grupos = {}
+    for i, g in enumerate(grupo):
+        grupos.setdefault(g, []).append(i)
+    return sorted(g for g in grupos.values() if len(g) > 1)
+
+
+def test_mesmos_grupos_que_a_forca_bruta():
+    rng = random.Random(3)
+    produtos = [
+        "Air Fryer Mondial 4L Family AFN-40", "Smart TV Samsung 50 Crystal UHD 4K",
+        "PlayStation 5 Pro Sony 2TB SSD com Controle Branco", "Kindle 11ª geração 16GB",
+        "Fone Bluetooth JBL Tune 520BT", "Cafeteira Nespresso Essenza Mini",
+        "Notebook Lenovo IdeaPad 3 Ryzen 5 8GB 256GB", "Geladeira Brastemp Frost Free 375L",
+    ]
+    items = []
+    for n in range(120):
+        titulo = rng.choice(produtos) + rng.choice(["", " Preto", " Bivolt", " - Oferta"])
+        preco = round(rng.choice([199.0, 349.9, 499.0, 2999.0, 4621.0]) * rng.uniform(0.95, 1.05), 2)
+        items.append(oferta(f"x-{n}", rng.choice(["gatry", "pelando", "promobit", "gafanho"]), titulo, preco,
+                            f"https://www.pelando.com.br/d/{n}"))
+
+    assert sorted(find_duplicate_groups(items)) == grupos_forca_bruta(items)
@@ -0,0 +1,114 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from scripts.scrapers.extracao_rapida import extrair_dados, disponivel
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def ld(obj):
+    return f'<script type="application/ld+json">{json.dumps(obj)}</script>'
+
+
+def pagina(*blocos, meta=""):
+    return f"<html><head>{meta}</head><body>{''.join(blocos)}<p>resto da página</p></body></html>"
+
+
+PRODUTO = {
+    "@context": "https://schema.org",
+    "@type": "Product",
+    "name": "Air Fryer 4L",
+    "image": ["https://img/1.jpg", "https://img/2.jpg"],
+    "offers": {"@type": "Offer", "price": "349.90", "availability": "https://schema.org/InStock"},
+}
+
+
+def test_produto_json_ld():
+    dados = extrair_dados(pagina(ld(PRODUTO)))
+    assert dados == {
+        "preco": "349.90",
+        "titulo": "Air Fryer 4L",
+        "imagem": "https://img/1.jpg",
+        "disponibilidade": "https://schema.org/InStock",
+    }
+
+
+def test_objeto_que_nao_e_produto_com_offers_e_ignorado():
+    organizacao = {"@type": "Organization", "name": "Magalu", "offers": {"price": 1}}
+    assert extrair_dados(pagina(ld(organizacao)))["preco"] is None
+
+    # O Product que vem depois é o que vale
+    dados = extrair_dados(pagina(ld(organizacao), ld(PRODUTO)))
+    assert (dados["preco"], dados["titulo"]) == ("349.90", "Air Fryer 4L")
+
+
+def test_product_dentro_de_graph_e_com_prefixo():
+    grafo = {"@graph": [
+        {"@type": "WebSite", "name": "Loja"},
+        {**PRODUTO, "@type": ["schema:Product", "Thing"]},
+    ]}
+    assert extrair_dados(pagina(ld(grafo)))["titulo"] == "Air Fryer 4L"
+
+
+def test_product_group_usa_a_oferta_da_variacao():
+    grupo = {
+        "@type": "ProductGroup",
+        "name": "Jogo de Panelas",
+        "image": "https://img/panelas.jpg",
+        "hasVariant": [
+            {"@type": "Product", "name": "Vermelho"},
+            {"@type": "Product", "name": "Preto", "offers": {"price": 199.0}},
+        ],
+    }
+    dados = extrair_dados(pagina(ld(grupo)))
+    assert (dados["preco"], dados["titulo"]) == (199.0, "Jogo de Panelas")
+
+
+def test_offer_solto_usa_o_item_oferecido():
+    oferta = {
+        "@type": "Offer",
+        "price": 59.9,
+        "itemOffered": {"@type": "Product", "name": "Garrafa Térmica", "image": "https://img/g.jpg"},
+    }
+    dados = extrair_dados(pagina(ld(oferta)))
+    assert (dados["preco"], dados["titulo"], dados["imagem"]) == (59.9, "Garrafa Térmica", "https://img/g.jpg")
+
+
+def test_meta_tags_sem_json_ld():
+    meta = (
+        '<meta property="og:title" content="Cafeteira">'
+        '<meta property="og:image" content="https://img/c.jpg">'
+        '<meta property="product:price:amount" content="129.00">'
+    )
+    dados = extrair_dados(pagina(meta=meta))
+    assert (dados["preco"], dados["titulo"]) == ("129.00", "Cafeteira")
+
+
+def test_disponibilidade():
+    assert not disponivel({"disponibilidade": "https://schema.org/OutOfStock"}, "", "esgotado")
+    assert disponivel({"disponibilidade": None}, "<script>var m = 'esgotado';</script><p>Comprar</p>", "esgotado")
+    assert not disponivel({"disponibilidade": None}, "<p>Produto esgotado</p>", "esgotado")
+
+
+def test_pagina_salva_do_mercado_livre():
+    html = (ROOT / "scripts" / "debug" / "debug_ml_produto.html").read_text(encoding="utf-8")
+    dados = extrair_dados(html)
+    assert dados["preco"] == 279.9
+    assert dados["titulo"].startswith("Panela de Pressão Elétrica Mondial")
+    assert dados["imagem"].startswith("https://http2.mlstatic.com/")
+
+
+def test_parse_cai_no_completo_quando_o_json_ld_nao_e_produto():
+    pytest.importorskip("bs4")
+    pytest.importorskip("requests")
+    from scripts.scrapers import price_scraper_v2 as scraper
+
+    html = pagina(
+        ld({"@type": "Organization", "name": "Mercado Livre", "offers": {"price": 1}}),
+        '<span class="andes-money-amount__fraction">89</span><span class="andes-money-amount__cents">90</span>',
+        meta='<meta property="og:title" content="Liquidificador">',
+    )
+    resultado = scraper.parse_mercadolivre(html)
+    assert resultado["preco"] == 89.9
@@ -0,0 +1,90 @@
+from contextlib import contextmanager
+
+import pytest
+
+pytest.importorskip("seleniumbase")
+
+from scripts.utils import extractor
+
+
+class ElementoFalso:
+    text = "R$ 1.299,90"
+
+
+class SBFalso:
+    """Página do Pelando já carregada: registra esperas e dormidas"""
+
+    def __init__(self, preco_aparece=True):
+        self.preco_aparece = preco_aparece
+        self.esperas = []
+        self.dormidas = []
+
+    def sleep(self, segundos):
+        self.dormidas.append(segundos)
+
+    def wait_for_element(self, seletor, timeout=None):
+        self.esperas.append((seletor, timeout))
+        if not self.preco_aparece:
+            raise Exception("Element not visible")
+
+    def get_text(self, seletor):
+        return "Air Fryer Mondial 4L"
+
+    def find_element(self, seletor):
+        if not self.preco_aparece:
+            raise Exception("Element not found")
+        return ElementoFalso()
+
+    def get_attribute(self, seletor, atributo):
+        return "https://media.pelando.com.br/air-fryer.jpg"
+
+    def is_element_visible(self, seletor):
+        return False
+
+
+class SessaoFalsa:
+    def __init__(self, sb):
+        self.sb = sb
+        self.saudavel = True
+        self.abertas = []
+
+    def abrir(self, url):
+        self.abertas.append(url)
+
+
+class PoolFalso:
+    def __init__(self, sessao):
+        self.sessao = sessao
+
+    @contextmanager
+    def emprestar(self, timeout=None):
+        yield self.sessao
+
+
+@pytest.fixture
+def sessao(monkeypatch):
+    def criar(**kwargs):
+        s = SessaoFalsa(SBFalso(**kwargs))
+        monkeypatch.setattr(extractor, "POOL", PoolFalso(s))
+        return s
+    return criar
+
+
+def test_pelando_espera_o_preco_em_vez_de_dormir(sessao):
+    s = sessao()
+    data = extractor.scrape_pelando("https://www.pelando.com.br/d/air-fryer-c90f")
+
+    assert s.sb.dormidas == []
+    assert s.sb.esperas == [(extractor.SELETOR_PRECO_PELANDO, extractor.ESPERA_PELANDO)]
+    assert data["title"] == "Air Fryer Mondial 4L"
+    assert data["price"] == 1299.90
+
+
+def test_pelando_sem_preco_segue_com_o_titulo(sessao):
+    s = sessao(preco_aparece=False)
+    data = extractor.scrape_pelando("https://www.pelando.com.br/d/air-fryer-c90f")
+
+    assert s.sb.dormidas == []
+    assert data["title"] == "Air Fryer Mondial 4L"
+    assert data["price"] == 0.0
+    assert s.saudavel
@@ -0,0 +1,102 @@
+import json
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("playwright")
+
+import navegador
+import gafanho_playwright as gafanho
+import pelando_playwright as pelando
+import promobit_playwright as promobit
+
+FEEDS = Path(__file__).parent / "fixtures" / "feeds"
+
+
+def feed(fonte):
+    return json.loads((FEEDS / f"{fonte}.json").read_text(encoding="utf-8"))
+
+
+# =====================================================
+# PERCORRER_JSON
+# =====================================================
+
+def test_percorrer_json_na_ordem_do_documento():
+    doc = {"a": [{"id": 1}, {"b": {"id": 2}}], "c": {"id": 3}, "d": [[{"id": 4}], "texto", None]}
+    assert [d["id"] for d in navegador.percorrer_json(doc, lambda d: "id" in d)] == [1, 2, 3, 4]
+
+
+def test_percorrer_json_nao_desce_no_item():
+    doc = [{"id": 1, "relacionados": [{"id": 2}]}]
+    assert [d["id"] for d in navegador.percorrer_json(doc, lambda d: "id" in d)] == [1]
+
+
+def test_percorrer_json_sem_itens():
+    assert list(navegador.percorrer_json({"a": [1, "x", None]}, lambda d: True)) == [{"a": [1, "x", None]}]
+    assert list(navegador.percorrer_json([], lambda d: True)) == []
+
+
+def test_conferir_feed_guarda_payloads_nao_reconhecidos(tmp_path):
+    navegador.conferir_feed("pelando", [{"data": {}}], [], pasta=tmp_path)
+    assert json.loads((tmp_path / "pelando.json").read_text(encoding="utf-8")) == [{"data": {}}]
+
+
+def test_conferir_feed_nao_guarda_quando_reconheceu(tmp_path, monkeypatch):
+    navegador.conferir_feed("pelando", [{"data": {}}], [{"id": "1"}], pasta=tmp_path)
+    navegador.conferir_feed("promobit", [], [], pasta=tmp_path)
+    assert not list(tmp_path.iterdir())
+
+    monkeypatch.setattr(navegador, "SALVAR_FEED", True)
+    navegador.conferir_feed("pelando", [{"data": {}}], [{"id": "1"}], pasta=tmp_path)
+    assert (tmp_path / "pelando.json").exists()
+
+
+# =====================================================
+# FONTES
+# =====================================================
+
+def test_pelando_feed():
+    ofertas = pelando.ofertas_da_rede(feed("pelando"))
+
+    assert len(ofertas) == 8  # o deal repetido na página 2 conta uma vez
+    primeira = ofertas[0]
+    assert primeira["id"] == "acer-nitro-v15-i5-16gb-512gb-rtx3050-156-fhd-c90f"
+    assert primeira["url"] == "https://www.pelando.com.br/d/acer-nitro-v15-i5-16gb-512gb-rtx3050-156-fhd-c90f"
+    assert (primeira["price"], primeira["price_text"]) == (3621.0, "R$ 3.621,00")
+    assert primeira["store"] == "Magalu"
+    assert primeira["source"] == "pelando"
+    # Só o slug, sem link: a URL é montada igual
+    assert ofertas[2]["url"] == f"https://www.pelando.com.br/d/{ofertas[2]['id']}"
+    assert ofertas[5]["price"] is None
+    # Mesmo ID do modo DOM: o slug do link
+    assert all(o["url"].endswith(o["id"]) for o in ofertas)
+
+
+def test_promobit_feed():
+    ofertas = promobit.ofertas_da_rede(feed("promobit"))
+
+    assert len(ofertas) == 13
+    assert [o["id"] for o in ofertas[:2]] == ["2487986", "2564544"]
+    netshoes = ofertas[1]
+    assert netshoes["url"].startswith("https://www.promobit.com.br/oferta/")
+    assert netshoes["url"].endswith("-2564544/")
+    assert (netshoes["price"], netshoes["price_old"]) == (152.99, 329.99)
+    assert netshoes["price_text"] == "R$ 152,99"
+    assert netshoes["store"] == "Netshoes"
+    assert netshoes["published_at"]
+    # Oferta grátis: preço 0, sem preço antigo
+    assert (ofertas[0]["price"], ofertas[0]["price_old"]) == (0.0, None)
+
+
+def test_gafanho_feed():
+    posts = gafanho.posts_capturados(feed("gafanho"))
+    assert len(posts) == 50
+
+    ofertas = gafanho.montar_ofertas(posts)
+    primeira = ofertas[0]
+    assert primeira["id"] == "4930008"
+    assert primeira["url"] == "https://gafanho.to/gafanhoto/go/6617274"
+    assert (primeira["price"], primeira["price_text"]) == (48.68, "R$ 48,68")
+    assert primeira["store"] == "Amazon"
+    assert primeira["published_at"].endswith("-12-29T14:31:00")
+    assert len({o["id"] for o in ofertas}) == 50
@@ -0,0 +1,62 @@
+import pytest
+
+from scripts.utils.http_cache import CacheHTTP
+
+URL = "https://www.magazineluiza.com.br/panela/p/ab1234567/"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CacheHTTP(tmp_path / "http.sqlite")
+
+
+class Parser:
+    """Conta quantas vezes o corpo foi parseado"""
+
+    def __init__(self, resultado):
+        self.resultado = resultado
+        self.chamadas = 0
+
+    def __call__(self, html):
+        self.chamadas += 1
+        return dict(self.resultado)
+
+
+def test_sem_resultado_anterior_nao_manda_cabecalho_condicional(cache):
+    assert cache.cabecalhos(URL) == {}
+
+
+def test_304_reaproveita_o_resultado_anterior(cache):
+    parser = Parser({"preco": 99.9, "disponivel": True})
+    cache.processar(URL, 200, {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}, "<html>v1</html>", parser)
+
+    assert cache.cabecalhos(URL) == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+    }
+    assert cache.processar(URL, 304, {}, "", parser) == {"preco": 99.9, "disponivel": True}
+    assert parser.chamadas == 1
+    assert cache.stats["nao_modificado"] == 1
+
+
+def test_304_sem_cache_e_erro(cache):
+    assert "erro" in cache.processar(URL, 304, {}, "", Parser({"preco": 1}))
+
+
+def test_corpo_identico_pula_o_parse(cache):
+    parser = Parser({"preco": 10.0})
+    cache.processar(URL, 200, {}, "<html>igual</html>", parser)
+    cache.processar(URL, 200, {}, "<html>igual</html>", parser)
+    assert parser.chamadas == 1
+    assert cache.stats["corpo_identico"] == 1
+
+    parser.resultado = {"preco": 8.0}
+    assert cache.processar(URL, 200, {}, "<html>mudou</html>", parser) == {"preco": 8.0}
+    assert parser.chamadas == 2
+
+
+def test_resultado_com_erro_nao_e_guardado(cache):
+    cache.processar(URL, 200, {"ETag": '"v1"'}, "<html>captcha</html>", Parser({"erro": "Preço não encontrado"}))
+    assert cache.obter(URL) is None
+    assert cache.cabecalhos(URL) == {}
+    assert cache.processar(URL, 500, {}, "", Parser({"preco": 1})) == {"erro": "Status 500"}
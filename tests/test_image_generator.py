@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("requests")
+
+from PIL import Image
+
+from scripts.utils.image_generator import generate_social_art
+
+
+@pytest.fixture
+def produto(tmp_path):
+    caminho = tmp_path / "produto.png"
+    Image.new("RGBA", (400, 300), (255, 255, 255, 255)).save(caminho)
+    return f"local:{caminho}"
+
+
+def test_cada_arte_em_um_arquivo(produto):
+    caminhos = [generate_social_art(produto, 99.9, "Air Fryer") for _ in range(2)]
+    try:
+        assert caminhos[0] != caminhos[1]
+        assert not os.path.exists("temp_story.png")
+        for caminho in caminhos:
+            with Image.open(caminho) as arte:
+                assert arte.size == (1080, 1920)
+    finally:
+        for caminho in caminhos:
+            os.remove(caminho)
+
+
+def test_sem_imagem_nao_gera_arquivo():
+    assert generate_social_art(None, 99.9, "Air Fryer") is None
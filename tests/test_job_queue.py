@@ -0,0 +1,86 @@
+import asyncio
+
+from scripts.utils.job_queue import FilaExtracao
+
+
+def test_rodizio_entre_usuarios():
+    async def cenario():
+        ordem = []
+
+        async def executar(url):
+            ordem.append(url)
+            await asyncio.sleep(0)
+            return url
+
+        fila = FilaExtracao(executar, workers=1)
+        pedidos = [fila.enviar("ana", f"ana-{i}") for i in range(3)]
+        pedidos += [fila.enviar("bia", "bia-0"), fila.enviar("caio", "caio-0")]
+        await asyncio.gather(*pedidos)
+        return ordem
+
+    # Quem mandou 3 links não passa na frente de quem mandou 1
+    assert asyncio.run(cenario()) == ["ana-0", "bia-0", "caio-0", "ana-1", "ana-2"]
+
+
+def test_links_iguais_viram_um_job():
+    async def cenario():
+        execucoes = []
+
+        async def executar(url):
+            execucoes.append(url)
+            await asyncio.sleep(0.01)
+            return {"url": url}
+
+        fila = FilaExtracao(executar, workers=2, chave=lambda url: url.split("?")[0])
+        resultados = await asyncio.gather(
+            fila.enviar("ana", "https://amzn.to/x?tag=1"),
+            fila.enviar("bia", "https://amzn.to/x?tag=2"),
+            fila.enviar("caio", "https://amzn.to/y"),
+        )
+        return execucoes, resultados
+
+    execucoes, resultados = asyncio.run(cenario())
+    assert execucoes == ["https://amzn.to/x?tag=1", "https://amzn.to/y"]
+    assert resultados[0] is resultados[1]
+
+
+def test_erro_chega_a_todos_os_pedidos():
+    async def cenario():
+        async def executar(url):
+            raise RuntimeError("sem preço")
+
+        fila = FilaExtracao(executar, workers=1)
+        return await asyncio.gather(fila.enviar("ana", "x"), fila.enviar("bia", "x"), return_exceptions=True)
+
+    erros = asyncio.run(cenario())
+    assert all(isinstance(e, RuntimeError) for e in erros)
+
+
+def test_nenhum_aviso_depois_do_resultado():
+    async def cenario():
+        eventos = []
+
+        async def executar(url):
+            return url
+
+        def aviso(nome):
+            async def mostrar(posicao):
+                await asyncio.sleep(0.02)  # edit_text lento
+                eventos.append((nome, posicao))
+            return mostrar
+
+        async def pedido(usuario, url):
+            resultado = await fila.enviar(usuario, url, aviso(url))
+            eventos.append((url, "resultado"))
+            return resultado
+
+        fila = FilaExtracao(executar, workers=1)
+        await asyncio.gather(pedido("ana", "a"), pedido("bia", "b"))
+        await asyncio.sleep(0.05)
+        return eventos
+
+    eventos = asyncio.run(cenario())
+    for url in ("a", "b"):
+        do_pedido = [e for e in eventos if e[0] == url]
+        assert do_pedido[-1] == (url, "resultado")
+        assert (url, 0) in do_pedido
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from scripts.utils import links
+from scripts.utils.links import CacheLinks, resolver_link_async, registrar_redirect
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CacheLinks(tmp_path / "links.sqlite")
+
+
+class Resposta:
+    def __init__(self, url, status_code=200):
+        self.url = url
+        self.status_code = status_code
+
+
+class ClienteFalso:
+    """Faz o papel do httpx.AsyncClient: devolve as respostas na ordem"""
+
+    def __init__(self, *respostas):
+        self.respostas = list(respostas)
+        self.chamadas = 0
+
+    async def _proxima(self):
+        self.chamadas += 1
+        resposta = self.respostas.pop(0)
+        if isinstance(resposta, Exception):
+            raise resposta
+        return resposta
+
+    async def request(self, metodo, url):
+        return await self._proxima()
+
+    async def get(self, url):
+        return await self._proxima()
+
+
+def resolver(url, cliente, cache):
+    return asyncio.run(resolver_link_async(url, cliente, cache=cache))
+
+
+# =====================================================
+# CACHE SÓ DE RESOLUÇÕES QUE DERAM CERTO
+# =====================================================
+
+def test_resolucao_ok_vai_para_o_cache(cache):
+    final = "https://www.amazon.com.br/dp/B0ABC12345?tag=x"
+    cliente = ClienteFalso(Resposta(final))
+
+    assert resolver("https://amzn.to/abc", cliente, cache) == (final, "amazon:B0ABC12345")
+    assert cache.obter("https://amzn.to/abc") == (final, "amazon:B0ABC12345")
+
+    # Segunda vez não vai à rede
+    assert resolver("https://amzn.to/abc", ClienteFalso(), cache)[0] == final
+
+
+@pytest.mark.parametrize("respostas", [
+    [Resposta("https://amzn.to/abc", 403), Resposta("https://amzn.to/abc", 403)],
+    [Resposta("https://www.amazon.com.br/dp/B0ABC12345", 503), Resposta("https://www.amazon.com.br/dp/B0ABC12345", 503)],
+    [Resposta("https://www.amazon.com.br/errors/validateCaptcha?amzn=x")],
+    [Resposta("https://amzn.to/abc")],
+    [TimeoutError("timeout")],
+], ids=["403", "503", "captcha", "mesma-url", "timeout"])
+def test_falha_de_resolucao_nao_vai_para_o_cache(cache, respostas):
+    resolver("https://amzn.to/abc", ClienteFalso(*respostas), cache)
+    assert cache.obter("https://amzn.to/abc") is None
+
+    # Na próxima execução tenta de novo e, se der certo, guarda
+    final = "https://www.amazon.com.br/dp/B0ABC12345"
+    cliente = ClienteFalso(Resposta(final))
+    assert resolver("https://amzn.to/abc", cliente, cache)[0] == final
+    assert cliente.chamadas == 1
+    assert cache.obter("https://amzn.to/abc")[0] == final
+
+
+def test_registrar_redirect_ignora_bloqueios(cache):
+    registrar_redirect("https://mercadolivre.com/sec/abc", "https://www.mercadolivre.com.br/gz/account-verification", 200, cache=cache)
+    registrar_redirect("https://mercadolivre.com/sec/abc", "https://produto.mercadolivre.com.br/MLB-123", 429, cache=cache)
+    assert cache.obter("https://mercadolivre.com/sec/abc") is None
+
+    registrar_redirect("https://mercadolivre.com/sec/abc", "https://produto.mercadolivre.com.br/MLB-123", 200, cache=cache)
+    assert cache.obter("https://mercadolivre.com/sec/abc") == ("https://produto.mercadolivre.com.br/MLB-123", "mlb:MLB123")
+
+
+def test_link_que_nao_e_curto_nao_faz_requisicao(cache):
+    url = "https://www.amazon.com.br/dp/B0ABC12345"
+    assert resolver(url, ClienteFalso(), cache) == (url, "amazon:B0ABC12345")
+    assert links.url_resolvida(url, cache=cache) == url
+
+
+# =====================================================
+# URL CANÔNICA / ID ESTÁVEL
+# =====================================================
+
+def test_canonicalizar_url_remove_rastreio():
+    assert links.canonicalizar_url(
+        "http://WWW.Loja.com.br/produto/?utm_source=x&cor=azul&fbclid=1&b=2#avaliacoes"
+    ) == "https://loja.com.br/produto?b=2&cor=azul"
+
+
+@pytest.mark.parametrize("a, b", [
+    ("https://www.amazon.com.br/dp/B0ABC12345?tag=afiliado-20", "https://amazon.com.br/Air-Fryer/dp/B0ABC12345/ref=sr_1_1"),
+    ("https://loja.com.br/produto?utm_medium=social", "http://www.loja.com.br/produto/"),
+])
+def test_id_estavel_igual_para_a_mesma_oferta(a, b):
+    assert links.id_estavel(a) == links.id_estavel(b)
+    assert len(links.id_estavel(a)) == 16
+
+
+def test_id_estavel_diferente_para_produtos_diferentes():
+    assert links.id_estavel("https://loja.com.br/produto?cor=azul") != links.id_estavel("https://loja.com.br/produto?cor=verde")
+    assert links.chave_canonica("https://produto.mercadolivre.com.br/MLB-123456-air-fryer") == "mlb:MLB123456"
@@ -0,0 +1,118 @@
+import json
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("playwright")
+
+import marcas
+import gafanho_playwright as gafanho
+from marcas import Marca
+
+
+def oferta(i, publicado=None):
+    return {"id": i, "title": f"Oferta {i}", "published_at": publicado}
+
+
+def marca_gravada(fonte="gafanho"):
+    return json.loads(marcas.WATERMARKS_FILE.read_text(encoding="utf-8"))[fonte]
+
+
+# =====================================================
+# MARCA D'ÁGUA
+# =====================================================
+
+def test_sem_marca_tudo_e_novo():
+    marca = Marca.carregar("gafanho")
+    assert marca.vazia
+    assert not marca.alcancou(["1", "2", "3"])
+    assert marca.novas([oferta(1), oferta(2)]) == [oferta(1), oferta(2)]
+
+
+def test_alcancou_olha_so_a_cauda():
+    marca = Marca("gafanho", {"ids": ["1", "2", "3"]})
+    assert marca.alcancou(["9", "8", "1", "2", "3"])
+    # Oferta conhecida fixada no topo não basta para parar
+    assert not marca.alcancou(["1", "8", "7", "6"])
+    assert not marca.alcancou(["2", "3"])
+
+
+def test_novas_por_id_e_por_data():
+    marca = Marca("gafanho", {"ids": ["1"], "publicado_em": "2026-03-10T12:00:00"})
+    ofertas = [oferta(1), oferta(2, "2026-03-09T12:00:00"), oferta(3, "2026-03-11T12:00:00"), oferta(4)]
+    assert [o["id"] for o in marca.novas(ofertas)] == [3, 4]
+
+
+def test_avancar_junta_ids_e_data():
+    Marca.carregar("gafanho").avancar([oferta(2, "2026-03-09T12:00:00"), oferta(1, "2026-03-08T12:00:00")])
+    Marca.carregar("gafanho").avancar([oferta(3, "2026-03-10T12:00:00"), oferta(2)])
+
+    gravada = marca_gravada()
+    assert gravada["ids"] == ["3", "2", "1"]
+    assert gravada["publicado_em"] == "2026-03-10T12:00:00"
+    assert Marca.carregar("gafanho").alcancou(["3", "2", "1"])
+
+
+def test_avancar_limita_ids(monkeypatch):
+    monkeypatch.setattr(marcas, "MAX_IDS", 4)
+    Marca.carregar("gafanho").avancar([oferta(i) for i in range(3)])
+    Marca.carregar("gafanho").avancar([oferta(i) for i in range(10, 13)])
+    assert marca_gravada()["ids"] == ["10", "11", "12", "0"]
+
+
+def test_coleta_completa_nao_perde_a_marca(monkeypatch):
+    Marca.carregar("gafanho").avancar([oferta(1, "2026-03-10T12:00:00"), oferta(2)])
+
+    monkeypatch.setattr(marcas, "COMPLETA", True)
+    marca = Marca.carregar("gafanho")
+    # Não filtra nem para o scroll...
+    assert marca.vazia
+    assert marca.novas([oferta(1), oferta(5)]) == [oferta(1), oferta(5)]
+    # ...mas junta com o que estava guardado
+    marca.avancar([oferta(5, "2026-03-01T12:00:00"), oferta(1)])
+
+    gravada = marca_gravada()
+    assert gravada["ids"] == ["5", "1", "2"]
+    assert gravada["publicado_em"] == "2026-03-10T12:00:00"
+
+
+def test_cada_fonte_tem_a_sua_marca():
+    Marca.carregar("gafanho").avancar([oferta(1)])
+    Marca.carregar("gatry").avancar([oferta(2)])
+    assert marca_gravada("gafanho")["ids"] == ["1"]
+    assert marca_gravada("gatry")["ids"] == ["2"]
+
+
+# =====================================================
+# GAFANHO
+# =====================================================
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("29/12 14:31", "2026-12-29T14:31:00"),
+    ("15/03 09:05", "2026-03-15T09:05:00"),
+    ("2026-03-15T09:05:00Z", "2026-03-15T09:05:00+00:00"),
+    ("", None),
+    ("ontem", None),
+])
+def test_data_publicacao(texto, esperado):
+    assert gafanho.data_publicacao(texto, agora=datetime(2026, 12, 30, 10, 0)) == esperado
+
+
+def test_data_publicacao_na_virada_do_ano():
+    assert gafanho.data_publicacao("29/12 14:31", agora=datetime(2027, 1, 2, 10, 0)) == "2026-12-29T14:31:00"
+
+
+def test_post_mantem_data_de_publicacao_e_marca_avanca():
+    posts = [
+        {"id": 10, "title": "Air Fryer", "links": "https://amzn.to/x https://amzn.to/y",
+         "price": "R$ 1.500,00", "storeName": "Amazon", "publicationDate": "2026-03-10T12:00:00"},
+        {"id": 11, "title": "Kindle", "links": "https://amzn.to/z", "price": "R$ 499,00",
+         "storeName": "Amazon", "publicationDate": "2026-03-11T12:00:00"},
+    ]
+    ofertas = gafanho.montar_ofertas(posts)
+    assert ofertas[0]["url"] == "https://amzn.to/x"
+    assert ofertas[0]["price"] == 1500.0
+    assert [o["published_at"] for o in ofertas] == ["2026-03-10T12:00:00", "2026-03-11T12:00:00"]
+
+    Marca.carregar("gafanho").avancar(ofertas)
+    assert marca_gravada()["publicado_em"] == "2026-03-11T12:00:00"
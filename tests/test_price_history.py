@@ -0,0 +1,164 @@
+import json
+
+import pytest
+
+from scripts.history import price_history as ph
+from scripts.history.price_history import HistoricoJSON, HistoricoSQLite
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def historico(request, tmp_path):
+    if request.param == "json":
+        h = HistoricoJSON(tmp_path / "prices.json")
+    else:
+        h = HistoricoSQLite(tmp_path / "prices.sqlite")
+    yield h
+    if request.param == "sqlite":
+        h.conn.close()
+
+
+def reabrir(h):
+    """Salva e abre de novo do disco"""
+    caminho = h.caminho
+    h.salvar()
+    return type(h)(caminho)
+
+
+# =====================================================
+# BACKENDS
+# =====================================================
+
+def test_registrar_e_ler(historico):
+    assert historico.ultimo_preco("gatry-1") is None
+    assert historico.serie("gatry-1") == []
+
+    historico.registrar("gatry-1", "Air Fryer", 399.0, "2026-01-10T12:00:00Z")
+    historico.registrar("gatry-1", "Air Fryer", 349.0, "2026-02-10T12:00:00Z")
+
+    assert historico.ultimo_preco("gatry-1") == 349.0
+    assert historico.serie("gatry-1") == [399.0, 349.0]
+    assert historico.total_produtos() == 1
+
+
+def test_dados_sobrevivem_a_salvar(historico):
+    historico.registrar("gatry-1", "Air Fryer", 399.0, "2026-01-10T12:00:00Z")
+    historico.registrar("pelando-2", "Kindle", 499.0, "2026-01-11T12:00:00Z")
+
+    h = reabrir(historico)
+    assert h.serie("gatry-1") == [399.0]
+    assert h.ultimo_preco("pelando-2") == 499.0
+    assert {pid for pid, _, _ in h.produtos()} == {"gatry-1", "pelando-2"}
+    if isinstance(h, HistoricoSQLite):
+        h.conn.close()
+
+
+def test_migrar_json_para_sqlite(tmp_path):
+    origem = tmp_path / "prices.json"
+    origem.write_text(json.dumps({
+        # V1 (slug)
+        "air-fryer": [{"price": 399.0, "seen_at": "2026-01-10T12:00:00Z"}, {"price": 349.0, "seen_at": "2026-02-10T12:00:00Z"}],
+        # V2 (ID)
+        "gatry-1": {"title": "Kindle", "prices": [{"val": 499.0, "at": "2026-01-11T12:00:00Z"}]},
+        "vazio": {"title": "Nada", "prices": []},
+    }), encoding="utf-8")
+
+    destino = HistoricoSQLite(tmp_path / "prices.sqlite")
+    ph.migrar_json(origem, destino)
+
+    assert destino.total_produtos() == 2
+    assert destino.serie("air-fryer") == [399.0, 349.0]
+    assert destino.ultimo_preco("gatry-1") == 499.0
+
+    # Com dados, não migra de novo
+    ph.migrar_json(origem, destino)
+    assert destino.serie("air-fryer") == [399.0, 349.0]
+    destino.conn.close()
+
+
+# =====================================================
+# AGREGADOS
+# =====================================================
+
+SERIE = [
+    (100.0, "2026-01-05T12:00:00Z"),
+    (80.0, "2026-02-05T12:00:00Z"),
+    (120.0, "2026-03-05T12:00:00Z"),
+    (95.0, "2026-04-05T12:00:00Z"),
+]
+
+
+def test_agregados_incrementais(historico):
+    for val, at in SERIE:
+        historico.registrar("gatry-1", "Air Fryer", val, at)
+
+    stats = historico.estatisticas("gatry-1")
+    assert stats["qtd"] == 4
+    assert stats["soma"] == pytest.approx(395.0)
+    assert (stats["minimo"], stats["maximo"], stats["ultimo"]) == (80.0, 120.0, 95.0)
+    assert historico.estatisticas("nao-existe") is None
+
+
+def test_reconstruir_da_o_mesmo_que_o_incremental(historico):
+    for val, at in SERIE:
+        historico.registrar("gatry-1", "Air Fryer", val, at)
+    historico.registrar("pelando-2", "Kindle", 499.0, "2026-01-11T12:00:00Z")
+    antes = {pid: dict(historico.estatisticas(pid)) for pid in ("gatry-1", "pelando-2")}
+    janela = historico.janela("gatry-1")
+
+    assert historico.reconstruir_estatisticas() == 2
+    assert {pid: historico.estatisticas(pid) for pid in antes} == antes
+    assert historico.janela("gatry-1") == janela
+
+
+def test_mesclar_series_fora_de_ordem(historico):
+    # A origem chegou antes, mas com um preço mais recente que o do destino
+    historico.registrar("gatry-9", "Air Fryer", 95.0, "2026-03-05T12:00:00Z")
+    historico.registrar("gatry-9", "Air Fryer", 90.0, "2026-04-05T12:00:00Z")
+    historico.registrar("amazon:B0AIRFRYER", "Air Fryer", 100.0, "2026-01-05T12:00:00Z")
+    historico.registrar("amazon:B0AIRFRYER", "Air Fryer", 110.0, "2026-02-05T12:00:00Z")
+
+    historico.mesclar("amazon:B0AIRFRYER", ["gatry-9"])
+    historico.reconstruir_estatisticas()
+
+    assert historico.serie("amazon:B0AIRFRYER") == [100.0, 110.0, 95.0, 90.0]
+    assert historico.serie("gatry-9") == []
+    stats = historico.estatisticas("amazon:B0AIRFRYER")
+    assert (stats["qtd"], stats["minimo"], stats["maximo"], stats["ultimo"]) == (4, 90.0, 110.0, 90.0)
+    ats = historico.janela("amazon:B0AIRFRYER")[0::2]
+    assert list(ats) == sorted(ats)
+    assert historico.ultimo_preco("amazon:B0AIRFRYER") == 90.0
+
+
+def test_agregar_serie():
+    stats = ph.agregar_serie(SERIE)
+    assert stats == {
+        "qtd": 4, "soma": 395.0, "minimo": 80.0, "maximo": 120.0,
+        "ultimo": 95.0, "primeiro_em": SERIE[0][1], "ultimo_em": SERIE[-1][1],
+    }
+
+
+# =====================================================
+# JANELAS 30/90/180 DIAS
+# =====================================================
+
+def test_janela_descarta_o_que_saiu_da_maior_janela():
+    buffer = ph.janela_serie([(100.0, 0), (90.0, 10 * ph.DIA), (80.0, 200 * ph.DIA), (70.0, 300 * ph.DIA)])
+    # Corte em 120 dias: fica o último preço antes dele (vigente no começo da janela)
+    assert list(buffer) == [10 * ph.DIA, 90.0, 200 * ph.DIA, 80.0, 300 * ph.DIA, 70.0]
+
+
+def test_estatisticas_janelas():
+    agora = 1000 * ph.DIA
+    buffer = ph.janela_serie([
+        (200.0, agora - 150 * ph.DIA),
+        (150.0, agora - 60 * ph.DIA),
+        (100.0, agora - 20 * ph.DIA),
+        (120.0, agora - 5 * ph.DIA),
+    ])
+    janelas = ph.estatisticas_janelas(buffer, 120.0, agora=agora)
+
+    # 30 dias: 150 (vigente no corte), 100, 120
+    assert janelas[30] == {"minimo": 100.0, "mediana": 120.0, "percentil": 50.0}
+    assert janelas[90]["minimo"] == 100.0
+    assert janelas[180]["mediana"] == pytest.approx(135.0)
+    assert ph.estatisticas_janelas(ph.janela_serie([]), 10.0, agora=agora) == {}
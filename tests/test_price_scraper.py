@@ -0,0 +1,253 @@
+import pytest
+
+
+@pytest.fixture
+def scraper():
+    pytest.importorskip("bs4")
+    pytest.importorskip("requests")
+    from scripts.scrapers import price_scraper_v2
+    return price_scraper_v2
+
+
+@pytest.fixture
+def relogio(scraper, monkeypatch):
+    """time.monotonic controlado pelo teste"""
+    agora = [1000.0]
+    monkeypatch.setattr(scraper.time, "monotonic", lambda: agora[0])
+    return agora
+
+
+# =====================================================
+# TOKEN BUCKET
+# =====================================================
+
+def test_token_bucket_espaca_requisicoes_pela_taxa(scraper, relogio):
+    bucket = scraper.TokenBucket(taxa=2.0)  # 1 req a cada 0.5s
+
+    assert bucket.reservar() == 0.0
+    assert bucket.reservar() == pytest.approx(0.5)
+    # Quem reservou depois espera o token do anterior também
+    assert bucket.reservar() == pytest.approx(1.0)
+
+
+def test_token_bucket_repoe_tokens_com_o_tempo(scraper, relogio):
+    bucket = scraper.TokenBucket(taxa=2.0, capacidade=2)
+    assert bucket.reservar() == 0.0
+    assert bucket.reservar() == 0.0
+    assert bucket.reservar() > 0
+
+    relogio[0] += 10  # Parado bastante tempo: enche só até a capacidade
+    assert bucket.reservar() == 0.0
+    assert bucket.reservar() == 0.0
+    assert bucket.reservar() == pytest.approx(0.5)
+
+
+def test_token_bucket_da_loja_usa_delay_medio(scraper):
+    minimo, maximo = scraper.STORE_CONFIGS["Mercado Livre"]["delay"]
+    bucket = scraper.TokenBucket.da_loja("Mercado Livre")
+    assert bucket.taxa == pytest.approx(2.0 / (minimo + maximo))
+
+    padrao = scraper.TokenBucket.da_loja("Loja Desconhecida")
+    assert padrao.taxa == pytest.approx(2.0 / sum(scraper.STORE_CONFIGS["default"]["delay"]))
+
+
+# =====================================================
+# AMAZON EM LOTE
+# =====================================================
+
+def item_amazon(asin, preco):
+    return {
+        "ASIN": asin,
+        "ItemInfo": {"Title": {"DisplayValue": f"Produto {asin}"}},
+        "Offers": {"Listings": [{"Price": {"Amount": preco}}]},
+    }
+
+
+def test_amazon_distribuir_lote_mapeia_por_asin(scraper):
+    # A API não devolve os itens na ordem pedida nem todos os ASINs
+    data = {"ItemsResult": {"Items": [item_amazon("B000000002", 20.0), item_amazon("B000000001", 10.0)]}}
+    resultados = scraper.amazon_distribuir_lote(["B000000001", "B000000002", "B000000003"], data, 200)
+
+    assert resultados["B000000001"]["preco"] == 10.0
+    assert resultados["B000000002"]["titulo"] == "Produto B000000002"
+    assert "erro" in resultados["B000000003"]
+
+
+def test_amazon_distribuir_lote_erro_vale_para_o_lote_todo(scraper):
+    data = {"Errors": [{"Message": "TooManyRequests"}]}
+    resultados = scraper.amazon_distribuir_lote(["B000000001", "B000000002"], data, 429)
+    assert resultados == {
+        "B000000001": {"erro": "TooManyRequests"},
+        "B000000002": {"erro": "TooManyRequests"},
+    }
+
+
+def test_amazon_buscar_lote_manda_ate_10_asins_por_requisicao(scraper, monkeypatch):
+    lotes = []
+
+    class Resposta:
+        status_code = 200
+        text = "{}"
+
+        def __init__(self, lote):
+            self.lote = lote
+
+        def json(self):
+            return {"ItemsResult": {"Items": [item_amazon(a, 1.0) for a in self.lote]}}
+
+    monkeypatch.setattr(scraper, "aguardar_vez", lambda loja: None)
+    monkeypatch.setattr(scraper, "amazon_montar_requisicao", lambda lote: ("url", {}, list(lote)))
+    monkeypatch.setattr(scraper.requests, "post", lambda url, headers, data, timeout: lotes.append(data) or Resposta(data))
+
+    asins = [f"B{i:09d}" for i in range(23)]
+    resultados = scraper.amazon_buscar_lote(asins + asins[:3])  # Repetidos vão uma vez só
+
+    assert [len(lote) for lote in lotes] == [10, 10, 3]
+    assert set(resultados) == set(asins)
+    assert all(r["preco"] == 1.0 for r in resultados.values())
+
+
+# =====================================================
+# LINKS CURTOS NO RATE LIMIT DA LOJA
+# =====================================================
+
+@pytest.fixture
+def cache_links(scraper, monkeypatch, tmp_path):
+    from scripts.utils.links import CacheLinks
+    cache = CacheLinks(tmp_path / "links.sqlite")
+    monkeypatch.setattr(scraper, "CACHE_LINKS", cache)
+    return cache
+
+
+def test_resolver_link_da_loja_so_espera_a_vez_sem_cache(scraper, cache_links, monkeypatch):
+    vez = []
+    monkeypatch.setattr(scraper, "aguardar_vez", vez.append)
+    monkeypatch.setattr(scraper, "resolver_link", lambda url, **kw: ("https://www.amazon.com.br/dp/B000000001", None))
+
+    cache_links.salvar("https://amzn.to/emcache", "https://www.amazon.com.br/dp/B000000002")
+    scraper.resolver_link_da_loja("https://amzn.to/emcache", "Amazon")
+    scraper.resolver_link_da_loja("https://www.amazon.com.br/dp/B000000003", "Amazon")
+    assert vez == []
+
+    scraper.resolver_link_da_loja("https://amzn.to/novo", "Amazon")
+    assert vez == ["Amazon"]
+
+
+def test_resolver_link_da_loja_async_respeita_vagas_da_loja(scraper, cache_links, monkeypatch):
+    import asyncio
+
+    em_voo = {"agora": 0, "maximo": 0}
+    vez = []
+
+    async def resolver_falso(url, cliente):
+        em_voo["agora"] += 1
+        em_voo["maximo"] = max(em_voo["maximo"], em_voo["agora"])
+        await asyncio.sleep(0.01)
+        em_voo["agora"] -= 1
+        return url + "/final", None
+
+    async def aguardar_falso(loja):
+        vez.append(loja)
+
+    monkeypatch.setattr(scraper, "resolver_link_async", resolver_falso)
+    monkeypatch.setattr(scraper, "aguardar_vez_async", aguardar_falso)
+
+    async def rodar():
+        monkeypatch.setitem(scraper.SEMAFOROS_ASYNC, "Shopee", asyncio.Semaphore(2))
+        urls = [f"https://s.shopee.com.br/{i}" for i in range(6)]
+        return await asyncio.gather(*(scraper.resolver_link_da_loja_async(u, None, "Shopee") for u in urls))
+
+    finais = asyncio.run(rodar())
+    assert [f for f, _ in finais] == [f"https://s.shopee.com.br/{i}/final" for i in range(6)]
+    assert em_voo["maximo"] == 2
+    assert vez == ["Shopee"] * 6
+
+
+def test_parse_das_paginas_fora_do_event_loop(scraper, monkeypatch):
+    import asyncio
+    import threading
+
+    threads = {}
+
+    class Resposta:
+        url = "https://www.mercadolivre.com.br/p/MLB123"
+        status_code = 200
+        headers = {}
+        text = "<html></html>"
+
+    class Cliente:
+        async def get(self, url, headers=None):
+            return Resposta()
+
+    def processar(url, status_code, headers, texto, parser):
+        threads[parser.__name__] = threading.get_ident()
+        return {"preco": 10.0}
+
+    async def aguardar_falso(loja):
+        pass
+
+    monkeypatch.setattr(scraper.CACHE_HTTP, "processar", processar)
+    monkeypatch.setattr(scraper.CACHE_HTTP, "cabecalhos", lambda url: {})
+    monkeypatch.setattr(scraper, "aguardar_vez_async", aguardar_falso)
+    monkeypatch.setattr(scraper, "registrar_redirect", lambda *a: None)
+
+    async def rodar():
+        url = "https://www.mercadolivre.com.br/p/MLB123"
+        resultados = await asyncio.gather(
+            scraper.scrape_mercadolivre_async(url, Cliente()),
+            scraper.scrape_magalu_async(url, Cliente()),
+        )
+        return resultados, threading.get_ident()
+
+    resultados, loop = asyncio.run(rodar())
+    assert resultados == [{"preco": 10.0}] * 2
+    assert set(threads) == {"parse_mercadolivre", "parse_magalu"}
+    assert loop not in threads.values()
+
+
+# =====================================================
+# SHOPEE EM LOTE
+# =====================================================
+
+def test_shopee_separar_lote_distribui_dados_e_erros_por_alias(scraper):
+    result = {
+        "data": {"p0": {"nodes": [{"priceMin": "10"}]}, "p1": None},
+        "errors": [{"message": "item inválido", "path": ["p1"]}],
+    }
+    p0, p1, p2 = scraper.shopee_separar_lote(result, "p", 3)
+
+    assert p0 == {"data": {"p0": {"nodes": [{"priceMin": "10"}]}}}
+    assert p1["errors"] == [{"message": "item inválido", "path": ["p1"]}]
+    assert p2 == {"data": {}}
+
+
+def test_shopee_buscar_lote_uma_query_e_uma_mutation(scraper, monkeypatch):
+    documentos = []
+
+    def requisicao_falsa(documento):
+        documentos.append(documento)
+        if documento.startswith("query"):
+            return {
+                "data": {
+                    "p0": {"nodes": [{"productName": "Panela", "priceMin": "89.9"}]},
+                    "p1": {"nodes": []},
+                },
+            }
+        return {"data": {"l0": {"shortLink": "https://s.shopee.com.br/afiliado"}}}
+
+    monkeypatch.setattr(scraper, "aguardar_vez", lambda loja: None)
+    monkeypatch.setattr(scraper, "shopee_fazer_requisicao", requisicao_falsa)
+
+    panela = "https://shopee.com.br/panela-i.111.222"
+    sumiu = "https://shopee.com.br/product/333/444"
+    sem_id = "https://shopee.com.br/busca?q=panela"
+    resultados = scraper.shopee_buscar_lote([panela, sumiu, sem_id])
+
+    assert len(documentos) == 2
+    assert "shopId: 111, itemId: 222" in documentos[0] and "shopId: 333, itemId: 444" in documentos[0]
+    # Só quem tem preço ganha link de afiliado
+    assert documentos[1].count("generateShortLink") == 1
+    assert resultados[panela]["preco"] == 89.9
+    assert resultados[panela]["link_afiliado"] == "https://s.shopee.com.br/afiliado"
+    assert "erro" in resultados[sumiu]
+    assert "erro" in resultados[sem_id]
@@ -0,0 +1,86 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from scripts.ranking import rank
+
+
+@pytest.fixture(autouse=True)
+def sem_cache_de_buscadores(monkeypatch):
+    monkeypatch.setattr(rank, "_matchers", None)
+
+
+def pontuar_por_substring(item):
+    """A regra antiga, termo a termo com `in`"""
+    title = str(item.get("title", "")).lower()
+    if not any(s in str(item.get("store", "")).lower() for s in rank.ALLOWED_STORES):
+        return -1
+    if any(w in title for w in rank.BLOCKLIST):
+        return -1
+    score = 50 + sum(pts for w, pts in rank.INTERESTS if w in title)
+    if item.get("price", 0) < 10:
+        score -= 20
+    return score
+
+
+@pytest.mark.parametrize("item", [
+    {"title": "Notebook Gamer RTX 4060", "store": "Amazon", "price": 5000},
+    {"title": "iPhone 15 + capa para iPhone", "store": "Amazon", "price": 5000},
+    {"title": "Air Fryer Oster", "store": "Loja Qualquer", "price": 300},
+    {"title": "Geladeira Frost Free", "store": "Magazine Luiza", "price": 3000},
+    {"title": "Cabo USB-C", "store": "Shopee", "price": 5},
+    {"title": "Parafuso", "store": "Mercado Livre", "price": 5},
+])
+def test_pontuacao_igual_a_busca_por_substring(item):
+    assert rank.calculate_score(item) == pontuar_por_substring(item)
+
+
+def test_palavra_de_interesse_conta_uma_vez():
+    item = {"title": "RTX rtx RTX", "store": "amazon", "price": 100}
+    assert rank.calculate_score(item) == 50 + 50
+
+
+def test_listas_do_arquivo_de_config():
+    config = Path("data/config/ranking.json")
+    config.parent.mkdir(parents=True)
+    config.write_text(json.dumps({"blocklist": ["kit"], "interests": [["cafeteira", 25]]}), encoding="utf-8")
+
+    assert rank.calculate_score({"title": "Kit cafeteira", "store": "amazon", "price": 100}) == -1
+    assert rank.calculate_score({"title": "Cafeteira", "store": "amazon", "price": 100}) == 75
+    # Chave ausente no arquivo: vale a lista do código
+    assert rank.calculate_score({"title": "Cafeteira", "store": "Loja X", "price": 100}) == -1
+
+
+# =====================================================
+# MENOR PREÇO / TAGS
+# =====================================================
+
+def ranquear(**campos):
+    item = {"title": "Parafuso sextavado", "store": "amazon", "price": 100, **campos}
+    [resultado] = rank.rank_offers(items=[item], salvar=False)
+    return resultado["score"], resultado["tags"]
+
+
+def test_primeira_observacao_nao_ganha_menor_preco():
+    # Com uma observação só, is_lowest_price vem sempre True
+    assert ranquear(is_lowest_price=True, history_count=1) == (50, [])
+
+
+def test_menor_preco_com_historico():
+    assert ranquear(is_lowest_price=True, history_count=2) == (80, ["🔥 Menor Preço", "💎 Top"])
+    assert ranquear(is_lowest_price=False, history_count=5) == (50, [])
+
+
+def test_top_por_palavra_chave_sem_historico():
+    item = {"title": "Console PS5 Slim", "store": "amazon", "price": 3500,
+            "is_lowest_price": True, "history_count": 1}
+    [resultado] = rank.rank_offers(items=[item], salvar=False)
+    assert resultado["score"] == 90
+    assert resultado["tags"] == ["💎 Top"]
+
+
+def test_desconto_real_soma_e_marca():
+    score, tags = ranquear(is_lowest_price=True, history_count=3, history_median_90d=125)
+    assert score == 50 + 30 + 20
+    assert tags == ["🔥 Menor Preço", "📉 -20% vs 90 dias", "💎 Top"]
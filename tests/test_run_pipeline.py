@@ -0,0 +1,79 @@
+import pytest
+
+from scripts import run_pipeline
+from scripts.run_pipeline import Etapa, executar_dag
+
+
+@pytest.fixture(autouse=True)
+def raiz(tmp_path, monkeypatch):
+    """DAG apontando para a pasta temporária, com um arquivo de código para cada etapa"""
+    monkeypatch.setattr(run_pipeline, "ROOT", tmp_path)
+    monkeypatch.setattr(run_pipeline, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(run_pipeline, "MANIFESTO", tmp_path / "cache" / "manifesto.json")
+    (tmp_path / "etapa.py").write_text("# código", encoding="utf-8")
+    (tmp_path / "entrada.json").write_text("[1, 2]", encoding="utf-8")
+    return tmp_path
+
+
+def etapas(execucoes, historico):
+    """entrada -> soma -> historico (que lê e regrava o próprio arquivo)"""
+    def somar():
+        execucoes.append("soma")
+        return 3
+
+    def registrar(soma):
+        execucoes.append("historico")
+        historico.write_text(str(int(historico.read_text()) + soma) if historico.exists() else str(soma))
+        return soma
+
+    return [
+        Etapa("soma", "Soma", somar, entradas=["entrada.json"], codigo=["etapa.py"]),
+        Etapa("historico", "Histórico", registrar, depende=["soma"], codigo=["etapa.py"],
+              estado=["historico.txt"]),
+    ]
+
+
+def test_pula_etapas_sem_mudanca(raiz):
+    execucoes = []
+    executar_dag(etapas(execucoes, raiz / "historico.txt"))
+    executar_dag(etapas(execucoes, raiz / "historico.txt"))
+
+    assert execucoes == ["soma", "historico"]
+
+
+def test_entrada_nova_roda_de_novo(raiz):
+    execucoes = []
+    executar_dag(etapas(execucoes, raiz / "historico.txt"))
+    (raiz / "entrada.json").write_text("[1, 2, 3]", encoding="utf-8")
+    executar_dag(etapas(execucoes, raiz / "historico.txt"))
+
+    assert execucoes == ["soma", "historico"] * 2
+
+
+def test_estado_alterado_fora_da_etapa_roda_de_novo(raiz):
+    execucoes = []
+    historico = raiz / "historico.txt"
+    executar_dag(etapas(execucoes, historico))
+    historico.write_text("100")  # ex: mesclagem de outro histórico
+    executar_dag(etapas(execucoes, historico))
+
+    assert execucoes == ["soma", "historico", "historico"]
+    assert historico.read_text() == "103"
+
+
+def test_estado_removido_roda_de_novo(raiz):
+    execucoes = []
+    historico = raiz / "historico.txt"
+    executar_dag(etapas(execucoes, historico))
+    historico.unlink()
+    executar_dag(etapas(execucoes, historico))
+
+    assert execucoes == ["soma", "historico", "historico"]
+
+
+def test_forcar(raiz):
+    execucoes = []
+    executar_dag(etapas(execucoes, raiz / "historico.txt"))
+    executar_dag(etapas(execucoes, raiz / "historico.txt"), forcar=True)
+
+    assert execucoes == ["soma", "historico"] * 2
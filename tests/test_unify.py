@@ -0,0 +1,94 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from scripts.normalizers import unify
+
+
+def oferta(n, preco=10.0):
+    return {
+        "id": str(n),
+        "title": f"Oferta {n}",
+        "price": preco,
+        "url": f"https://www.amazon.com.br/dp/B{n:09d}",
+        "collected_at": f"2026-01-{n % 28 + 1:02d}T10:00:00Z",
+    }
+
+
+def gravar(fonte, itens):
+    caminho = Path("data/raw") / f"{fonte}.json"
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    caminho.write_text(json.dumps(itens), encoding="utf-8")
+
+
+@pytest.fixture
+def normalizados(monkeypatch):
+    """Conta os itens que passaram por normalize_item"""
+    contagem = []
+    original = unify.normalize_item
+
+    def contar(item, source):
+        contagem.append((source, item.get("id")))
+        return original(item, source)
+
+    monkeypatch.setattr(unify, "normalize_item", contar)
+    return contagem
+
+
+def test_incremental_igual_ao_completo(normalizados):
+    gravar("gatry", [oferta(1), oferta(2)])
+    gravar("pelando", [oferta(3)])
+
+    unified, em_dia = unify.unificar_incremental()
+    assert not em_dia
+    assert unified == unify.unificar()
+
+
+def test_segunda_execucao_sem_mudanca_nao_normaliza_nada(normalizados):
+    gravar("gatry", [oferta(1), oferta(2)])
+    unify.main(incremental=True)
+    normalizados.clear()
+
+    unified, em_dia = unify.unificar_incremental()
+    assert em_dia
+    assert normalizados == []
+    assert [o["id"] for o in unified] == ["gatry-2", "gatry-1"]
+
+
+def test_so_itens_alterados_sao_normalizados(normalizados):
+    gravar("gatry", [oferta(1), oferta(2)])
+    gravar("pelando", [oferta(3)])
+    unify.main(incremental=True)
+    normalizados.clear()
+
+    gravar("gatry", [oferta(1), oferta(2, preco=7.5), oferta(4)])
+    unified, em_dia = unify.unificar_incremental()
+
+    assert not em_dia
+    assert sorted(normalizados) == [("gatry", "2"), ("gatry", "4")]
+    assert {o["id"]: o["price"] for o in unified}["gatry-2"] == 7.5
+    assert unified == unify.unificar()
+
+
+def test_arquivo_removido_sai_do_unificado(normalizados):
+    gravar("gatry", [oferta(1)])
+    gravar("pelando", [oferta(3)])
+    unify.main(incremental=True)
+
+    Path("data/raw/pelando.json").unlink()
+    unified, em_dia = unify.unificar_incremental()
+    assert not em_dia
+    assert [o["id"] for o in unified] == ["gatry-1"]
+
+
+def test_sem_gravar_a_saida_a_proxima_nao_fica_em_dia(normalizados):
+    gravar("gatry", [oferta(1)])
+    unify.main(incremental=True)
+
+    # Pipeline em memória: o raw mudou mas o unified.json não foi regravado
+    gravar("gatry", [oferta(1), oferta(2)])
+    unify.main(incremental=True, salvar=False)
+
+    _, em_dia = unify.unificar_incremental()
+    assert not em_dia